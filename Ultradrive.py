@@ -1,67 +1,156 @@
 import asyncio
-import atexit
-import threading
+import logging
+import random
+from collections import deque
 from dataclasses import dataclass
-from threading import RLock
-from typing import Dict
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
-import serial
-from apscheduler.executors.pool import ThreadPoolExecutor
-from apscheduler.jobstores.memory import MemoryJobStore
-from apscheduler.schedulers.background import BackgroundScheduler
-from serial import aio
-from serial.threaded import Packetizer
+import serial.threaded
 
+import checksum
 import const
+import locations
+import metrics
+from coalescer import Coalescer
+from framer import SysexFramer
+from levels import LevelHistory
+from parameters import Parameters
+from pending import PendingRequests
+from scheduler import PollScheduler
+
+
+# captured from a real device, served when no serial port is available
+DUMMY_DUMP_0 = b'\xf0\x00 2\x00\x0e\x10\x01\x01\x00\x02\x00\x00n\x06\x00\x00\x00\x00\x00\x00XPCR\x01\x00\x11\x00\x01^\x06\x00\x00XP\x00RB\x01\x00\x11\x01\x1a\x00\x00\x00\x00\x05\x00\x00\x00\x00\x00\x00\x01\x00\x01\x00D\x00CX2496 \x00       \x00 \'/-=XC\x1eUR\x01\x00\x11\x01|@\x05\x00\x00\x00\x00\x00\x00\x00\x01\x002*3WA\x00Y  \x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x01\x00\x01\x00\x00\x00\x00\x01\x00\x01\x00\'\x00\x16@\x00\x16\x00\x16\x00>\x00*\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x00\x01\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x00\x01\x01\x00\x01\x00\x00`\x00\x14\x00=\x00\x01\x10\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00>\x00\x00\x00\x08\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00 \x05\x00X\x02\x00\x004@\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x00\x04\x01\x01\x00\x01\x00`\x00\x00\x14\x00=\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x00\x16\x00\x00\x00\x00\x00\x02\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00\x08X\x02\x00\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02/\x01\x14\x00\x00\x00\x01\x00\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x00\x16A\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x02\x00\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00,\x01\x00\x00\x00\x00\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00$\x00\x01\x10\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17@\x00\x05\x00X\x02\x00\x00\x004\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00\x05\x00\x14\x00\x00\x00\x00\x01\x00\x01\x004@\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x00\t\x00\x00\x00\x06\x00\x00\x00\x00\x06\x00|\x00\x00\x00\x00p\x00\r\x00\x00\x14\x00\x00\x00\x00\x00$\x00 \x01\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x00\x01\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00\x05\x00\x14\x00\x00\x00\x00\x01\x00\x01\x00\x004\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x026\xf7'
+DUMMY_DUMP_1 = b'\xf0\x00 2\x00\x0e\x10\x01\x01\x00\x02\x00\x014\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00\x10\x00\x01\x00\x00\x06\x00\x00\x00\x06\x00|\x00\x00\x00\x00p\x00\r\x00(\x00\x00\x00\x00\x00\x00\x04@\x00\x01\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x02\x00\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00,\x01\x01\x00\x01\x00\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00\x0b\x00\x00\x00\x00\x06\x00|\x00\x06\x00\x00h\x00\x00\x00p\x00\rQ\x00\x00\x00\x00\x00\x00\x00\x00\x04\x00\x01\x00\x00\x00\x00\x01\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00X\x04\x02\x00\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00,\x01\x01\x00\x00\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x00\x12\x00\x00\x01\x00\x06\x00|\x00\x06\x00\x00h\x00\x00\x00p\x00"\r\x00\x00\x00\x00\x00\x00\x01\x00\x16\x00\x01\x00\x00\x00\x02\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00\x08X\x02\x00\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02 \x01\x14\x00\x00\x00\x01\x00\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x00\r\x01\x00\x00\x00\x06\x00h\x00 \x00\x00?\x01\x00\x00p@\x00\r\x00\x00\x00\x00\x00\x02\x00\x00\x16\x00\x01\x00\x00\x04\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x10\x00X\x02\x00\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x00 \x01\x14\x00\x00\x00\x00\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02\x14\x00\x01\x00\x06\x00h@\x00\x00\x00?\x01\x00\x00\x00p\x00\r\x00\x00\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00I\x00\x00N\x00P\x00U\x00\x00T\x00 \x00A\x00 \x00\x00\x00\x00LLI\x00\x18N\x00P\x00U\x00T\x00\x00 \x00B\x00 \x00\x00\x00\x00L&I\x00N\x00\x00P\x00U\x00T\x00\x00 \x00C\x00 \x00\x00\x00\x00l\x1cS\x00U\x00\x04M\x00 \x00 \x00 \x00\x00 \x00 \x00\x00\x00\x00^L\'<*-X>PRE\x01\x00\x11\x01\x00\x18\x00\x00\x00\x00\x00\x00\x00\x00A     \x00  \x00\x00A  \x00     \x00\x00\x00\'/-:\'/<\x7f-\x00\x00\x00\x00\x00\x00\x01\\\xf7'
+DUMMY_SEARCH_RESPONSE = bytes.fromhex("f0002032000e000111444358323439362d3020202020202020f7")
+DUMMY_PING_RESPONSE = b'\xf0\x00 2\x00\x0e\x04\x10\x04\x05\x05\x04\x04\x02\x02\x04\x02\x00\x00\x00\x00\x0e\x00\x00\xf7'
 
 
 @dataclass
 class Device:
-    dump0: bytearray
-    dump1: bytearray
+    # dump0, dump1 and ping_response are views into one dump0|dump1|ping buffer, the blob served to the gui
+    dump0: memoryview
+    dump1: memoryview
     search_response: bytearray
-    ping_response: bytearray
+    ping_response: memoryview
     device_id: int
+    bus: int
+    instance: int
+    history: Deque[Tuple[int, tuple]]
+    checks: Tuple[checksum.PartCheck, checksum.PartCheck]
+    parameters: Parameters
     is_new: bool = True
-
-    def __init__(self, device_id: int):
-        self.dump0: bytearray = bytearray(const.PART_0_LENGTH)
-        self.dump1: bytearray = bytearray(const.PART_1_LENGTH)
+    generation: int = 0
+    # stale: not heard of since the last resync, lost: stopped answering pings - changes may have been missed
+    stale: bool = False
+    lost: bool = False
+
+    def __init__(self, device_id: int, bus: int = 0):
+        self.__gui = memoryview(bytearray(const.GUI_LENGTH))
+        self.__gui_view = self.__gui.toreadonly()
+        self.__gui_bytes = None
+        self.__gui_generation = None
+        self.dump0 = self.__gui[:const.GUI_DUMP_1_OFFSET]
+        self.dump1 = self.__gui[const.GUI_DUMP_1_OFFSET:const.GUI_PING_OFFSET]
+        self.ping_response = self.__gui[const.GUI_PING_OFFSET:]
         self.search_response: bytearray = bytearray(const.SEARCH_RESPONSE_LENGTH)
-        self.ping_response: bytearray = bytearray(const.PING_RESPONSE_LENGTH)
         self.device_id = device_id
-
-    def to_gui(self) -> bytearray:
-        ret = bytearray()
-        ret.extend(self.dump0)
-        ret.extend(self.dump1)
-        ret.extend(self.ping_response)
-        return ret
+        self.bus = bus
+        # tells apart generations of a device re-created after it was removed or the backend restarted
+        self.instance = random.getrandbits(32)
+        # (generation, ((start, end), ...)) with offsets into the to_gui blob
+        self.history = deque(maxlen=const.DELTA_HISTORY_LENGTH)
+        self.checks = (checksum.PartCheck(), checksum.PartCheck())
+        self.parameters = Parameters((self.dump0, self.dump1))
+
+    def to_gui(self) -> memoryview:
+        return self.__gui_view
+
+    def gui_bytes(self) -> bytes:
+        # an immutable copy for http responses, made at most once per generation
+        generation = self.generation
+        if self.__gui_generation != generation:
+            self.__gui_bytes = self.__gui.tobytes()
+            self.__gui_generation = generation
+        return self.__gui_bytes
+
+    def read(self, start: int, end: int) -> memoryview:
+        return self.__gui_view[start:end]
+
+    def patch(self, channel: int, param: int, value_high: int, value_low: int) -> Optional[List[Tuple[int, int]]]:
+        location = locations.LOCATIONS.get((channel, param))
+        if location is None:
+            return None
+        dumps = (self.dump0, self.dump1)
+        touched = locations.touched(location)
+        old = [dumps[part][byte] for part, byte in touched]
+        locations.patch(dumps, location, value_high, value_low)
+        for (part, byte), value in zip(touched, old):
+            self.checks[part].patched(value, dumps[part][byte])
+        return [(byte + part * const.GUI_DUMP_1_OFFSET, byte + part * const.GUI_DUMP_1_OFFSET + 1)
+                for part, byte in touched]
+
+    def doubt(self):
+        for check in self.checks:
+            check.in_doubt = True
+
+    @property
+    def verified(self) -> bool:
+        # both dump parts came from the device itself since it was first seen, restored or lost
+        return not any(check.in_doubt for check in self.checks)
+
+    def changed(self, *ranges: Tuple[int, int]):
+        self.parameters.invalidate(*ranges)
+        # the ranges are in the history before readers see their generation
+        self.history.append((self.generation + 1, ranges))
+        self.generation += 1
+
+    def changes_since(self, generation: int) -> Optional[List[Tuple[int, int]]]:
+        # merged (start, end) ranges changed after generation - None if that generation is unknown or aged out,
+        # runs on http threads while the loop thread appends to the history
+        history = list(self.history)
+        # the history may already hold the next generation, everything answers for the one read here
+        current = self.generation
+        if generation == current:
+            return []
+        if generation > current or not history or history[0][0] > generation + 1:
+            return None
+        ranges = sorted(r for g, changed in history if generation < g <= current for r in changed)
+        merged = []
+        for start, end in ranges:
+            # a range header costs 4 bytes, joining closer ranges is cheaper
+            if merged and start <= merged[-1][1] + 4:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        return [(start, end) for start, end in merged]
 
 
-class Ultadrive(threading.Thread):
-    def __init__(self, logger):
-        super(Ultadrive, self).__init__()
+class Ultadrive:
+    # one RS485 chain - the Engine runs it on its event loop
+    def __init__(self, logger, port: str = const.SERIAL_PORTS[0], bus: int = 0):
+        self.port = port
+        self.bus = bus
         self.__logger = logger.getChild("ultradrive")
         self.__io_logger = self.__logger.getChild("io")
         self.__packet_logger = self.__logger.getChild("packet")
         self.__loop = None
-        self.__coro = None
         self.__protocol = UltradriveProtocol(self.__logger, self)
         self.__devices = dict()
-
-        jobstores = {
-            'default': MemoryJobStore()
-        }
-        executors = {
-            'default': ThreadPoolExecutor(2),
-        }
-        job_defaults = {
-            'coalesce': True,
-            'max_instances': 1
-        }
-        self.__scheduler = BackgroundScheduler(jobstores=jobstores, executors=executors, job_defaults=job_defaults)
-        self.__logger.debug(f"created new Ultradrive thread {self}")
+        self.__pending = PendingRequests()
+        self.__listeners = []
+        # instance tells apart generations of different runs, generation changes with the list of known devices
+        self.instance = random.getrandbits(32)
+        # serving the demo data instead of a serial port
+        self.demo = False
+        self.__generation = 0
+        self.__scheduler = PollScheduler(self.__logger, self)
+        self.add_listener(self.__scheduler.update)
+        self.__coalescer = Coalescer(self.__logger, self)
+        self.__levels = LevelHistory()
+        self.add_listener(self.__levels.update)
+        self.__logger.debug(f"created new Ultradrive for bus {bus} on {port}")
 
     def protocol(self):
         self.__logger.debug(f"requesting protocol {self.__protocol}")
@@ -73,37 +162,70 @@ class Ultadrive(threading.Thread):
     def device(self, n: int) -> Device:
         return self.__devices[n]
 
+    def generation(self) -> int:
+        return self.__generation
+
+    def scheduler(self) -> PollScheduler:
+        return self.__scheduler
+
+    def levels(self) -> LevelHistory:
+        return self.__levels
+
+    def coalescer(self) -> Coalescer:
+        return self.__coalescer
+
+    def add_listener(self, listener):
+        # listener(device, command, packet) is called on the loop thread after a packet was stored,
+        # command is None if the whole device was replaced, const.DEVICE_REMOVED if it was dropped and
+        # const.LOCAL_CHANGE with the outgoing frame if set_parameters patched it
+        self.__listeners.append(listener)
+
+    def notify(self, device: Device, command, packet):
+        for listener in self.__listeners:
+            try:
+                listener(device, command, packet)
+            except Exception as e:
+                self.__logger.exception(f"listener {listener} failed for device {device.device_id}: {e}")
+
+    def attach(self, loop):
+        self.__loop = loop
+
+    def capture(self, capture):
+        # capture.Capture recording the traffic of this bus
+        self.__protocol.capture = capture
+
     def stop(self):
-        self.__logger.debug(f"stoppgin ultradrive thread {self}")
-        if self.__loop is not None:
-            self.__loop.stop()
-            self.__coro = None
-            self.__loop = None
-        if self.__scheduler is not None and self.__scheduler.running:
-            self.__scheduler.shutdown(wait=False)
+        # runs on the loop thread
+        self.__logger.debug(f"stopping bus {self.bus}")
+        self.__scheduler.stop()
+        self.__coalescer.cancel()
+        self.__pending.cancel_all()
+        if self.__protocol.capture is not None:
+            # chunks may still arrive until the transport is closed
+            capture, self.__protocol.capture = self.__protocol.capture, None
+            capture.close()
+        self.__protocol.close()
 
     # noinspection PyPep8
     def setup_dummy_data(self):
-        self.__devices[0] = Device(0)
-        self.__devices[1] = Device(1)
-        self.devices()[
-            0].dump0 = b'\xf0\x00 2\x00\x0e\x10\x01\x01\x00\x02\x00\x00n\x06\x00\x00\x00\x00\x00\x00XPCR\x01\x00\x11\x00\x01^\x06\x00\x00XP\x00RB\x01\x00\x11\x01\x1a\x00\x00\x00\x00\x05\x00\x00\x00\x00\x00\x00\x01\x00\x01\x00D\x00CX2496 \x00       \x00 \'/-=XC\x1eUR\x01\x00\x11\x01|@\x05\x00\x00\x00\x00\x00\x00\x00\x01\x002*3WA\x00Y  \x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x01\x00\x01\x00\x00\x00\x00\x01\x00\x01\x00\'\x00\x16@\x00\x16\x00\x16\x00>\x00*\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x00\x01\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x00\x01\x01\x00\x01\x00\x00`\x00\x14\x00=\x00\x01\x10\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00>\x00\x00\x00\x08\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00 \x05\x00X\x02\x00\x004@\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x00\x04\x01\x01\x00\x01\x00`\x00\x00\x14\x00=\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x00\x16\x00\x00\x00\x00\x00\x02\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00\x08X\x02\x00\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02/\x01\x14\x00\x00\x00\x01\x00\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x00\x16A\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x02\x00\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00,\x01\x00\x00\x00\x00\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00$\x00\x01\x10\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17@\x00\x05\x00X\x02\x00\x00\x004\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00\x05\x00\x14\x00\x00\x00\x00\x01\x00\x01\x004@\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x00\t\x00\x00\x00\x06\x00\x00\x00\x00\x06\x00|\x00\x00\x00\x00p\x00\r\x00\x00\x14\x00\x00\x00\x00\x00$\x00 \x01\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x00\x01\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00\x05\x00\x14\x00\x00\x00\x00\x01\x00\x01\x00\x004\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x026\xf7'
-        self.devices()[
-            0].dump1 = b'\xf0\x00 2\x00\x0e\x10\x01\x01\x00\x02\x00\x014\x00\x14\x00\x16\x00\x01\x11\x00\x01\x00\x10\x00\x01\x00\x00\x06\x00\x00\x00\x06\x00|\x00\x00\x00\x00p\x00\r\x00(\x00\x00\x00\x00\x00\x00\x04@\x00\x01\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00S\x00\x00\x17\x00\x05\x00X\x02\x02\x00\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00,\x01\x01\x00\x01\x00\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x00\x0b\x00\x00\x00\x00\x06\x00|\x00\x06\x00\x00h\x00\x00\x00p\x00\rQ\x00\x00\x00\x00\x00\x00\x00\x00\x04\x00\x01\x00\x00\x00\x00\x01\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00X\x04\x02\x00\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00,\x01\x01\x00\x00\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x00\x12\x00\x00\x01\x00\x06\x00|\x00\x06\x00\x00h\x00\x00\x00p\x00"\r\x00\x00\x00\x00\x00\x00\x01\x00\x16\x00\x01\x00\x00\x00\x02\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x00\x08X\x02\x00\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02 \x01\x14\x00\x00\x00\x01\x00\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x00\r\x01\x00\x00\x00\x06\x00h\x00 \x00\x00?\x01\x00\x00p@\x00\r\x00\x00\x00\x00\x00\x02\x00\x00\x16\x00\x01\x00\x00\x04\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00S\x00\x17\x00\x05\x10\x00X\x02\x00\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x00 \x01\x14\x00\x00\x00\x00\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x024\x00\x14\x00\x16\x00\x01\x11\x00\x01\x004\x00\x14\x00\x08\x16\x00\x01\x00\x01\x004A\x00\x14\x00\x16\x00\x01\x00\x08\x01\x004\x00\x14\x00\x16D\x00\x01\x00\x01\x004\x00 \x14\x00\x16\x00\x01\x00\x01\x04\x004\x00\x14\x00\x16\x00"\x01\x00\x01\x004\x00\x14\x10\x00\x16\x00\x01\x00\x01\x00\x02\x14\x00\x01\x00\x06\x00h@\x00\x00\x00?\x01\x00\x00\x00p\x00\r\x00\x00\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00I\x00\x00N\x00P\x00U\x00\x00T\x00 \x00A\x00 \x00\x00\x00\x00LLI\x00\x18N\x00P\x00U\x00T\x00\x00 \x00B\x00 \x00\x00\x00\x00L&I\x00N\x00\x00P\x00U\x00T\x00\x00 \x00C\x00 \x00\x00\x00\x00l\x1cS\x00U\x00\x04M\x00 \x00 \x00 \x00\x00 \x00 \x00\x00\x00\x00^L\'<*-X>PRE\x01\x00\x11\x01\x00\x18\x00\x00\x00\x00\x00\x00\x00\x00A     \x00  \x00\x00A  \x00     \x00\x00\x00\'/-:\'/<\x7f-\x00\x00\x00\x00\x00\x00\x01\\\xf7'
-        self.devices()[
-            0].ping_response = b'\xf0\x00 2\x00\x0e\x04\x10\x04\x05\x05\x04\x04\x02\x02\x04\x02\x00\x00\x00\x00\x0e\x00\x00\xf7'
+        self.demo = True
+        self.__devices[0] = Device(0, self.bus)
+        self.__devices[1] = Device(1, self.bus)
+        self.devices()[0].dump0[:] = DUMMY_DUMP_0
+        self.devices()[0].dump1[:] = DUMMY_DUMP_1
+        self.devices()[0].ping_response[:] = DUMMY_PING_RESPONSE
         for n, d in self.devices().items():
-            new_ping = bytearray.fromhex("f0002032000e000111444358323439362d3020202020202020f7")
+            new_ping = bytearray(DUMMY_SEARCH_RESPONSE)
             new_ping[const.COMMAND_BYTE] = const.SEARCH_RESPONSE
             new_ping[const.ID_BYTE] = n
-            d.ping_response = new_ping
+            d.search_response[:] = new_ping
             d.is_new = False
+            d.changed((0, const.GUI_LENGTH))
+            self.notify(d, None, None)
+        self.__generation += 1
 
     def write(self, data):
-        self.__protocol.write(data)
-
-    def ping_all_async(self):
-        self.__loop.call_soon_threadsafe(self.ping_all)
+        return self.__protocol.write(data)
 
     def ping_all(self):
         self.__io_logger.debug(f"pinging all {len(self.__devices)} devices")
@@ -111,29 +233,89 @@ class Ultadrive(threading.Thread):
             self.ping(n)
         self.__io_logger.debug(f"finished pinging")
 
-    def resync_async(self):
-        self.__loop.call_soon_threadsafe(self.resync)
-
     def resync(self):
+        # known devices keep serving their cached state, only those that stayed silent for a whole round are dropped
         self.__logger.debug("resyncing...")
-        self.__devices.clear()
+        for device_id, device in list(self.__devices.items()):
+            if device.stale:
+                self.remove(device_id)
+            else:
+                device.stale = True
         self.search()
 
+    def restore(self, device_id: int, search_response: bytes, dump0: bytes, dump1: bytes, ping_response: bytes):
+        # serves a device from a snapshot, the next resync drops it again if it does not answer
+        device = Device(device_id, self.bus)
+        device.search_response[:] = search_response
+        device.dump0[:] = dump0
+        device.dump1[:] = dump1
+        device.ping_response[:] = ping_response
+        device.is_new = False
+        device.changed((0, const.GUI_LENGTH))
+        self.__devices[device_id] = device
+        self.__generation += 1
+        self.notify(device, None, None)
+
+    def remove(self, device_id: int):
+        self.__logger.info(f"device {device_id} did not answer since the last resync - removing it")
+        device = self.__devices.pop(device_id)
+        self.__generation += 1
+        self.notify(device, const.DEVICE_REMOVED, None)
+
+    def device_lost(self, device_id: int):
+        device = self.__devices.get(device_id)
+        if device is not None:
+            device.lost = True
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop)
+
+    async def request(self, command: bytes, key, timeout: float = const.REQUEST_TIMEOUT,
+                      retries: int = const.REQUEST_RETRIES):
+        for attempt in range(retries + 1):
+            response = self.__pending.expect(key)
+            try:
+                await self.write(command)
+                return await asyncio.wait_for(response, timeout)
+            except asyncio.TimeoutError:
+                self.__io_logger.debug(f"request {key} timed out (attempt {attempt + 1} of {retries + 1})")
+            finally:
+                self.__pending.discard(key, response)
+        raise asyncio.TimeoutError(f"no response for {key} after {retries + 1} attempts")
+
+    @staticmethod
+    def search_command(device_id: int = const.BROADCAST_ID) -> bytes:
+        return const.VENDOR_HEADER + device_id.to_bytes(1, "big") + b'\x0E\x40' + const.TERMINATOR
+
+    @staticmethod
+    def ping_command(device_id: int) -> bytes:
+        return const.VENDOR_HEADER + device_id.to_bytes(1, "big") + b'\x0E\x44\x00\x00' + const.TERMINATOR
+
+    @staticmethod
+    def dump_command(device_id: int, part: int) -> bytes:
+        return const.VENDOR_HEADER + device_id.to_bytes(
+            1, "big") + b'\x0E\x50\x01\x00' + part.to_bytes(1, "big") + const.TERMINATOR
+
+    @staticmethod
+    def transmit_mode_command(device_id: int) -> bytes:
+        return const.VENDOR_HEADER + device_id.to_bytes(1, "big") + b'\x0E\x3F\x0C\x00' + const.TERMINATOR
+
+    @staticmethod
+    def direct_command(device_id: int, changes: List[Tuple[int, int, int, int]]) -> bytes:
+        # changes are (channel, param, value_high, value_low) tuples
+        return const.VENDOR_HEADER + device_id.to_bytes(1, "big") + b'\x0E\x20' + len(changes).to_bytes(
+            1, "big") + bytes(b for change in changes for b in change) + const.TERMINATOR
+
     def search(self):
         self.__logger.debug("searching...")
-        search_command = b'\xF0\x00\x20\x32\x20\x0E\x40' + bytes([247])
-        self.write(search_command)
+        self.write(self.search_command())
         self.__io_logger.debug("searching done")
 
     def ping(self, device_id: int):
-        ping_command = b'\xF0\x00\x20\x32' + device_id.to_bytes(
-            1, "big") + b'\x0E\x44\x00\x00' + const.TERMINATOR
-        self.write(ping_command)
+        self.write(self.ping_command(device_id))
 
     def dump(self, device_id: int, part: int):
-        dump_command = b'\xF0\x00\x20\x32' + device_id.to_bytes(
-            1, "big") + b'\x0E\x50\x01\x00' + part.to_bytes(1, "big") + const.TERMINATOR
-        self.write(dump_command)
+        self.write(self.dump_command(device_id, part))
 
     def dump_device(self, device_id: int):
         self.__io_logger.debug(f"requesting dump for: {device_id}")
@@ -143,101 +325,183 @@ class Ultadrive(threading.Thread):
 
     def set_transmit_mode(self, device_id: int):
         self.__logger.debug(f"setting transmit mode for device {device_id}")
-        transmit_mode_command = b'\xF0\x00\x20\x32' + device_id.to_bytes(
-            1, "big") + b'\x0E\x3F\x0C\x00' + const.TERMINATOR
-        self.write(transmit_mode_command)
-
-    def run(self):
-        self.__logger.info(f"starting new ultradrive thread")
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        self.__loop = asyncio.get_event_loop()
-        self.__coro = serial.aio.create_serial_connection(self.__loop, self.protocol, '/dev/ttyS0',
-                                                          baudrate=const.BAUD_RATE)
-        try:
-            self.__logger.debug("try connecting...")
-            self.__loop.run_until_complete(self.__coro)
-            self.__logger.debug("connecting not failed")
-            self.__loop.run_forever()
-            self.stop()
-        except serial.serialutil.SerialException as e:
-            self.__logger.warn(f"Serial exception - continuing with demo data \n{e}")
-            self.stop()
-            self.setup_dummy_data()
-        self.__logger.info(f"stopped ultradrive thread")
+        self.write(self.transmit_mode_command(device_id))
+
+    @staticmethod
+    def check_parameter(channel: int, param: int, value: int):
+        if (channel, param) not in locations.LOCATIONS:
+            raise RuntimeError(f"unknown parameter {param} on channel {channel}")
+        if not 0 <= value <= const.MAX_PARAMETER_VALUE:
+            raise RuntimeError(f"value {value} of parameter {param} on channel {channel} is out of range")
+
+    def set_parameters(self, device_id: int, changes: Iterable[Tuple[int, int, int]]) -> List[asyncio.Future]:
+        # changes are (channel, param, value) - packed into as few direct commands as possible and applied to the
+        # cached device right away, the device does not echo them
+        device = self.__devices[device_id]
+        latest = dict()
+        for channel, param, value in changes:
+            self.check_parameter(channel, param, value)
+            latest[(channel, param)] = value
+        encoded = [(channel, param, value >> 7, value & 0x7F) for (channel, param), value in latest.items()]
+        writes = []
+        for start in range(0, len(encoded), const.MAX_DIRECT_PARAMETERS):
+            batch = encoded[start:start + const.MAX_DIRECT_PARAMETERS]
+            frame = self.direct_command(device_id, batch)
+            written = self.write(frame)
+            writes.append(written)
+            patched = []
+            for channel, param, value_high, value_low in batch:
+                patched.extend(device.patch(channel, param, value_high, value_low))
+            parts = {int(start >= const.GUI_DUMP_1_OFFSET) for start, _ in patched}
+            written.add_done_callback(lambda future, parts=parts: self.write_done(future, device, parts))
+            device.changed(*patched)
+            self.notify(device, const.LOCAL_CHANGE, frame)
+        self.__io_logger.debug(f"sent {len(encoded)} parameters to device {device_id} in {len(writes)} frames")
+        return writes
+
+    def write_done(self, written: asyncio.Future, device: Device, parts):
+        # the cache was patched ahead of the write - if the frame never went out the parts are dumped again
+        if not written.cancelled() and written.exception() is None:
+            return
+        self.__io_logger.warning(f"direct command to device {device.device_id} was not sent - "
+                                 f"dump parts {sorted(parts)} are in doubt")
+        for part in parts:
+            device.checks[part].in_doubt = True
+
+    async def request_search(self, device_id: int = None, **kwargs) -> Device:
+        # a broadcast search resolves with the first device that answers
+        command = self.search_command() if device_id is None else self.search_command(device_id)
+        return await self.request(command, (device_id, const.SEARCH_RESPONSE, None), **kwargs)
+
+    async def request_ping(self, device_id: int, **kwargs) -> Device:
+        return await self.request(self.ping_command(device_id), (device_id, const.PING_RESPONSE, None), **kwargs)
+
+    async def request_dump(self, device_id: int, part: int, **kwargs) -> Device:
+        return await self.request(self.dump_command(device_id, part), (device_id, const.DUMP_RESPONSE, part),
+                                  **kwargs)
+
+    async def request_dump_device(self, device_id: int, **kwargs) -> Device:
+        await self.request_dump(device_id, 0, **kwargs)
+        return await self.request_dump(device_id, 1, **kwargs)
+
+    async def request_parameters(self, device_id: int, changes: Iterable[Tuple[int, int, int]]) -> int:
+        # the device does not answer direct commands - wait until all frames left the write queue
+        writes = self.set_parameters(device_id, changes)
+        await asyncio.gather(*writes)
+        return len(writes)
+
+    async def request_transmit_mode(self, device_id: int):
+        # the device does not answer a transmit mode change - wait until it left the write queue
+        self.__logger.debug(f"setting transmit mode for device {device_id}")
+        await self.write(self.transmit_mode_command(device_id))
 
     def connection_made(self):
-        self.__logger.debug("ultradrive thread recieved connection_made")
+        self.__logger.info(f"bus {self.bus} connected on {self.port}")
         self.__scheduler.start()
-        self.__scheduler.add_job(self.ping_all_async, 'interval', seconds=const.PING_INTEVAL)
-        self.__scheduler.add_job(self.resync_async, 'interval', seconds=const.RESYNC_INTEVAL)
-        atexit.register(self.stop)
+
+    def connection_lost(self):
+        self.__logger.warning(f"bus {self.bus} lost its connection on {self.port}")
+        self.stop()
 
     def exception_text(self, infix, actual: int, expected: int, packet):
-        text = "received malformed response - " + infix + f" has wrong length {actual} instead of {expected - 1}"
+        text = "received malformed response - " + infix + f" has wrong length {actual} instead of {expected}"
         if self.__packet_logger.level > 10:  # 10 == DEBUG
-            text = text + str(packet)
+            text = text + str(bytes(packet))
         return text
 
-    def handle_packet(self, packet):
-        self.__packet_logger.debug(f"handling packet {packet}")
+    def known_device(self, device_id: int) -> Device:
+        # the device a validated frame came from - created on its first frame
+        device = self.__devices.get(device_id)
+        if device is None:
+            self.__packet_logger.info(f"received first frame from unknown device_id: {device_id}")
+            device = Device(device_id, self.bus)
+            self.__devices[device_id] = device
+            self.__generation += 1
+        else:
+            device.stale = False
+            if device.lost:
+                device.lost = False
+                self.__packet_logger.info(f"device {device_id} answers again - its cached state is in doubt")
+                device.doubt()
+        return device
+
+    def handle_packet(self, packet: memoryview):
+        if self.__packet_logger.isEnabledFor(logging.DEBUG):
+            self.__packet_logger.debug(f"handling packet {bytes(packet)}")
+        if len(packet) <= const.COMMAND_BYTE:
+            raise RuntimeError(f"received malformed response - {len(packet)} bytes are too short for a command")
         device_id = packet[const.ID_BYTE]
         command = packet[const.COMMAND_BYTE]
+        part = None
+        changed = ()
+        metrics.FRAMES.inc(1, (str(self.bus), str(command)))
         self.__packet_logger.info(f"handling command {command} for device: {device_id}")
-        if device_id not in self.__devices:
-            self.__packet_logger.info(f"received command: {command} from unknown device_id: {device_id}")
-            device = Device(device_id)
-            self.__devices[device_id] = device
-            self.__loop.call_soon_threadsafe(self.dump_device, device_id)
-        else:
-            device = self.__devices[device_id]
+        if device_id >= const.MAX_DEVICES:
+            raise RuntimeError(f"received malformed response - device id {device_id} is out of range")
 
-        if command is const.SEARCH_RESPONSE:
-            if len(packet) is const.SEARCH_RESPONSE_LENGTH - 1:
-                device.search_response[:] = packet
-            else:
+        if command == const.SEARCH_RESPONSE:
+            if len(packet) != const.SEARCH_RESPONSE_LENGTH:
                 raise RuntimeError(
                     self.exception_text("search response", len(packet), const.SEARCH_RESPONSE_LENGTH, packet))
-        elif command is const.DUMP_RESPONSE:
+            device = self.known_device(device_id)
+            if device.search_response != packet:
+                device.search_response[:] = packet
+                self.__generation += 1
+        elif command == const.DUMP_RESPONSE:
+            error = checksum.validate(packet)
+            if error is not None:
+                device = self.__devices.get(device_id)
+                if device is not None and len(packet) > const.PART_BYTE and packet[const.PART_BYTE] < len(
+                        device.checks):
+                    device.checks[packet[const.PART_BYTE]].in_doubt = True
+                raise RuntimeError(f"received malformed response - {error}")
             part = packet[const.PART_BYTE]
-            if part is 0:
-                if len(packet) is const.PART_0_LENGTH - 1:
+            device = self.known_device(device_id)
+            device.checks[part].received(packet)
+            if device.checks[part].diverged:
+                self.__packet_logger.warning(f"dump part {part} of device {device_id} differs from the cached one")
+            if part == 0:
+                if device.dump0 != packet:
                     device.dump0[:] = packet
-                else:
-                    raise RuntimeError(
-                        self.exception_text("dump response #0", len(packet), const.PART_0_LENGTH, packet))
-            elif part is 1:
-                if len(packet) is const.PART_1_LENGTH - 1:
+                    changed = ((0, const.PART_0_LENGTH),)
+            else:
+                if device.dump1 != packet:
                     device.dump1[:] = packet
+                    changed = ((const.GUI_DUMP_1_OFFSET, const.GUI_PING_OFFSET),)
+                if device.is_new:
                     device.is_new = False
-                else:
-                    raise RuntimeError(
-                        self.exception_text("dump response #1", len(packet), const.PART_1_LENGTH, packet))
-            else:
-                raise RuntimeError(f"received malformed response - dump part is not 0 or 1 but {part}")
-        elif command is const.PING_RESPONSE:
-            if len(packet) is const.PING_RESPONSE_LENGTH - 1:
-                device.ping_response[:] = packet
-            else:
+                    self.__generation += 1
+        elif command == const.PING_RESPONSE:
+            if len(packet) != const.PING_RESPONSE_LENGTH:
                 raise RuntimeError(
                     self.exception_text("ping response", len(packet), const.PING_RESPONSE_LENGTH, packet))
-        elif command is const.DIRECT_COMMAND:
-            return
-            count = packet[const.PARAM_COUNT_BYTE]
-            for i in range(count):
-                offset = 4 * i
+            device = self.known_device(device_id)
+            device.ping_response[:] = packet
+            changed = ((const.GUI_PING_OFFSET, const.GUI_LENGTH),)
+        elif command == const.DIRECT_COMMAND:
+            count = packet[const.PARAM_COUNT_BYTE] if len(packet) > const.PARAM_COUNT_BYTE else 0
+            expected = const.CHANNEL_BYTE + 4 * count + 1
+            if len(packet) <= const.PARAM_COUNT_BYTE or len(packet) < expected:
+                raise RuntimeError(self.exception_text("direct command", len(packet), expected, packet))
+            device = self.known_device(device_id)
+            patched = []
+            for offset in range(0, 4 * count, 4):
                 channel = packet[const.CHANNEL_BYTE + offset]
                 param = packet[const.PARAM_BYTE + offset]
-                value_high = packet[const.VALUE_HI_BYTE + offset]
-                value_low = packet[const.VALUE_LOW_BYTE + offset]
-                if channel == 0:
-                    self.patchBuffer(device_id, value_low, value_high,
-                                     self.setupLocations[param - (11 if param <= 11 else 10)])
-                elif channel <= 4:
-                    self.patchBuffer(device_id, value_low, value_high, self.inputLocations[channel - 1][param - 2])
-                elif channel <= 10:
-                    self.patchBuffer(device_id, value_low, value_high, self.outputLocations[channel - 5][param - 2])
+                touched = device.patch(channel, param, packet[const.VALUE_HI_BYTE + offset],
+                                       packet[const.VALUE_LOW_BYTE + offset])
+                if touched is None:
+                    self.__packet_logger.warning(
+                        f"direct command for unknown parameter {param} on channel {channel} of device {device_id}")
+                    device.doubt()
+                else:
+                    patched.extend(touched)
+            changed = tuple(patched)
         else:
             raise RuntimeError(f"received malformed response - unrecognized command {command}")
+        device.changed(*changed)
+        self.notify(device, command, packet)
+        self.__pending.resolve(device_id, command, part, device)
 
 
 class Echo(serial.threaded.Protocol):
@@ -265,48 +529,186 @@ class Echo(serial.threaded.Protocol):
         self.transport.write(data)
 
 
-class UltradriveProtocol(Packetizer):
-    TERMINATOR = const.TERMINATOR
-    lock: RLock = RLock()
+# start, 8 data and stop bit
+BYTE_TIME = 10 / const.BAUD_RATE
+
+
+class UltradriveProtocol(serial.threaded.Protocol):
+    transport = None
 
     def __init__(self, logger, ultradrive: Ultadrive):
         super(UltradriveProtocol, self).__init__()
         self.__logger = logger.getChild("protocol")
         self.__ultradrive = ultradrive
+        self.__framer = SysexFramer(self.__logger, self.handle_packet)
+        self.__bus_label = (str(ultradrive.bus),)
+        self.capture = None
+        self.__queue = None
+        self.__writer = None
+        self.__bus_idle = None
+        self.__bus_timeout = None
+        # loop time until which the last request keeps the bus for its answer, the device id it waits for
+        self.__reserved_until = 0.0
+        self.__awaiting = None
+        self.written = 0
+        self.write_errors = 0
+        self.wait_time_last = 0.0
+        self.wait_time_max = 0.0
+        self.wait_time_total = 0.0
 
     def connection_made(self, transport):
-        super(UltradriveProtocol, self).connection_made(transport)
+        self.transport = transport
+        self.__framer.reset()
         self.__logger.info(f'port opened with transport: {transport}')
+        loop = asyncio.get_event_loop()
+        self.__queue = asyncio.Queue()
+        self.__bus_idle = asyncio.Event()
+        self.__bus_idle.set()
+        self.__reserved_until = 0.0
+        self.__awaiting = None
+        self.__writer = loop.create_task(self.write_queued())
         self.__ultradrive.connection_made()
 
     def connection_lost(self, exc):
-        super(UltradriveProtocol, self).connection_lost(exc)
-        self.__logger.info(f"connection on port lost {exec}")
-        asyncio.get_event_loop().stop()
+        self.transport = None
+        self.__logger.info(f"connection on port lost {exc}")
+        if self.__writer is not None:
+            self.__writer.cancel()
+            self.__writer = None
+        if self.__bus_timeout is not None:
+            self.__bus_timeout.cancel()
+            self.__bus_timeout = None
+        if self.__queue is not None:
+            while not self.__queue.empty():
+                _, data, written = self.__queue.get_nowait()
+                if not written.done():
+                    written.set_exception(RuntimeError(f"can not write {data} - serial port is not connected"))
+            self.__queue = None
+        self.__ultradrive.connection_lost()
+
+    def close(self):
+        # runs on the loop thread - the transport calls connection_lost once the port is closed
+        if self.__writer is not None:
+            self.__writer.cancel()
+            self.__writer = None
+        if self.transport is not None:
+            self.transport.close()
 
     def data_received(self, data):
         self.__logger.debug(f"received data: {data}")
-        super(UltradriveProtocol, self).data_received(data)
-
-    def handle_packet(self, packet):
-        self.__logger.debug(f"received package: {packet}")
-        if packet.startswith(const.VENDOR_HEADER):
-            self.__ultradrive.handle_packet(packet)
+        if self.capture is not None:
+            self.capture.record(const.CAPTURE_INCOMING, data)
+        metrics.BYTES_RECEIVED.inc(len(data), self.__bus_label)
+        metrics.BUS_BUSY.inc(len(data) * BYTE_TIME, self.__bus_label)
+        overflows = self.__framer.overflows
+        self.__framer.data_received(data)
+        if self.__framer.overflows != overflows:
+            metrics.MALFORMED.inc(self.__framer.overflows - overflows, self.__bus_label + ("oversized",))
+        self.track_bus()
+
+    def track_bus(self):
+        # the bus is busy while a frame is incoming - or until the line stays quiet for too long - and afterwards
+        # until the turnaround passed and a pending request had its chance to be answered
+        loop = asyncio.get_event_loop()
+        if self.__framer.in_frame:
+            self.hold(loop.time() + const.BUS_IDLE_TIMEOUT, self.bus_timed_out)
         else:
-            self.__logger.warn(f"package without vendor header received {packet}")
-
-    def write(self, data):
-        self.__logger.debug("waiting for empty in_waiting before write")
-        # with self.lock:
-        while self.transport.serial.in_waiting > 0:
-            pass
-        self.__logger.debug(f"finnaly writing {data}")
-        self.transport.write(data)
-        blocked = False
-        if self.transport.serial.in_waiting > 0:
-            blocked = True
-        self.__logger.debug(f"wrote {data}")
-        return blocked
+            self.hold(max(loop.time() + const.BUS_TURNAROUND, self.__reserved_until), self.release)
+
+    def reserve(self, data):
+        # runs right after data was written, the bus stays ours while it is on the wire
+        now = asyncio.get_event_loop().time() + len(data) * BYTE_TIME
+        if len(data) > const.COMMAND_BYTE and data[const.COMMAND_BYTE] in const.ANSWERED_COMMANDS:
+            # a broadcast is answered by every device, only its window ends it
+            self.__awaiting = None if data[const.ID_BYTE] == const.BROADCAST_ID else data[const.ID_BYTE]
+            self.__reserved_until = now + const.RESPONSE_WINDOW
+        else:
+            self.__awaiting = None
+            self.__reserved_until = now + const.BUS_TURNAROUND
+        self.hold(self.__reserved_until, self.release)
+
+    def hold(self, until: float, then):
+        if self.__bus_timeout is not None:
+            self.__bus_timeout.cancel()
+        self.__bus_idle.clear()
+        self.__bus_timeout = asyncio.get_event_loop().call_at(until, then)
+
+    def release(self):
+        self.__bus_timeout = None
+        self.__bus_idle.set()
+
+    def bus_timed_out(self):
+        self.__logger.warning("incoming frame was not terminated - releasing the bus")
+        self.__framer.reset()
+        self.release()
+
+    def handle_packet(self, packet: memoryview):
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug(f"received package: {bytes(packet)}")
+        if self.__awaiting is not None and len(packet) > const.ID_BYTE and packet[const.ID_BYTE] == self.__awaiting:
+            # answered - the turnaround after this frame is all the bus still waits for
+            self.__awaiting = None
+            self.__reserved_until = 0.0
+        if packet[:len(const.VENDOR_HEADER)] == const.VENDOR_HEADER:
+            # whatever goes wrong with one frame, the rest of the chunk is still framed
+            try:
+                self.__ultradrive.handle_packet(packet)
+            except RuntimeError as e:
+                metrics.MALFORMED.inc(1, self.__bus_label + (self.command_label(packet),))
+                self.__logger.error(str(e))
+            except Exception as e:
+                metrics.MALFORMED.inc(1, self.__bus_label + (self.command_label(packet),))
+                self.__logger.exception(f"handling {bytes(packet)} failed: {e}")
+        else:
+            self.__logger.warn(f"package without vendor header received {bytes(packet)}")
+
+    @staticmethod
+    def command_label(packet) -> str:
+        return str(packet[const.COMMAND_BYTE]) if len(packet) > const.COMMAND_BYTE else "truncated"
+
+    def queue_depth(self) -> int:
+        return 0 if self.__queue is None else self.__queue.qsize()
+
+    def write(self, data) -> asyncio.Future:
+        if self.__queue is None:
+            raise RuntimeError(f"can not write {data} - serial port is not connected")
+        loop = asyncio.get_event_loop()
+        written = loop.create_future()
+        self.__queue.put_nowait((loop.time(), data, written))
+        self.__logger.debug(f"queued {data} - {self.__queue.qsize()} writes waiting")
+        return written
+
+    async def write_queued(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            queued_at, data, written = await self.__queue.get()
+            # a device may start talking between the bus turning idle and this task resuming
+            while not self.__bus_idle.is_set():
+                await self.__bus_idle.wait()
+            waited = loop.time() - queued_at
+            try:
+                self.transport.write(data)
+            except Exception as e:
+                # fail this frame only, the writer keeps serving the queue
+                self.write_errors += 1
+                self.__logger.error(f"writing {bytes(data)} failed: {e}")
+                if not written.done():
+                    written.set_exception(RuntimeError(f"writing to bus {self.__ultradrive.bus} failed: {e}"))
+                continue
+            self.reserve(data)
+            if self.capture is not None:
+                self.capture.record(const.CAPTURE_OUTGOING, data)
+            self.written += 1
+            metrics.BYTES_SENT.inc(len(data), self.__bus_label)
+            metrics.BUS_BUSY.inc(len(data) * BYTE_TIME, self.__bus_label)
+            metrics.WRITE_WAIT.observe(waited, self.__bus_label)
+            self.wait_time_last = waited
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+            self.__logger.debug(f"wrote {data} after waiting {waited:.4f}s")
+            if not written.done():
+                written.set_result(waited)
 
 #
 # void Ultradrive::processIncoming(unsigned long now) {
@@ -580,729 +982,3 @@ class UltradriveProtocol(Packetizer):
 # }
 #
 # byte Ultradrive::vendorHeader[5] = {0xF0, 0x00, 0x20, 0x32, 0x00};
-#
-# DataLocation Ultradrive::setupLocations[22] =  {
-#   {{0, 117}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 119}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 121}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 123}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 126}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 128}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 130}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 133}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 135}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 137}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 55}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 57}, { -1, -1, -1}, { -1, -1}},
-#   {{0, 139}, {0, 140, 6}, {0, 141}},
-#   {{0, 142}, {0, 148, 1}, {0, 143}},
-#   {{0, 144}, {0, 148, 3}, {0, 145}}
-# };
-# DataLocation Ultradrive::inputLocations[4][62] =  {
-#   {
-#     {{0, 146}, {0, 148, 5}, {0, 147}},
-#     {{0, 149}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 151}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 153}, {0, 156, 4}, {0, 154}},
-#     {{0, 155}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 158}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 160}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 162}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 165}, {0, 172, 0}, { -1, -1}},
-#     {{0, 167}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 169}, {0, 172, 4}, {0, 170}},
-#     {{0, 171}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 174}, {0, 180, 1}, {0, 175}},
-#     {{0, 176}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 178}, {0, 180, 5}, {0, 179}},
-#     {{0, 181}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 183}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 185}, {0, 188, 4}, {0, 186}},
-#     {{0, 187}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 190}, {0, 196, 1}, {0, 191}},
-#     {{0, 192}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 194}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 197}, {0, 204, 0}, {0, 198}},
-#     {{0, 199}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 201}, {0, 204, 4}, {0, 202}},
-#     {{0, 203}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 206}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 208}, {0, 212, 3}, {0, 209}},
-#     {{0, 210}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 213}, {0, 220, 0}, {0, 214}},
-#     {{0, 215}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 217}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 219}, {0, 220, 6}, {0, 221}},
-#     {{0, 222}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 224}, {0, 228, 3}, {0, 225}},
-#     {{0, 226}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 229}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 231}, {0, 236, 2}, {0, 232}},
-#     {{0, 233}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 235}, {0, 236, 6}, {0, 237}},
-#     {{0, 238}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 240}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 242}, {0, 244, 5}, {0, 243}},
-#     {{0, 245}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 247}, {0, 252, 2}, {0, 248}},
-#     {{0, 249}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 251}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 254}, {0, 260, 1}, {0, 255}},
-#     {{0, 256}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 258}, {0, 260, 5}, {0, 259}},
-#     {{0, 261}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 263}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 265}, {0, 268, 4}, {0, 266}},
-#     {{0, 267}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 270}, {0, 276, 1}, {0, 271}},
-#     {{0, 272}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 274}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 277}, {0, 284, 0}, {0, 278}},
-#     {{0, 279}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 281}, {0, 284, 4}, {0, 282}},
-#     {{0, 283}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 286}, { -1, -1, -1}, { -1, -1}}
-#   }, {
-#     {{0, 288}, {0, 292, 3}, {0, 289}},
-#     {{0, 290}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 293}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 295}, {0, 300, 2}, {0, 296}},
-#     {{0, 297}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 299}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 302}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 304}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 306}, {0, 308, 5}, { -1, -1}},
-#     {{0, 309}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 311}, {0, 316, 2}, {0, 312}},
-#     {{0, 313}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 315}, {0, 316, 6}, {0, 317}},
-#     {{0, 318}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 320}, {0, 324, 3}, {0, 321}},
-#     {{0, 322}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 325}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 327}, {0, 332, 2}, {0, 328}},
-#     {{0, 329}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 331}, {0, 332, 6}, {0, 333}},
-#     {{0, 334}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 336}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 338}, {0, 340, 5}, {0, 339}},
-#     {{0, 341}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 343}, {0, 348, 2}, {0, 344}},
-#     {{0, 345}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 347}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 350}, {0, 356, 1}, {0, 351}},
-#     {{0, 352}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 354}, {0, 356, 5}, {0, 355}},
-#     {{0, 357}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 359}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 361}, {0, 364, 4}, {0, 362}},
-#     {{0, 363}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 366}, {0, 372, 1}, {0, 367}},
-#     {{0, 368}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 370}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 373}, {0, 380, 0}, {0, 374}},
-#     {{0, 375}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 377}, {0, 380, 4}, {0, 378}},
-#     {{0, 379}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 382}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 384}, {0, 388, 3}, {0, 385}},
-#     {{0, 386}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 389}, {0, 396, 0}, {0, 390}},
-#     {{0, 391}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 393}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 395}, {0, 396, 6}, {0, 397}},
-#     {{0, 398}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 400}, {0, 404, 3}, {0, 401}},
-#     {{0, 402}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 405}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 407}, {0, 412, 2}, {0, 408}},
-#     {{0, 409}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 411}, {0, 412, 6}, {0, 413}},
-#     {{0, 414}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 416}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 418}, {0, 420, 5}, {0, 419}},
-#     {{0, 421}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 423}, {0, 428, 2}, {0, 424}},
-#     {{0, 425}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 427}, { -1, -1, -1}, { -1, -1}}
-#   }, {
-#     {{0, 430}, {0, 436, 1}, {0, 431}},
-#     {{0, 432}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 434}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 437}, {0, 444, 0}, {0, 438}},
-#     {{0, 439}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 441}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 443}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 446}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 448}, {0, 452, 3}, { -1, -1}},
-#     {{0, 450}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 453}, {0, 460, 0}, {0, 454}},
-#     {{0, 455}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 457}, {0, 460, 4}, {0, 458}},
-#     {{0, 459}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 462}, {0, 468, 1}, {0, 463}},
-#     {{0, 464}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 466}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 469}, {0, 476, 0}, {0, 470}},
-#     {{0, 471}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 473}, {0, 476, 4}, {0, 474}},
-#     {{0, 475}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 478}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 480}, {0, 484, 3}, {0, 481}},
-#     {{0, 482}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 485}, {0, 492, 0}, {0, 486}},
-#     {{0, 487}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 489}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 491}, {0, 492, 6}, {0, 493}},
-#     {{0, 494}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 496}, {0, 500, 3}, {0, 497}},
-#     {{0, 498}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 501}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 503}, {0, 508, 2}, {0, 504}},
-#     {{0, 505}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 507}, {0, 508, 6}, {0, 509}},
-#     {{0, 510}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 512}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 514}, {0, 516, 5}, {0, 515}},
-#     {{0, 517}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 519}, {0, 524, 2}, {0, 520}},
-#     {{0, 521}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 523}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 526}, {0, 532, 1}, {0, 527}},
-#     {{0, 528}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 530}, {0, 532, 5}, {0, 531}},
-#     {{0, 533}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 535}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 537}, {0, 540, 4}, {0, 538}},
-#     {{0, 539}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 542}, {0, 548, 1}, {0, 543}},
-#     {{0, 544}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 546}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 549}, {0, 556, 0}, {0, 550}},
-#     {{0, 551}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 553}, {0, 556, 4}, {0, 554}},
-#     {{0, 555}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 558}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 560}, {0, 564, 3}, {0, 561}},
-#     {{0, 562}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 565}, {0, 572, 0}, {0, 566}},
-#     {{0, 567}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 569}, { -1, -1, -1}, { -1, -1}}
-#   }, {
-#     {{0, 571}, {0, 572, 6}, {0, 573}},
-#     {{0, 574}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 576}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 578}, {0, 580, 5}, {0, 579}},
-#     {{0, 581}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 583}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 585}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 587}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 590}, {0, 596, 1}, { -1, -1}},
-#     {{0, 592}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 594}, {0, 596, 5}, {0, 595}},
-#     {{0, 597}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 599}, {0, 604, 2}, {0, 600}},
-#     {{0, 601}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 603}, {0, 604, 6}, {0, 605}},
-#     {{0, 606}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 608}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 610}, {0, 612, 5}, {0, 611}},
-#     {{0, 613}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 615}, {0, 620, 2}, {0, 616}},
-#     {{0, 617}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 619}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 622}, {0, 628, 1}, {0, 623}},
-#     {{0, 624}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 626}, {0, 628, 5}, {0, 627}},
-#     {{0, 629}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 631}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 633}, {0, 636, 4}, {0, 634}},
-#     {{0, 635}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 638}, {0, 644, 1}, {0, 639}},
-#     {{0, 640}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 642}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 645}, {0, 652, 0}, {0, 646}},
-#     {{0, 647}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 649}, {0, 652, 4}, {0, 650}},
-#     {{0, 651}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 654}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 656}, {0, 660, 3}, {0, 657}},
-#     {{0, 658}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 661}, {0, 668, 0}, {0, 662}},
-#     {{0, 663}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 665}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 667}, {0, 668, 6}, {0, 669}},
-#     {{0, 670}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 672}, {0, 676, 3}, {0, 673}},
-#     {{0, 674}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 677}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 679}, {0, 684, 2}, {0, 680}},
-#     {{0, 681}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 683}, {0, 684, 6}, {0, 685}},
-#     {{0, 686}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 688}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 690}, {0, 692, 5}, {0, 691}},
-#     {{0, 693}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 695}, {0, 700, 2}, {0, 696}},
-#     {{0, 697}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 699}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 702}, {0, 708, 1}, {0, 703}},
-#     {{0, 704}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 706}, {0, 708, 5}, {0, 707}},
-#     {{0, 709}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 711}, { -1, -1, -1}, { -1, -1}}
-#   }
-# };
-# DataLocation Ultradrive::outputLocations[6][74] =  {
-#   {
-#     {{0, 713}, {0, 716, 4}, {0, 714}},
-#     {{0, 715}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 718}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 720}, {0, 724, 3}, {0, 721}},
-#     {{0, 722}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 725}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 727}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 729}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 731}, {0, 732, 6}, { -1, -1}},
-#     {{0, 734}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 736}, {0, 740, 3}, {0, 737}},
-#     {{0, 738}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 741}, {0, 748, 0}, {0, 742}},
-#     {{0, 743}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 745}, {0, 748, 4}, {0, 746}},
-#     {{0, 747}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 750}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 752}, {0, 756, 3}, {0, 753}},
-#     {{0, 754}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 757}, {0, 764, 0}, {0, 758}},
-#     {{0, 759}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 761}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 763}, {0, 764, 6}, {0, 765}},
-#     {{0, 766}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 768}, {0, 772, 3}, {0, 769}},
-#     {{0, 770}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 773}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 775}, {0, 780, 2}, {0, 776}},
-#     {{0, 777}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 779}, {0, 780, 6}, {0, 781}},
-#     {{0, 782}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 784}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 786}, {0, 788, 5}, {0, 787}},
-#     {{0, 789}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 791}, {0, 796, 2}, {0, 792}},
-#     {{0, 793}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 795}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 798}, {0, 804, 1}, {0, 799}},
-#     {{0, 800}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 802}, {0, 804, 5}, {0, 803}},
-#     {{0, 805}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 807}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 809}, {0, 812, 4}, {0, 810}},
-#     {{0, 811}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 814}, {0, 820, 1}, {0, 815}},
-#     {{0, 816}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 818}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 821}, {0, 828, 0}, {0, 822}},
-#     {{0, 823}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 825}, {0, 828, 4}, {0, 826}},
-#     {{0, 827}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 830}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 832}, {0, 836, 3}, {0, 833}},
-#     {{0, 834}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 837}, {0, 844, 0}, {0, 838}},
-#     {{0, 839}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 841}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 843}, {0, 844, 6}, {0, 845}},
-#     {{0, 846}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 848}, {0, 852, 3}, {0, 849}},
-#     {{0, 850}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 853}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 855}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 857}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 859}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 862}, {0, 868, 1}, {0, 863}},
-#     {{0, 864}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 866}, {0, 868, 5}, {0, 867}},
-#     {{0, 869}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 871}, {0, 876, 2}, { -1, -1}},
-#     {{0, 873}, {0, 876, 4}, { -1, -1}},
-#     {{0, 875}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 878}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 880}, {0, 884, 3}, {0, 881}}
-#   }, {
-#     {{0, 882}, {0, 884, 5}, {0, 883}},
-#     {{0, 885}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 887}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 889}, {0, 892, 4}, {0, 890}},
-#     {{0, 891}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 894}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 896}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 898}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 901}, {0, 908, 0}, { -1, -1}},
-#     {{0, 903}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 905}, {0, 908, 4}, {0, 906}},
-#     {{0, 907}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 910}, {0, 916, 1}, {0, 911}},
-#     {{0, 912}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 914}, {0, 916, 5}, {0, 915}},
-#     {{0, 917}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 919}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 921}, {0, 924, 4}, {0, 922}},
-#     {{0, 923}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 926}, {0, 932, 1}, {0, 927}},
-#     {{0, 928}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 930}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 933}, {0, 940, 0}, {0, 934}},
-#     {{0, 935}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 937}, {0, 940, 4}, {0, 938}},
-#     {{0, 939}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 942}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 944}, {0, 948, 3}, {0, 945}},
-#     {{0, 946}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 949}, {0, 956, 0}, {0, 950}},
-#     {{0, 951}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 953}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 955}, {0, 956, 6}, {0, 957}},
-#     {{0, 958}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 960}, {0, 964, 3}, {0, 961}},
-#     {{0, 962}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 965}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 967}, {0, 972, 2}, {0, 968}},
-#     {{0, 969}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 971}, {0, 972, 6}, {0, 973}},
-#     {{0, 974}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 976}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 978}, {0, 980, 5}, {0, 979}},
-#     {{0, 981}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 983}, {0, 988, 2}, {0, 984}},
-#     {{0, 985}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 987}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 990}, {0, 996, 1}, {0, 991}},
-#     {{0, 992}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 994}, {0, 996, 5}, {0, 995}},
-#     {{0, 997}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 999}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 1001}, {0, 1004, 4}, {0, 1002}},
-#     {{0, 1003}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 1006}, {0, 1012, 1}, {0, 1007}},
-#     {{0, 1008}, { -1, -1, -1}, { -1, -1}},
-#     {{0, 1010}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 13}, {1, 20, 0}, {1, 14}},
-#     {{1, 15}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 17}, {1, 20, 4}, {1, 18}},
-#     {{1, 19}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 22}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 24}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 26}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 29}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 31}, {1, 36, 2}, {1, 32}},
-#     {{1, 33}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 35}, {1, 36, 6}, {1, 37}},
-#     {{1, 38}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 40}, {1, 44, 3}, { -1, -1}},
-#     {{1, 42}, {1, 44, 5}, { -1, -1}},
-#     {{1, 45}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 47}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 49}, {1, 52, 4}, {1, 50}}
-#   }, {
-#     {{1, 51}, {1, 52, 6}, {1, 53}},
-#     {{1, 54}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 56}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 58}, {1, 60, 5}, {1, 59}},
-#     {{1, 61}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 63}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 65}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 67}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 70}, {1, 76, 1}, { -1, -1}},
-#     {{1, 72}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 74}, {1, 76, 5}, {1, 75}},
-#     {{1, 77}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 79}, {1, 84, 2}, {1, 80}},
-#     {{1, 81}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 83}, {1, 84, 6}, {1, 85}},
-#     {{1, 86}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 88}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 90}, {1, 92, 5}, {1, 91}},
-#     {{1, 93}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 95}, {1, 100, 2}, {1, 96}},
-#     {{1, 97}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 99}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 102}, {1, 108, 1}, {1, 103}},
-#     {{1, 104}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 106}, {1, 108, 5}, {1, 107}},
-#     {{1, 109}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 111}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 113}, {1, 116, 4}, {1, 114}},
-#     {{1, 115}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 118}, {1, 124, 1}, {1, 119}},
-#     {{1, 120}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 122}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 125}, {1, 132, 0}, {1, 126}},
-#     {{1, 127}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 129}, {1, 132, 4}, {1, 130}},
-#     {{1, 131}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 134}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 136}, {1, 140, 3}, {1, 137}},
-#     {{1, 138}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 141}, {1, 148, 0}, {1, 142}},
-#     {{1, 143}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 145}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 147}, {1, 148, 6}, {1, 149}},
-#     {{1, 150}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 152}, {1, 156, 3}, {1, 153}},
-#     {{1, 154}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 157}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 159}, {1, 164, 2}, {1, 160}},
-#     {{1, 161}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 163}, {1, 164, 6}, {1, 165}},
-#     {{1, 166}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 168}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 170}, {1, 172, 5}, {1, 171}},
-#     {{1, 173}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 175}, {1, 180, 2}, {1, 176}},
-#     {{1, 177}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 179}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 182}, {1, 188, 1}, {1, 183}},
-#     {{1, 184}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 186}, {1, 188, 5}, {1, 187}},
-#     {{1, 189}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 191}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 193}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 195}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 198}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 200}, {1, 204, 3}, {1, 201}},
-#     {{1, 202}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 205}, {1, 212, 0}, {1, 206}},
-#     {{1, 207}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 209}, {1, 212, 4}, { -1, -1}},
-#     {{1, 211}, {1, 212, 6}, { -1, -1}},
-#     {{1, 214}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 216}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 218}, {1, 220, 5}, {1, 219}}
-#   }, {
-#     {{1, 221}, {1, 228, 0}, {1, 222}},
-#     {{1, 223}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 225}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 227}, {1, 228, 6}, {1, 229}},
-#     {{1, 230}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 232}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 234}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 237}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 239}, {1, 244, 2}, { -1, -1}},
-#     {{1, 241}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 243}, {1, 244, 6}, {1, 245}},
-#     {{1, 246}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 248}, {1, 252, 3}, {1, 249}},
-#     {{1, 250}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 253}, {1, 260, 0}, {1, 254}},
-#     {{1, 255}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 257}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 259}, {1, 260, 6}, {1, 261}},
-#     {{1, 262}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 264}, {1, 268, 3}, {1, 265}},
-#     {{1, 266}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 269}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 271}, {1, 276, 2}, {1, 272}},
-#     {{1, 273}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 275}, {1, 276, 6}, {1, 277}},
-#     {{1, 278}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 280}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 282}, {1, 284, 5}, {1, 283}},
-#     {{1, 285}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 287}, {1, 292, 2}, {1, 288}},
-#     {{1, 289}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 291}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 294}, {1, 300, 1}, {1, 295}},
-#     {{1, 296}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 298}, {1, 300, 5}, {1, 299}},
-#     {{1, 301}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 303}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 305}, {1, 308, 4}, {1, 306}},
-#     {{1, 307}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 310}, {1, 316, 1}, {1, 311}},
-#     {{1, 312}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 314}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 317}, {1, 324, 0}, {1, 318}},
-#     {{1, 319}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 321}, {1, 324, 4}, {1, 322}},
-#     {{1, 323}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 326}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 328}, {1, 332, 3}, {1, 329}},
-#     {{1, 330}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 333}, {1, 340, 0}, {1, 334}},
-#     {{1, 335}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 337}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 339}, {1, 340, 6}, {1, 341}},
-#     {{1, 342}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 344}, {1, 348, 3}, {1, 345}},
-#     {{1, 346}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 349}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 351}, {1, 356, 2}, {1, 352}},
-#     {{1, 353}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 355}, {1, 356, 6}, {1, 357}},
-#     {{1, 358}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 360}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 362}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 365}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 367}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 369}, {1, 372, 4}, {1, 370}},
-#     {{1, 371}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 374}, {1, 380, 1}, {1, 375}},
-#     {{1, 376}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 378}, {1, 380, 5}, { -1, -1}},
-#     {{1, 381}, {1, 388, 0}, { -1, -1}},
-#     {{1, 383}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 385}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 387}, {1, 388, 6}, {1, 389}}
-#   }, {
-#     {{1, 390}, {1, 396, 1}, {1, 391}},
-#     {{1, 392}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 394}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 397}, {1, 404, 0}, {1, 398}},
-#     {{1, 399}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 401}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 403}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 406}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 408}, {1, 412, 3}, { -1, -1}},
-#     {{1, 410}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 413}, {1, 420, 0}, {1, 414}},
-#     {{1, 415}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 417}, {1, 420, 4}, {1, 418}},
-#     {{1, 419}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 422}, {1, 428, 1}, {1, 423}},
-#     {{1, 424}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 426}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 429}, {1, 436, 0}, {1, 430}},
-#     {{1, 431}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 433}, {1, 436, 4}, {1, 434}},
-#     {{1, 435}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 438}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 440}, {1, 444, 3}, {1, 441}},
-#     {{1, 442}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 445}, {1, 452, 0}, {1, 446}},
-#     {{1, 447}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 449}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 451}, {1, 452, 6}, {1, 453}},
-#     {{1, 454}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 456}, {1, 460, 3}, {1, 457}},
-#     {{1, 458}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 461}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 463}, {1, 468, 2}, {1, 464}},
-#     {{1, 465}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 467}, {1, 468, 6}, {1, 469}},
-#     {{1, 470}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 472}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 474}, {1, 476, 5}, {1, 475}},
-#     {{1, 477}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 479}, {1, 484, 2}, {1, 480}},
-#     {{1, 481}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 483}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 486}, {1, 492, 1}, {1, 487}},
-#     {{1, 488}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 490}, {1, 492, 5}, {1, 491}},
-#     {{1, 493}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 495}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 497}, {1, 500, 4}, {1, 498}},
-#     {{1, 499}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 502}, {1, 508, 1}, {1, 503}},
-#     {{1, 504}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 506}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 509}, {1, 516, 0}, {1, 510}},
-#     {{1, 511}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 513}, {1, 516, 4}, {1, 514}},
-#     {{1, 515}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 518}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 520}, {1, 524, 3}, {1, 521}},
-#     {{1, 522}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 525}, {1, 532, 0}, {1, 526}},
-#     {{1, 527}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 529}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 531}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 534}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 536}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 538}, {1, 540, 5}, {1, 539}},
-#     {{1, 541}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 543}, {1, 548, 2}, {1, 544}},
-#     {{1, 545}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 547}, {1, 548, 6}, { -1, -1}},
-#     {{1, 550}, {1, 556, 1}, { -1, -1}},
-#     {{1, 552}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 554}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 557}, {1, 564, 0}, {1, 558}}
-#   }, {
-#     {{1, 559}, {1, 564, 2}, {1, 560}},
-#     {{1, 561}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 563}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 566}, {1, 572, 1}, {1, 567}},
-#     {{1, 568}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 570}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 573}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 575}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 577}, {1, 580, 4}, { -1, -1}},
-#     {{1, 579}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 582}, {1, 588, 1}, {1, 583}},
-#     {{1, 584}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 586}, {1, 588, 5}, {1, 587}},
-#     {{1, 589}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 591}, {1, 596, 2}, {1, 592}},
-#     {{1, 593}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 595}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 598}, {1, 604, 1}, {1, 599}},
-#     {{1, 600}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 602}, {1, 604, 5}, {1, 603}},
-#     {{1, 605}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 607}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 609}, {1, 612, 4}, {1, 610}},
-#     {{1, 611}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 614}, {1, 620, 1}, {1, 615}},
-#     {{1, 616}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 618}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 621}, {1, 628, 0}, {1, 622}},
-#     {{1, 623}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 625}, {1, 628, 4}, {1, 626}},
-#     {{1, 627}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 630}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 632}, {1, 636, 3}, {1, 633}},
-#     {{1, 634}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 637}, {1, 644, 0}, {1, 638}},
-#     {{1, 639}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 641}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 643}, {1, 644, 6}, {1, 645}},
-#     {{1, 646}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 648}, {1, 652, 3}, {1, 649}},
-#     {{1, 650}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 653}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 655}, {1, 660, 2}, {1, 656}},
-#     {{1, 657}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 659}, {1, 660, 6}, {1, 661}},
-#     {{1, 662}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 664}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 666}, {1, 668, 5}, {1, 667}},
-#     {{1, 669}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 671}, {1, 676, 2}, {1, 672}},
-#     {{1, 673}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 675}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 678}, {1, 684, 1}, {1, 679}},
-#     {{1, 680}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 682}, {1, 684, 5}, {1, 683}},
-#     {{1, 685}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 687}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 689}, {1, 692, 4}, {1, 690}},
-#     {{1, 691}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 694}, {1, 700, 1}, {1, 695}},
-#     {{1, 696}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 698}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 701}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 703}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 705}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 707}, {1, 708, 6}, {1, 709}},
-#     {{1, 710}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 712}, {1, 716, 3}, {1, 713}},
-#     {{1, 714}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 717}, {1, 724, 0}, { -1, -1}},
-#     {{1, 719}, {1, 724, 2}, { -1, -1}},
-#     {{1, 721}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 723}, { -1, -1, -1}, { -1, -1}},
-#     {{1, 726}, {1, 732, 1}, {1, 727}}
-#   }
-# };
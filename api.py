@@ -1,33 +1,291 @@
+import concurrent.futures
+import struct
+import time
+
 from flask import Blueprint
 import flask
 
-import Ultradrive
+import const
+import metrics
+from engine import Engine
+from presets import PresetStore
+import presets
+from stream import Broadcaster
+
+
+DELTA_MIMETYPE = "application/x-dcx-delta"
+DELTA_RANGE = struct.Struct(">HH")  # offset, length
 
 
 class Api:
     api: Blueprint
-    __ultradrive: Ultradrive
+    __engine: Engine
 
-    def __init__(self, logger, ultradrive: Ultradrive):
+    # engine is either the Engine driving the serial buses or a StateStore shared by it, the broadcaster only
+    # exists in the process owning the serial ports
+    def __init__(self, logger, engine: Engine, broadcaster: Broadcaster = None, preset_store: PresetStore = None):
         self.__logger = logger.getChild("api")
         self.__http_logger = self.__logger.getChild("http")
-        self.__ultradrive = ultradrive
+        self.__engine = engine
+        self.__broadcaster = broadcaster
+        self.__presets = PresetStore() if preset_store is None else preset_store
+        # bus -> (etag, blob) of the last devices response, rebuilt when the etag changes
+        self.__devices_blobs = dict()
         self.api = Blueprint('api', __name__, url_prefix="/api")
-        self.api.add_url_rule("/devices", view_func=self.devices)
-        self.api.add_url_rule("/devices/<int:n>", view_func=self.device)
+        # devices are addressed as (bus, id), the routes without a bus address bus 0
+        for prefix, endpoint, defaults in (("", "", {"bus": 0}), ("/buses/<int:bus>", "bus_", {})):
+            self.api.add_url_rule(prefix + "/devices", endpoint + "devices", self.devices, defaults=defaults)
+            self.api.add_url_rule(prefix + "/devices/<int:n>", endpoint + "device", self.device, defaults=defaults)
+            self.api.add_url_rule(prefix + "/devices/<int:n>/parameters", endpoint + "parameters", self.parameters,
+                                  defaults=defaults)
+            self.api.add_url_rule(prefix + "/devices/<int:n>/parameters", endpoint + "set_parameters",
+                                  self.set_parameters, defaults=defaults, methods=["POST"])
+            self.api.add_url_rule(prefix + "/devices/<int:n>/levels", endpoint + "levels", self.levels,
+                                  defaults=defaults)
+            self.api.add_url_rule(prefix + "/devices/<int:n>/presets/<name>", endpoint + "save_preset",
+                                  self.save_preset, defaults=defaults, methods=["POST"])
+            self.api.add_url_rule(prefix + "/devices/<int:n>/presets/<name>/recall", endpoint + "recall_preset",
+                                  self.recall_preset, defaults=defaults, methods=["POST"])
+        self.api.add_url_rule("/meters", view_func=self.meters)
+        self.api.add_url_rule("/presets", view_func=self.list_presets)
+        self.api.add_url_rule("/presets/<name>", view_func=self.delete_preset, methods=["DELETE"])
+        self.api.add_url_rule("/stream", view_func=self.stream)
+        self.api.add_url_rule("/metrics", view_func=self.metrics)
+        self.api.before_request(self.started)
+        self.api.after_request(self.finished)
 
-    def devices(self):
-        ret = bytearray()
-        for n, d in self.__ultradrive.devices().items():
-            if not d.is_new:
-                ret.extend(d.ping_response)
-        self.__http_logger.debug(f"devies -> {ret}")
-        return flask.make_response(ret)
+    @staticmethod
+    def started():
+        flask.g.started = time.monotonic()
+
+    @staticmethod
+    def finished(response):
+        # streams are timed until their headers are ready
+        rule = flask.request.url_rule
+        metrics.HTTP_LATENCY.observe(time.monotonic() - flask.g.started,
+                                     ("unmatched" if rule is None else rule.rule, flask.request.method,
+                                      str(response.status_code)))
+        return response
+
+    @staticmethod
+    def not_modified(etag: str):
+        if flask.request.if_none_match.contains(etag):
+            response = flask.make_response("", 304)
+            response.set_etag(etag)
+            return response
+        return None
 
-    def device(self, n: int):
+    @staticmethod
+    def tagged(body, etag: str):
+        response = flask.make_response(body)
+        response.set_etag(etag)
+        return response
+
+    def devices(self, bus: int):
         try:
-            s = self.__ultradrive.device(n).to_gui()
+            source = self.__engine.bus(bus)
+        except KeyError:
+            return "not found", 404
+        # read the generation before the data - a concurrent change then only costs one more full response
+        etag = f"{source.instance:x}-{source.generation():x}"
+        cached = self.not_modified(etag)
+        if cached is not None:
+            return cached
+        cached = self.__devices_blobs.get(bus)
+        if cached is None or cached[0] != etag:
+            ret = bytearray()
+            for n, d in source.devices().items():
+                if not d.is_new:
+                    ret.extend(d.search_response)
+            self.__http_logger.debug(f"devies -> {ret}")
+            cached = self.__devices_blobs[bus] = (etag, bytes(ret))
+        return self.tagged(cached[1], etag)
+
+    def device(self, bus: int, n: int):
+        try:
+            source = self.__engine.bus(bus)
+            device = source.device(n)
+            generation = device.generation
+            etag = f"{source.instance:x}-{n}-{device.instance:x}-{generation:x}"
+            cached = self.not_modified(etag)
+            if cached is not None:
+                return cached
+            # since is the X-Version of an earlier response, versions of another device instance get the full blob
+            since = self.since(device, flask.request.args.get("since"))
+            changes = None if since is None else device.changes_since(since)
+            if changes is not None:
+                return self.delta(device, changes, generation, etag)
+            s = device.gui_bytes()
         except KeyError as e:
             return "not found", 404
-        self.__http_logger.debug(f"device({n}) -> {s}")
-        return flask.make_response(s)
+        self.__http_logger.debug(f"device({bus}, {n}) -> {s}")
+        response = self.tagged(s, etag)
+        self.describe(response, device, generation)
+        return response
+
+    @staticmethod
+    def version(device, generation: int) -> str:
+        return f"{device.instance:x}-{generation:x}"
+
+    @staticmethod
+    def since(device, version: str):
+        # the generation of version if it was handed out for this very device instance
+        instance, _, generation = (version or "").partition("-")
+        try:
+            if int(instance, 16) == device.instance:
+                return int(generation, 16)
+        except ValueError:
+            pass
+        return None
+
+    def describe(self, response, device, generation: int):
+        response.headers["X-Version"] = self.version(device, generation)
+        # 0 while the state may still be the one restored from a snapshot
+        response.headers["X-Verified"] = "1" if device.verified else "0"
+
+    def parameters(self, bus: int, n: int):
+        try:
+            source = self.__engine.bus(bus)
+            device = source.device(n)
+            etag = f"{source.instance:x}-{n}-{device.instance:x}-{device.generation:x}-parameters"
+            cached = self.not_modified(etag)
+            if cached is not None:
+                return cached
+            parameters = device.parameters.to_dict()
+        except KeyError as e:
+            return "not found", 404
+        return self.tagged(flask.jsonify(parameters), etag)
+
+    def set_parameters(self, bus: int, n: int):
+        # body: [{"channel": 1, "param": 3, "value": 133}, ...]
+        if not isinstance(self.__engine, Engine):
+            return "parameters are only written by the process owning the serial ports", 404
+        body = flask.request.get_json(silent=True)
+        try:
+            changes = [(int(change["channel"]), int(change["param"]), int(change["value"])) for change in body]
+        except (KeyError, TypeError, ValueError):
+            return "expected a list of {channel, param, value} objects", 400
+        try:
+            source = self.__engine.bus(bus)
+            if n not in source.devices():
+                return "not found", 404
+            # rapid edits of the same parameters are folded into the latest value before they reach the bus
+            coalescer = source.coalescer()
+            pending, folded = self.__engine.call(coalescer.add, n, changes, timeout=const.PARAMETER_WRITE_TIMEOUT)
+        except KeyError:
+            return "not found", 404
+        except RuntimeError as e:
+            return str(e), 400
+        except concurrent.futures.TimeoutError:
+            return "parameters were not queued in time", 504
+        self.__http_logger.debug(f"set_parameters({bus}, {n}) -> {len(changes)} changes, {pending} pending")
+        return flask.jsonify({"pending": pending, "folded": folded}), 202
+
+    def meters(self):
+        # levels and limiter flags of the last ping cycle, decoded once for every device
+        if not isinstance(self.__engine, Engine):
+            return "meters are only decoded by the process owning the serial ports", 404
+        return flask.jsonify(self.__engine.meters().to_dict())
+
+    def levels(self, bus: int, n: int):
+        # ?start=&end= in seconds since the epoch, the last ten minutes by default, resolution in seconds
+        if not isinstance(self.__engine, Engine):
+            return "levels are only recorded by the process owning the serial ports", 404
+        end = flask.request.args.get("end", time.time(), type=float)
+        start = flask.request.args.get("start", end - 600, type=float)
+        resolution = flask.request.args.get("resolution", (end - start) / const.LEVEL_POINTS, type=float)
+        if start >= end or resolution < 0:
+            return "expected start < end and a positive resolution", 400
+        try:
+            ring = self.__engine.bus(bus).levels().ring(n)
+        except KeyError:
+            return "not found", 404
+        resolution, samples = ring.query(start, end, resolution)
+        return flask.jsonify({
+            "resolution": resolution,
+            "time": [sample[0] for sample in samples],
+            "min": [list(sample[1]) for sample in samples],
+            "max": [list(sample[2]) for sample in samples],
+            "mean": [list(sample[3]) for sample in samples],
+        })
+
+    def list_presets(self):
+        return flask.jsonify(self.__presets.names())
+
+    def save_preset(self, bus: int, n: int, name: str):
+        try:
+            device = self.__engine.bus(bus).device(n)
+            if not device.verified:
+                return "the device state is not verified yet - try again once it was dumped", 409
+            self.__presets.save(name, bytes(device.dump0), bytes(device.dump1))
+        except KeyError:
+            return "not found", 404
+        except RuntimeError as e:
+            return str(e), 400
+        return "", 204
+
+    def recall_preset(self, bus: int, n: int, name: str):
+        # sends only the parameters that differ from the device as direct commands
+        if not isinstance(self.__engine, Engine):
+            return "presets are only recalled by the process owning the serial ports", 404
+        try:
+            target = self.__presets.load(name)
+            source = self.__engine.bus(bus)
+            if n not in source.devices():
+                return "not found", 404
+            changed = self.__engine.call(presets.recall, source, n, target, timeout=const.PARAMETER_WRITE_TIMEOUT)
+        except KeyError:
+            return "not found", 404
+        except RuntimeError as e:
+            return str(e), 400
+        except concurrent.futures.TimeoutError:
+            return "parameters were not queued in time", 504
+        if changed is None:
+            return "the device state is not verified yet - try again once it was dumped", 409
+        self.__http_logger.debug(f"recall_preset({bus}, {n}, {name}) -> {changed} changes")
+        return flask.jsonify({"changed": changed}), 202
+
+    def delete_preset(self, name: str):
+        try:
+            self.__presets.delete(name)
+        except KeyError:
+            return "not found", 404
+        except RuntimeError as e:
+            return str(e), 400
+        return "", 204
+
+    def delta(self, device, changes, generation: int, etag: str):
+        # concatenated (offset, length, bytes) records of the ranges changed since the client's generation
+        ret = bytearray()
+        for start, end in changes:
+            ret.extend(DELTA_RANGE.pack(start, end - start))
+            ret.extend(device.read(start, end))
+        self.__http_logger.debug(f"delta({device.device_id}) -> {len(changes)} ranges, {len(ret)} bytes")
+        response = self.tagged(ret, etag)
+        response.mimetype = DELTA_MIMETYPE
+        self.describe(response, device, generation)
+        return response
+
+    @staticmethod
+    def address(device: str):
+        bus, _, n = device.rpartition(":")
+        return int(bus or 0), int(n)
+
+    def stream(self):
+        if self.__broadcaster is None:
+            return "streaming is only served by the process owning the serial port", 404
+        # devices=1,2:3 subscribes to device 1 of bus 0 and device 3 of bus 2
+        devices = flask.request.args.get("devices")
+        try:
+            device_ids = None if not devices else {self.address(device) for device in devices.split(",")}
+        except ValueError:
+            return f"malformed device list {devices}", 400
+        subscription = self.__broadcaster.subscribe(device_ids)
+        response = flask.Response(self.__broadcaster.events(subscription), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def metrics():
+        return flask.Response(metrics.REGISTRY.exposition(), content_type=metrics.CONTENT_TYPE)
@@ -3,15 +3,29 @@ import os
 
 from flask import Flask, send_from_directory, request
 
-from Ultradrive import Ultadrive
 from api import Api
-from const import FRONTEND_PATH
+from const import FRONTEND_PATH, PRESETS_PATH, SERIAL_PORTS, SNAPSHOT_PATH, STATE_STORE_PATH
+from engine import Engine
+from presets import PresetStore
+from state_store import StateStore
+from stream import Broadcaster
+
+# standalone: serial port and http in this process, owner: additionally share the device state,
+# worker: serve the device state shared by the owner without touching the serial port
+ROLE = os.environ.get("PYDCX_ROLE", "standalone")
+# comma separated serial ports, one RS485 chain each - bus n is the n-th port
+PORTS = os.environ.get("PYDCX_PORTS", ",".join(SERIAL_PORTS)).split(",")
+# records the serial traffic of every bus for capture.py to replay
+CAPTURE = os.environ.get("PYDCX_CAPTURE")
+# last known device state for a warm start, an empty value disables it
+SNAPSHOT = os.environ.get("PYDCX_SNAPSHOT", SNAPSHOT_PATH)
+PRESETS = os.environ.get("PYDCX_PRESETS", PRESETS_PATH)
 
 
 class Data:
-    def __init__(self):
+    # start_serial=False leaves starting the engine to an asyncio runtime that owns the loop (see asgi.py)
+    def __init__(self, start_serial: bool = True):
         self.static_files = []
-        logging.getLogger('apscheduler').setLevel(logging.INFO)
         logging.getLogger('flask').setLevel(logging.DEBUG)
         logging.getLogger('werkzeug').setLevel(logging.ERROR)
         logging.getLogger('flask.app.api.http').setLevel(logging.ERROR)
@@ -23,10 +37,25 @@ class Data:
 
         self.fetch_frontend_statics()
 
-        self.ultradrive = Ultadrive(app.logger)
-        self.__api = Api(app.logger, self.ultradrive)
-
-        self.start_serial()
+        state_store_path = os.environ.get("PYDCX_STATE_STORE", STATE_STORE_PATH)
+        self.broadcaster = None
+        if ROLE == "worker":
+            self.engine = None
+            self.__api = Api(app.logger, StateStore(state_store_path), preset_store=PresetStore(PRESETS))
+        else:
+            self.engine = Engine(app.logger, PORTS)
+            if CAPTURE:
+                self.engine.capture(CAPTURE)
+            if SNAPSHOT:
+                self.engine.persist(SNAPSHOT)
+            if ROLE == "owner":
+                self.engine.add_listener(StateStore(state_store_path, owner=True, buses=len(PORTS)).update)
+            self.broadcaster = Broadcaster(app.logger)
+            self.engine.add_listener(self.broadcaster.update)
+            self.engine.meters().add_listener(self.broadcaster.levels)
+            self.__api = Api(app.logger, self.engine, self.broadcaster, PresetStore(PRESETS))
+            if start_serial:
+                self.start_serial()
 
         app.register_blueprint(self.__api.api)
         app.logger.info(f"rules: {app.url_map}")
@@ -39,7 +68,7 @@ class Data:
             app.logger.info(f"walking {file}")
 
     def start_serial(self):
-        self.ultradrive.start()
+        self.engine.start()
 
 
 app = Flask(__name__, static_url_path="/statics")
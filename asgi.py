@@ -0,0 +1,135 @@
+import asyncio
+import io
+import sys
+import urllib.parse
+
+import app
+from api import Api
+
+
+class Asgi:
+    # Serves the flask app and the serial engine from the one loop of an ASGI server, e.g.
+    # `uvicorn asgi:application`. Api requests only touch in-memory state and run inline on the loop,
+    # the event stream is served natively so that it never blocks it.
+    def __init__(self, flask_app):
+        self.__app = flask_app
+        self.__logger = flask_app.logger.getChild("asgi")
+        self.__data = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["path"] == "/api/stream" and self.__data is not None and self.__data.broadcaster is not None:
+                await self.stream(scope, receive, send)
+            else:
+                await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.__data = app.Data(start_serial=False)
+                app.data = self.__data
+                if self.__data.engine is not None:
+                    connected = await self.__data.engine.open()
+                    self.__logger.info(f"engine running on the server loop with {connected} connected buses")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.__data is not None and self.__data.engine is not None:
+                    self.__data.engine.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    def environ(scope, body: bytes):
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope["headers"]:
+            name = name.decode("latin-1").upper().replace("-", "_")
+            if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                name = "HTTP_" + name
+            value = value.decode("latin-1")
+            environ[name] = environ[name] + "," + value if name in environ else value
+        # the body is read completely, chunked requests included
+        environ["CONTENT_LENGTH"] = str(len(body))
+        return environ
+
+    async def wsgi(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+            return None
+
+        result = self.__app.wsgi_app(self.environ(scope, bytes(body)), start_response)
+        try:
+            chunks = list(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        status, headers = started
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    async def stream(self, scope, receive, send):
+        broadcaster = self.__data.broadcaster
+        devices = urllib.parse.parse_qs(scope["query_string"].decode("latin-1")).get("devices", [""])[0]
+        try:
+            device_ids = None if not devices else {Api.address(device) for device in devices.split(",")}
+        except ValueError:
+            await send({"type": "http.response.start", "status": 400, "headers": []})
+            await send({"type": "http.response.body", "body": f"malformed device list {devices}".encode()})
+            return
+        subscription = broadcaster.subscribe(device_ids)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no")],
+        })
+        disconnected = asyncio.ensure_future(self.disconnected(receive))
+        disconnected.add_done_callback(lambda _: subscription.close())
+        events = broadcaster.events_async(subscription)
+        try:
+            async for chunk in events:
+                if disconnected.done():
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            disconnected.cancel()
+            await events.aclose()
+
+    @staticmethod
+    async def disconnected(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+
+application = Asgi(app.app)
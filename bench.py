@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import flask
+
+import const
+import locations
+from api import Api
+from engine import Engine
+from framer import SysexFramer
+from simulator import SimulatedDevice
+from Ultradrive import Ultadrive
+
+REPEATS = 5
+MIN_RUN_TIME = 0.2
+READ_SIZE = 32
+DEVICE_COUNTS = (1, 4, 16)
+REGRESSION_THRESHOLD = 1.25
+
+logger = logging.getLogger("bench")
+logger.setLevel(logging.WARNING)
+benchmarks: Dict[str, Callable[[], Callable[[], None]]] = dict()
+
+
+def benchmark(name: str):
+    # registers a setup function returning the callable to time
+    def register(setup):
+        benchmarks[name] = setup
+        return setup
+
+    return register
+
+
+def simulated(n: int) -> List[SimulatedDevice]:
+    rng = random.Random(n)
+    return [SimulatedDevice(device_id, rng) for device_id in range(n)]
+
+
+def traffic(n: int) -> bytes:
+    # what a chain of n devices sends for one search, a ping round and a full dump
+    stream = bytearray()
+    devices = simulated(n)
+    for device in devices:
+        stream.extend(device.search_response)
+    for device in devices:
+        stream.extend(device.ping())
+    for device in devices:
+        stream.extend(device.dumps[0])
+        stream.extend(device.dumps[1])
+    return bytes(stream)
+
+
+def bus(n: int) -> Ultadrive:
+    ultradrive = Ultadrive(logger)
+    for device in simulated(n):
+        for frame in (device.search_response, device.dumps[0], device.dumps[1], device.ping()):
+            ultradrive.handle_packet(memoryview(bytearray(frame)))
+    return ultradrive
+
+
+def direct_commands(count: int) -> List[bytes]:
+    rng = random.Random(count)
+    keys = rng.sample(sorted(locations.LOCATIONS), count)
+    return [Ultadrive.direct_command(0, [(channel, param, 0, rng.randrange(128))]) for channel, param in keys]
+
+
+@benchmark("framer.traffic_16_devices_read_32")
+def framer_chunked():
+    stream = traffic(16)
+    chunks = [stream[i:i + READ_SIZE] for i in range(0, len(stream), READ_SIZE)]
+    framer = SysexFramer(logger, lambda frame: None)
+
+    def run():
+        for chunk in chunks:
+            framer.data_received(chunk)
+
+    return run
+
+
+@benchmark("framer.traffic_16_devices_single_read")
+def framer_whole():
+    stream = traffic(16)
+    framer = SysexFramer(logger, lambda frame: None)
+    return lambda: framer.data_received(stream)
+
+
+def handle_packet(frame: bytes):
+    ultradrive = bus(1)
+    packet = memoryview(bytearray(frame))
+    return lambda: ultradrive.handle_packet(packet)
+
+
+@benchmark("handle_packet.search_response")
+def handle_search():
+    return handle_packet(simulated(1)[0].search_response)
+
+
+@benchmark("handle_packet.ping_response")
+def handle_ping():
+    return handle_packet(simulated(1)[0].ping())
+
+
+@benchmark("handle_packet.dump_part_0")
+def handle_dump_0():
+    return handle_packet(simulated(1)[0].dumps[0])
+
+
+@benchmark("handle_packet.dump_part_1")
+def handle_dump_1():
+    return handle_packet(simulated(1)[0].dumps[1])
+
+
+@benchmark("handle_packet.direct_command_1")
+def handle_direct_1():
+    return handle_packet(direct_commands(1)[0])
+
+
+@benchmark(f"handle_packet.direct_command_{const.MAX_DIRECT_PARAMETERS}")
+def handle_direct_batch():
+    changes = [(frame[const.CHANNEL_BYTE], frame[const.PARAM_BYTE], 0, frame[const.VALUE_LOW_BYTE])
+               for frame in direct_commands(const.MAX_DIRECT_PARAMETERS)]
+    return handle_packet(Ultadrive.direct_command(0, changes))
+
+
+@benchmark(f"device.patch_{const.MAX_DIRECT_PARAMETERS}")
+def patch():
+    device = bus(1).device(0)
+    changes = [(frame[const.CHANNEL_BYTE], frame[const.PARAM_BYTE], 0, frame[const.VALUE_LOW_BYTE])
+               for frame in direct_commands(const.MAX_DIRECT_PARAMETERS)]
+
+    def run():
+        for change in changes:
+            device.patch(*change)
+
+    return run
+
+
+@benchmark("device.to_gui")
+def to_gui():
+    return bus(1).device(0).to_gui
+
+
+def api(n: int, view: Callable[[Api, Ultadrive], Callable[[], object]]):
+    engine = Engine(logger, ("bench",))
+    source = bus(n)
+    # the engine creates its own buses - lend it the devices
+    engine.bus(0).devices().update(source.devices())
+    instance = Api(logger, engine)
+    app = flask.Flask(__name__)
+    context = app.test_request_context("/api/devices")
+    context.push()
+    return view(instance, engine.bus(0))
+
+
+def rebuilt(instance: Api, ultradrive: Ultadrive) -> Callable[[], object]:
+    # a new etag every call - times building the blob instead of the cached one
+    def run():
+        ultradrive.instance += 1
+        return instance.devices(0)
+
+    return run
+
+
+for _n in DEVICE_COUNTS:
+    benchmark(f"api.devices_{_n}")(lambda n=_n: api(n, lambda instance, ultradrive: lambda: instance.devices(0)))
+    benchmark(f"api.devices_{_n}_rebuilt")(lambda n=_n: api(n, rebuilt))
+benchmark("api.device")(lambda: api(1, lambda instance, ultradrive: lambda: instance.device(0, 0)))
+
+
+def measure(run: Callable[[], None]) -> Tuple[int, List[float]]:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_TIME:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(MIN_RUN_TIME / elapsed) + 1))
+    timings = [elapsed / number]
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - start) / number)
+    return number, timings
+
+
+def run_all(selected: List[str]) -> Dict:
+    results = dict()
+    for name in selected:
+        number, timings = measure(benchmarks[name]())
+        results[name] = {
+            "loops": number,
+            "best_us": round(min(timings) * 1e6, 3),
+            "median_us": round(statistics.median(timings) * 1e6, 3),
+        }
+        print(f"{name:45} {results[name]['best_us']:12.3f} us", file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is not None and result["best_us"] > before["best_us"] * threshold:
+            regressions.append(f"{name}: {before['best_us']} us -> {result['best_us']} us")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="time the hot paths of the serial backend")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, prefixes select groups - all by default")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    selected = [name for name in benchmarks if not args.names or any(name.startswith(n) for n in args.names)]
+    # handle_packet notifies the poll scheduler which reads the loop clock
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    report = run_all(selected)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"regression {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
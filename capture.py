@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import logging
+import struct
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import const
+from Ultradrive import Ultadrive
+
+MAGIC = b"DCXCAP\x01\n"
+# microseconds since the previous record, direction, length
+RECORD = struct.Struct(">IBH")
+MAX_DELTA = 0xFFFFFFFF
+MAX_CHUNK = 0xFFFF
+
+
+class Capture:
+    # Appends serial traffic to a binary log: the chunks as read from the port and the frames as written to it.
+    def __init__(self, path: str):
+        self.path = path
+        self.__file: Optional[BinaryIO] = open(path, "ab")
+        if self.__file.tell() == 0:
+            self.__file.write(MAGIC)
+        self.__last = time.monotonic()
+        self.__flushed = self.__last
+        self.records = 0
+
+    def record(self, direction: int, data):
+        if self.__file is None:
+            return
+        now = time.monotonic()
+        delta = min(int((now - self.__last) * 1e6), MAX_DELTA)
+        self.__last = now
+        for start in range(0, len(data), MAX_CHUNK):
+            chunk = data[start:start + MAX_CHUNK]
+            self.__file.write(RECORD.pack(delta, direction, len(chunk)))
+            self.__file.write(chunk)
+            delta = 0
+        self.records += 1
+        # a crash loses at most the last interval
+        if now - self.__flushed >= const.CAPTURE_FLUSH_INTERVAL:
+            self.__file.flush()
+            self.__flushed = now
+
+    def flush(self):
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+def read(path: str) -> Iterator[Tuple[float, int, bytes]]:
+    # yields (seconds since the capture started, direction, data)
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise RuntimeError(f"{path} is not a serial capture")
+        offset = 0
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            delta, direction, length = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            offset += delta / 1e6
+            yield offset, direction, data
+
+
+class ReplayTransport:
+    # Feeds the incoming side of a capture to a protocol, speed 1 keeps the recorded timing, 10 is ten times as
+    # fast and 0 replays as fast as the protocol takes it. Whatever the protocol writes is only counted.
+    def __init__(self, logger, path: str, speed: float = 1):
+        self.__logger = logger.getChild("replay")
+        self.path = path
+        self.speed = speed
+        self.chunks = 0
+        self.bytes = 0
+        self.written = 0
+
+    def write(self, data):
+        self.written += 1
+
+    async def run(self, protocol) -> float:
+        loop = asyncio.get_event_loop()
+        protocol.connection_made(self)
+        start = loop.time()
+        for offset, direction, data in read(self.path):
+            if direction != const.CAPTURE_INCOMING:
+                continue
+            if self.speed > 0:
+                wait = start + offset / self.speed - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            elif self.chunks % 64 == 0:
+                await asyncio.sleep(0)
+            protocol.data_received(data)
+            self.chunks += 1
+            self.bytes += len(data)
+        elapsed = loop.time() - start
+        self.__logger.info(f"replayed {self.chunks} chunks with {self.bytes} bytes in {elapsed:.3f}s")
+        return elapsed
+
+
+async def replay(logger, path: str, speed: float):
+    ultradrive = Ultadrive(logger)
+    ultradrive.attach(asyncio.get_event_loop())
+    transport = ReplayTransport(logger, path, speed)
+    elapsed = await transport.run(ultradrive.protocol())
+    ultradrive.stop()
+    devices = ultradrive.devices()
+    print(f"{transport.chunks} chunks, {transport.bytes} bytes in {elapsed:.3f}s"
+          f" ({transport.bytes / max(elapsed, 1e-9):.0f} bytes/s), {len(devices)} devices:"
+          f" {', '.join(f'{n} generation {d.generation}' for n, d in sorted(devices.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a serial capture into a fresh Ultradrive")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=0, help="1 for the recorded timing, 0 for maximum speed")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(replay(logging.getLogger("pydcx"), args.path, args.speed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from typing import Optional
+
+import const
+
+# a dump part is the 13 byte header, 7 bit packed data, one trailing check byte and the terminator
+PAYLOAD_START = const.PART_BYTE + 1
+CHECK_BYTE = -2
+LENGTHS = (const.PART_0_LENGTH, const.PART_1_LENGTH)
+
+
+def checksum(dump) -> int:
+    # the device's own check byte could not be reproduced from the payload - keep a local sum that patches can follow
+    return sum(dump[PAYLOAD_START:CHECK_BYTE]) & 0xFFFF
+
+
+def validate(dump) -> Optional[str]:
+    if len(dump) <= const.PART_BYTE:
+        return f"dump of {len(dump)} bytes ends before its part byte"
+    part = dump[const.PART_BYTE]
+    if part > 1:
+        return f"dump part is not 0 or 1 but {part}"
+    if len(dump) != LENGTHS[part]:
+        return f"dump part {part} has wrong length {len(dump)} instead of {LENGTHS[part]}"
+    if max(dump[PAYLOAD_START:CHECK_BYTE + 1]) > 0x7F:
+        return f"dump part {part} carries bytes with the high bit set"
+    return None
+
+
+class PartCheck:
+    def __init__(self):
+        self.checksum = 0
+        # in_doubt: the cached part may differ from the device, diverged: the last dump differed from the cached part
+        self.in_doubt = True
+        self.diverged = False
+
+    def received(self, dump):
+        fresh = checksum(dump)
+        self.diverged = not self.in_doubt and fresh != self.checksum
+        self.checksum = fresh
+        self.in_doubt = False
+
+    def patched(self, old: int, new: int):
+        self.checksum = (self.checksum - old + new) & 0xFFFF
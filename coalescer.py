@@ -0,0 +1,62 @@
+import asyncio
+from typing import Dict, Iterable, Tuple
+
+import const
+
+
+class Coalescer:
+    # The first change after a quiet window is sent right away, later ones only keep the latest value per
+    # (device, channel, param) until the window ends and go out as one batch per device - the last value always does.
+    def __init__(self, logger, ultradrive, window: float = const.COALESCE_WINDOW):
+        self.__logger = logger.getChild("coalescer")
+        self.__ultradrive = ultradrive
+        self.window = window
+        self.__pending: Dict[int, Dict[Tuple[int, int], int]] = dict()
+        self.__timer = None
+        self.received = 0
+        self.folded = 0
+        self.sent = 0
+
+    def __len__(self):
+        return sum(len(changes) for changes in self.__pending.values())
+
+    def add(self, device_id: int, changes: Iterable[Tuple[int, int, int]]) -> Tuple[int, int]:
+        # runs on the loop thread, changes are (channel, param, value) - returns the changes still pending and how
+        # many of these replaced a pending value
+        changes = list(changes)
+        for channel, param, value in changes:
+            self.__ultradrive.check_parameter(channel, param, value)
+        pending = self.__pending.setdefault(device_id, dict())
+        folded = 0
+        for channel, param, value in changes:
+            if (channel, param) in pending:
+                folded += 1
+            pending[(channel, param)] = value
+        self.folded += folded
+        self.received += len(changes)
+        if self.__timer is None:
+            self.flush()
+        return len(self), folded
+
+    def flush(self):
+        self.__timer = None
+        pending = self.__pending
+        if not pending:
+            return
+        self.__pending = dict()
+        for device_id, changes in pending.items():
+            try:
+                self.__ultradrive.set_parameters(device_id, ((channel, param, value)
+                                                             for (channel, param), value in changes.items()))
+                self.sent += len(changes)
+            except KeyError:
+                self.__logger.warning(f"dropping {len(changes)} changes for unknown device {device_id}")
+            except RuntimeError as e:
+                self.__logger.warning(f"dropping {len(changes)} changes for device {device_id}: {e}")
+        self.__timer = asyncio.get_event_loop().call_later(self.window, self.flush)
+
+    def cancel(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        self.__pending.clear()
@@ -1,21 +1,75 @@
 BAUD_RATE = 38400
 MAX_DEVICES = 16
+BROADCAST_ID = 0x20
 FRONTEND_PATH = "static/duinoDCX_frontend/"
+STATE_STORE_PATH = "/dev/shm/pydcx_state"
+SNAPSHOT_PATH = "/var/tmp/pydcx_snapshot"
+PRESETS_PATH = "presets/"
+SERIAL_PORTS = ("/dev/ttyS0",)
 
 PING_INTEVAL = 1
-#TIMEOUT_TIME = 2
+TIMEOUT_TIME = 2
 #SEARCH_INTEVAL = 5
 RESYNC_INTEVAL = 10
+POLL_JITTER = 0.1
+MAX_POLL_BACKOFF = 30
+PING_TIMEOUT = 0.25
+MAX_REDUMP_INTERVAL = 300
+BUS_IDLE_TIMEOUT = 0.1
+# quiet line after the last byte before the next frame goes out, and how long a request keeps the bus for an answer
+# that did not start yet
+BUS_TURNAROUND = 0.005
+RESPONSE_WINDOW = 0.05
+REQUEST_TIMEOUT = 1
+REQUEST_RETRIES = 2
+STREAM_QUEUE_LENGTH = 64
+STREAM_KEEPALIVE = 15
 
 SEARCH_RESPONSE_LENGTH = 26
 PING_RESPONSE_LENGTH = 25
+PING_PAYLOAD_LENGTH = PING_RESPONSE_LENGTH - 9  # after the byte count, before the terminator
 PART_0_LENGTH = 1015
 PART_1_LENGTH = 911
+GUI_DUMP_1_OFFSET = PART_0_LENGTH
+GUI_PING_OFFSET = GUI_DUMP_1_OFFSET + PART_1_LENGTH
+GUI_LENGTH = GUI_PING_OFFSET + PING_RESPONSE_LENGTH
+DELTA_HISTORY_LENGTH = 256
+# nothing documents how many parameters a DCX2496 takes in one direct command - a conservative guess that keeps
+# a batch at 73 bytes until a capture of the hardware proves more
+MAX_DIRECT_PARAMETERS = 16
+MAX_PARAMETER_VALUE = 0x3FFF
+PARAMETER_WRITE_TIMEOUT = 5
+COALESCE_WINDOW = 0.05
+SIMULATOR_RESPONSE_DELAY = 0.002
+SIMULATOR_WRITE_CHUNK = 16
+SNAPSHOT_DELAY = 2
+# (seconds per bucket, buckets) - every ping for 10 minutes, then min/max/mean for 6 hours, a day and a week
+LEVEL_TIERS = ((0, 600), (10, 2160), (60, 1440), (600, 1008))
+LEVEL_POINTS = 600
+# leading bytes of the ping payload, 3 inputs and 6 outputs as observed on a test device - the level in the low
+# nibble and the limiter in the next bit are an interpretation of captures, not documented
+METER_CHANNELS = ("In A", "In B", "In C", "Out 1", "Out 2", "Out 3", "Out 4", "Out 5", "Out 6")
+METER_LEVEL_MASK = 0x0F
+METER_LIMIT_MASK = 0x10
+CAPTURE_INCOMING = 0
+CAPTURE_OUTGOING = 1
+CAPTURE_FLUSH_INTERVAL = 1
 
 SEARCH_RESPONSE = 0
 PING_RESPONSE = 4
 DUMP_RESPONSE = 16
 DIRECT_COMMAND = 32
+DEVICE_REMOVED = -1
+# a direct command we sent, already applied to the cached device
+LOCAL_CHANGE = -2
+# what a device sends when it was asked - proof it is alive
+DEVICE_ANSWERS = (SEARCH_RESPONSE, PING_RESPONSE, DUMP_RESPONSE)
+# sent to the devices
+SEARCH_COMMAND = 0x40
+PING_COMMAND = 0x44
+DUMP_COMMAND = 0x50
+TRANSMIT_MODE_COMMAND = 0x3F
+ANSWERED_COMMANDS = (SEARCH_COMMAND, PING_COMMAND, DUMP_COMMAND)
 
 ID_BYTE = 4
 COMMAND_BYTE = 6
@@ -26,6 +80,7 @@ DUMP_PART_BYTE = 9
 VALUE_HI_BYTE = 10
 VALUE_LOW_BYTE = 11
 PART_BYTE = 12
+PING_PAYLOAD_START = 8
 
 COMMAND_START = bytes([240])
 TERMINATOR = bytes([247])
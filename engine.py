@@ -0,0 +1,134 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import serial
+from serial import aio
+
+import const
+from capture import Capture
+from meters import Meters
+from snapshot import Snapshot
+from Ultradrive import Device, Ultadrive
+
+
+class Engine(threading.Thread):
+    # One event loop drives every serial bus, each with its own writer, framer and scheduler. start() runs it on
+    # its own thread, an asyncio runtime that already owns a loop calls open() and close() from it instead.
+    def __init__(self, logger, ports: Sequence[str] = const.SERIAL_PORTS):
+        super(Engine, self).__init__()
+        self.__logger = logger.getChild("engine")
+        self.__loop = None
+        self.__thread_id = None
+        self.__buses = [Ultadrive(logger, port, bus) for bus, port in enumerate(ports)]
+        self.__snapshot = None
+        self.__meters = Meters(logger, len(self.__buses))
+        self.add_listener(self.__meters.update)
+        self.__logger.debug(f"created engine for ports {', '.join(ports)}")
+
+    def buses(self) -> List[Ultadrive]:
+        return self.__buses
+
+    def bus(self, n: int) -> Ultadrive:
+        if not 0 <= n < len(self.__buses):
+            raise KeyError(n)
+        return self.__buses[n]
+
+    def devices(self) -> Dict[Tuple[int, int], Device]:
+        return {(bus.bus, n): device for bus in self.__buses for n, device in bus.devices().items()}
+
+    def device(self, bus: int, n: int) -> Device:
+        return self.bus(bus).device(n)
+
+    def meters(self) -> Meters:
+        return self.__meters
+
+    def add_listener(self, listener):
+        for bus in self.__buses:
+            bus.add_listener(listener)
+
+    def capture(self, path: str):
+        # path may contain {bus}, e.g. /var/log/pydcx/bus{bus}.cap
+        if "{bus}" not in path and len(self.__buses) > 1:
+            path += ".{bus}"
+        for bus in self.__buses:
+            bus.capture(Capture(path.format(bus=bus.bus)))
+
+    def persist(self, path: str):
+        # restores the devices from path when opened and keeps it up to date
+        self.__snapshot = Snapshot(self.__logger, path, self)
+        self.add_listener(self.__snapshot.update)
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop)
+
+    def call(self, function, *args, timeout: float = None):
+        # runs function on the loop thread - directly if already there, which the asyncio runtime always is
+        if self.__loop is None:
+            raise RuntimeError("engine is not running")
+        if threading.get_ident() == self.__thread_id:
+            return function(*args)
+        result = concurrent.futures.Future()
+
+        def run():
+            try:
+                result.set_result(function(*args))
+            except Exception as e:
+                result.set_exception(e)
+
+        self.__loop.call_soon_threadsafe(run)
+        return result.result(timeout)
+
+    def stop(self):
+        self.__logger.debug(f"stopping engine {self}")
+        loop = self.__loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self.close)
+            loop.call_soon_threadsafe(loop.stop)
+            self.__loop = None
+
+    async def connect(self, bus: Ultadrive) -> bool:
+        try:
+            self.__logger.debug(f"try connecting bus {bus.bus} on {bus.port}...")
+            await serial.aio.create_serial_connection(self.__loop, bus.protocol, bus.port, baudrate=const.BAUD_RATE)
+            return True
+        except serial.serialutil.SerialException as e:
+            self.__logger.warning(f"Serial exception on {bus.port} - continuing with demo data \n{e}")
+            bus.setup_dummy_data()
+            return False
+
+    async def open(self) -> int:
+        self.__loop = asyncio.get_event_loop()
+        self.__thread_id = threading.get_ident()
+        for bus in self.__buses:
+            bus.attach(self.__loop)
+        if self.__snapshot is not None:
+            self.__snapshot.load()
+        self.__meters.start()
+        connected = [bus for bus in self.__buses if await self.connect(bus)]
+        return len(connected)
+
+    def close(self):
+        # counterpart of open() on the loop thread - stopping a bus cancels its writer and closes its port
+        for bus in self.__buses:
+            bus.stop()
+        if self.__snapshot is not None:
+            self.__snapshot.flush()
+        self.__meters.stop()
+        self.__loop = None
+
+    def run(self):
+        self.__logger.info(f"starting engine thread for {len(self.__buses)} buses")
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        loop = asyncio.get_event_loop()
+        if loop.run_until_complete(self.open()):
+            atexit.register(self.stop)
+            loop.run_forever()
+        else:
+            self.close()
+        # the ports close and the writers finish their cancellation on the next iteration
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+        self.__logger.info(f"stopped engine thread")
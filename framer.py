@@ -0,0 +1,86 @@
+import const
+
+COMMAND_START = const.COMMAND_START[0]
+TERMINATOR = const.TERMINATOR[0]
+
+
+class SysexFramer:
+    def __init__(self, logger, handle_frame):
+        self.__logger = logger.getChild("framer")
+        self.__handle_frame = handle_frame
+        # one preallocated buffer per expected command, the fallback one holds headers and unknown commands
+        self.__views = {
+            const.SEARCH_RESPONSE: memoryview(bytearray(const.SEARCH_RESPONSE_LENGTH)),
+            const.PING_RESPONSE: memoryview(bytearray(const.PING_RESPONSE_LENGTH)),
+            const.DUMP_RESPONSE: memoryview(bytearray(const.PART_0_LENGTH)),
+            const.DIRECT_COMMAND: memoryview(bytearray(const.PART_0_LENGTH)),
+        }
+        self.__fallback = memoryview(bytearray(const.PART_0_LENGTH))
+        self.__view = None
+        self.__length = 0
+        self.frames = 0
+        self.resyncs = 0
+        self.overflows = 0
+        self.discarded = 0
+
+    @property
+    def in_frame(self) -> bool:
+        return self.__view is not None
+
+    def reset(self):
+        self.__view = None
+        self.__length = 0
+
+    def data_received(self, data):
+        chunk = memoryview(data)
+        position = 0
+        size = len(data)
+        while position < size:
+            if self.__view is None:
+                start = data.find(COMMAND_START, position)
+                if start < 0:
+                    self.discarded += size - position
+                    return
+                self.discarded += start - position
+                self.__view = self.__fallback
+                self.__length = 0
+                position = start
+
+            end = data.find(TERMINATOR, position)
+            stop = size if end < 0 else end + 1
+            restart = data.find(COMMAND_START, position + 1 if self.__length == 0 else position, stop)
+            if restart >= 0:
+                self.__logger.warning(f"unexpected command start after {self.__length + restart - position} bytes"
+                                      f" - resyncing")
+                self.resyncs += 1
+                self.__view = None
+                position = restart
+                continue
+
+            if not self.__append(chunk, position, stop):
+                self.__logger.warning(f"frame exceeds {len(self.__view)} bytes - dropping it")
+                self.overflows += 1
+                self.__view = None
+                position = stop
+                continue
+            position = stop
+
+            if end >= 0:
+                frame = self.__view[:self.__length]
+                self.__view = None
+                self.frames += 1
+                self.__handle_frame(frame)
+
+    def __append(self, chunk, start: int, stop: int) -> bool:
+        length = self.__length
+        new_length = length + stop - start
+        if length <= const.COMMAND_BYTE < new_length:
+            view = self.__views.get(chunk[start + const.COMMAND_BYTE - length], self.__fallback)
+            if view is not self.__view:
+                view[:length] = self.__view[:length]
+                self.__view = view
+        if new_length > len(self.__view):
+            return False
+        self.__view[length:new_length] = chunk[start:stop]
+        self.__length = new_length
+        return True
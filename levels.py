@@ -0,0 +1,152 @@
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import const
+
+WIDTH = const.PING_PAYLOAD_LENGTH
+# (time, minimum, maximum, mean) - one byte per payload byte of the ping response
+Sample = Tuple[float, bytes, bytes, bytes]
+
+
+class Tier:
+    # ring of the last capacity buckets of resolution seconds, resolution 0 keeps every ping as it came
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.__times = array("d", bytes(8 * capacity))
+        self.__minimum = bytearray(WIDTH * capacity)
+        self.__maximum = bytearray(WIDTH * capacity)
+        self.__mean = bytearray(WIDTH * capacity)
+        self.__count = 0
+        # the bucket being filled
+        self.__start: Optional[float] = None
+        self.__low = bytearray(WIDTH)
+        self.__high = bytearray(WIDTH)
+        self.__sum = array("L", bytes(array("L").itemsize * WIDTH))
+        self.__samples = 0
+
+    def add(self, timestamp: float, values: bytes):
+        if not self.resolution:
+            self.__push(timestamp, values, values, values)
+            return
+        start = timestamp - timestamp % self.resolution
+        if self.__samples and start != self.__start:
+            self.__close()
+        if not self.__samples:
+            self.__start = start
+            self.__low[:] = values
+            self.__high[:] = values
+            for i, value in enumerate(values):
+                self.__sum[i] = value
+        else:
+            low, high, total = self.__low, self.__high, self.__sum
+            for i, value in enumerate(values):
+                if value < low[i]:
+                    low[i] = value
+                elif value > high[i]:
+                    high[i] = value
+                total[i] += value
+        self.__samples += 1
+
+    def __close(self):
+        mean = bytes(round(total / self.__samples) for total in self.__sum)
+        self.__push(self.__start, self.__low, self.__high, mean)
+        self.__samples = 0
+
+    def __push(self, timestamp: float, low, high, mean):
+        i = self.__count % self.capacity
+        self.__times[i] = timestamp
+        offset = i * WIDTH
+        self.__minimum[offset:offset + WIDTH] = low
+        self.__maximum[offset:offset + WIDTH] = high
+        self.__mean[offset:offset + WIDTH] = mean
+        self.__count += 1
+
+    def oldest(self) -> Optional[float]:
+        if not self.__count:
+            return self.__start
+        return self.__times[self.__count % self.capacity if self.__count > self.capacity else 0]
+
+    def samples(self, start: float, end: float) -> Iterator[Sample]:
+        # chronological, including the bucket still being filled
+        first = max(0, self.__count - self.capacity)
+        for n in range(first, self.__count):
+            i = n % self.capacity
+            timestamp = self.__times[i]
+            if start <= timestamp < end:
+                offset = i * WIDTH
+                yield (timestamp, bytes(self.__minimum[offset:offset + WIDTH]),
+                       bytes(self.__maximum[offset:offset + WIDTH]), bytes(self.__mean[offset:offset + WIDTH]))
+        if self.__samples and start <= self.__start < end:
+            yield (self.__start, bytes(self.__low), bytes(self.__high),
+                   bytes(round(total / self.__samples) for total in self.__sum))
+
+
+def downsample(samples: Sequence[Sample], resolution: float) -> List[Sample]:
+    merged = []
+    group: List[Sample] = []
+    for sample in samples:
+        if group and sample[0] - sample[0] % resolution != group[0][0] - group[0][0] % resolution:
+            merged.append(merge(group, resolution))
+            group = []
+        group.append(sample)
+    if group:
+        merged.append(merge(group, resolution))
+    return merged
+
+
+def merge(group: Sequence[Sample], resolution: float) -> Sample:
+    timestamp = group[0][0]
+    return (timestamp - timestamp % resolution,
+            bytes(min(values) for values in zip(*(sample[1] for sample in group))),
+            bytes(max(values) for values in zip(*(sample[2] for sample in group))),
+            bytes(round(sum(values) / len(group)) for values in zip(*(sample[3] for sample in group))))
+
+
+class LevelRing:
+    # fixed memory level history of one device
+    def __init__(self, tiers: Sequence[Tuple[float, int]] = const.LEVEL_TIERS):
+        self.tiers = [Tier(resolution, capacity) for resolution, capacity in tiers]
+        self.__lock = threading.Lock()
+        self.__first: Optional[float] = None
+
+    def add(self, timestamp: float, values: bytes):
+        with self.__lock:
+            if self.__first is None:
+                self.__first = timestamp
+            for tier in self.tiers:
+                tier.add(timestamp, values)
+
+    def query(self, start: float, end: float, resolution: float = 0) -> Tuple[float, List[Sample]]:
+        # the coarsest tier still fine enough - or a coarser one if that no longer reaches back to start
+        with self.__lock:
+            start = max(start, self.__first)
+            fitting = [tier for tier in self.tiers if tier.resolution <= resolution] or self.tiers[:1]
+            coarser = self.tiers[self.tiers.index(fitting[-1]):]
+            tier = next((tier for tier in coarser if tier.oldest() is not None and tier.oldest() <= start),
+                        coarser[-1])
+            samples = list(tier.samples(start - tier.resolution, end))
+        if resolution > tier.resolution:
+            return resolution, downsample(samples, resolution)
+        return tier.resolution, samples
+
+
+class LevelHistory:
+    # records the level and limiter bytes of every ping per device of one bus
+    def __init__(self, tiers: Sequence[Tuple[float, int]] = const.LEVEL_TIERS):
+        self.__tiers = tiers
+        self.__rings: Dict[int, LevelRing] = dict()
+
+    def ring(self, device_id: int) -> LevelRing:
+        return self.__rings[device_id]
+
+    def update(self, device, command, packet):
+        if command == const.DEVICE_REMOVED:
+            self.__rings.pop(device.device_id, None)
+        elif command == const.PING_RESPONSE:
+            ring = self.__rings.get(device.device_id)
+            if ring is None:
+                ring = self.__rings[device.device_id] = LevelRing(self.__tiers)
+            ring.add(time.time(), bytes(packet[const.PING_PAYLOAD_START:const.PING_PAYLOAD_START + WIDTH]))
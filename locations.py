@@ -0,0 +1,810 @@
+# DataLocation tables ported from the duinoDCX reference implementation.
+# Every parameter keeps its low 7 bits at (part, byte), optionally its 8th bit at (part, byte, bit) in the
+# MSB byte of the 7-bit packed dump and optionally its upper bits at (part, byte).
+# Setup parameters 2..11 map to entries 0..9, parameters 20..24 to entries 10..14.
+
+SETUP_LOCATIONS = (
+    ((0, 117), None, None),
+    ((0, 119), None, None),
+    ((0, 121), None, None),
+    ((0, 123), None, None),
+    ((0, 126), None, None),
+    ((0, 128), None, None),
+    ((0, 130), None, None),
+    ((0, 133), None, None),
+    ((0, 135), None, None),
+    ((0, 137), None, None),
+    ((0, 55), None, None),
+    ((0, 57), None, None),
+    ((0, 139), (0, 140, 6), (0, 141)),
+    ((0, 142), (0, 148, 1), (0, 143)),
+    ((0, 144), (0, 148, 3), (0, 145)),
+)
+
+INPUT_LOCATIONS = (
+    (
+        ((0, 146), (0, 148, 5), (0, 147)),
+        ((0, 149), None, None),
+        ((0, 151), None, None),
+        ((0, 153), (0, 156, 4), (0, 154)),
+        ((0, 155), None, None),
+        ((0, 158), None, None),
+        ((0, 160), None, None),
+        ((0, 162), None, None),
+        ((0, 165), (0, 172, 0), None),
+        ((0, 167), None, None),
+        ((0, 169), (0, 172, 4), (0, 170)),
+        ((0, 171), None, None),
+        ((0, 174), (0, 180, 1), (0, 175)),
+        ((0, 176), None, None),
+        ((0, 178), (0, 180, 5), (0, 179)),
+        ((0, 181), None, None),
+        ((0, 183), None, None),
+        ((0, 185), (0, 188, 4), (0, 186)),
+        ((0, 187), None, None),
+        ((0, 190), (0, 196, 1), (0, 191)),
+        ((0, 192), None, None),
+        ((0, 194), None, None),
+        ((0, 197), (0, 204, 0), (0, 198)),
+        ((0, 199), None, None),
+        ((0, 201), (0, 204, 4), (0, 202)),
+        ((0, 203), None, None),
+        ((0, 206), None, None),
+        ((0, 208), (0, 212, 3), (0, 209)),
+        ((0, 210), None, None),
+        ((0, 213), (0, 220, 0), (0, 214)),
+        ((0, 215), None, None),
+        ((0, 217), None, None),
+        ((0, 219), (0, 220, 6), (0, 221)),
+        ((0, 222), None, None),
+        ((0, 224), (0, 228, 3), (0, 225)),
+        ((0, 226), None, None),
+        ((0, 229), None, None),
+        ((0, 231), (0, 236, 2), (0, 232)),
+        ((0, 233), None, None),
+        ((0, 235), (0, 236, 6), (0, 237)),
+        ((0, 238), None, None),
+        ((0, 240), None, None),
+        ((0, 242), (0, 244, 5), (0, 243)),
+        ((0, 245), None, None),
+        ((0, 247), (0, 252, 2), (0, 248)),
+        ((0, 249), None, None),
+        ((0, 251), None, None),
+        ((0, 254), (0, 260, 1), (0, 255)),
+        ((0, 256), None, None),
+        ((0, 258), (0, 260, 5), (0, 259)),
+        ((0, 261), None, None),
+        ((0, 263), None, None),
+        ((0, 265), (0, 268, 4), (0, 266)),
+        ((0, 267), None, None),
+        ((0, 270), (0, 276, 1), (0, 271)),
+        ((0, 272), None, None),
+        ((0, 274), None, None),
+        ((0, 277), (0, 284, 0), (0, 278)),
+        ((0, 279), None, None),
+        ((0, 281), (0, 284, 4), (0, 282)),
+        ((0, 283), None, None),
+        ((0, 286), None, None),
+    ),
+    (
+        ((0, 288), (0, 292, 3), (0, 289)),
+        ((0, 290), None, None),
+        ((0, 293), None, None),
+        ((0, 295), (0, 300, 2), (0, 296)),
+        ((0, 297), None, None),
+        ((0, 299), None, None),
+        ((0, 302), None, None),
+        ((0, 304), None, None),
+        ((0, 306), (0, 308, 5), None),
+        ((0, 309), None, None),
+        ((0, 311), (0, 316, 2), (0, 312)),
+        ((0, 313), None, None),
+        ((0, 315), (0, 316, 6), (0, 317)),
+        ((0, 318), None, None),
+        ((0, 320), (0, 324, 3), (0, 321)),
+        ((0, 322), None, None),
+        ((0, 325), None, None),
+        ((0, 327), (0, 332, 2), (0, 328)),
+        ((0, 329), None, None),
+        ((0, 331), (0, 332, 6), (0, 333)),
+        ((0, 334), None, None),
+        ((0, 336), None, None),
+        ((0, 338), (0, 340, 5), (0, 339)),
+        ((0, 341), None, None),
+        ((0, 343), (0, 348, 2), (0, 344)),
+        ((0, 345), None, None),
+        ((0, 347), None, None),
+        ((0, 350), (0, 356, 1), (0, 351)),
+        ((0, 352), None, None),
+        ((0, 354), (0, 356, 5), (0, 355)),
+        ((0, 357), None, None),
+        ((0, 359), None, None),
+        ((0, 361), (0, 364, 4), (0, 362)),
+        ((0, 363), None, None),
+        ((0, 366), (0, 372, 1), (0, 367)),
+        ((0, 368), None, None),
+        ((0, 370), None, None),
+        ((0, 373), (0, 380, 0), (0, 374)),
+        ((0, 375), None, None),
+        ((0, 377), (0, 380, 4), (0, 378)),
+        ((0, 379), None, None),
+        ((0, 382), None, None),
+        ((0, 384), (0, 388, 3), (0, 385)),
+        ((0, 386), None, None),
+        ((0, 389), (0, 396, 0), (0, 390)),
+        ((0, 391), None, None),
+        ((0, 393), None, None),
+        ((0, 395), (0, 396, 6), (0, 397)),
+        ((0, 398), None, None),
+        ((0, 400), (0, 404, 3), (0, 401)),
+        ((0, 402), None, None),
+        ((0, 405), None, None),
+        ((0, 407), (0, 412, 2), (0, 408)),
+        ((0, 409), None, None),
+        ((0, 411), (0, 412, 6), (0, 413)),
+        ((0, 414), None, None),
+        ((0, 416), None, None),
+        ((0, 418), (0, 420, 5), (0, 419)),
+        ((0, 421), None, None),
+        ((0, 423), (0, 428, 2), (0, 424)),
+        ((0, 425), None, None),
+        ((0, 427), None, None),
+    ),
+    (
+        ((0, 430), (0, 436, 1), (0, 431)),
+        ((0, 432), None, None),
+        ((0, 434), None, None),
+        ((0, 437), (0, 444, 0), (0, 438)),
+        ((0, 439), None, None),
+        ((0, 441), None, None),
+        ((0, 443), None, None),
+        ((0, 446), None, None),
+        ((0, 448), (0, 452, 3), None),
+        ((0, 450), None, None),
+        ((0, 453), (0, 460, 0), (0, 454)),
+        ((0, 455), None, None),
+        ((0, 457), (0, 460, 4), (0, 458)),
+        ((0, 459), None, None),
+        ((0, 462), (0, 468, 1), (0, 463)),
+        ((0, 464), None, None),
+        ((0, 466), None, None),
+        ((0, 469), (0, 476, 0), (0, 470)),
+        ((0, 471), None, None),
+        ((0, 473), (0, 476, 4), (0, 474)),
+        ((0, 475), None, None),
+        ((0, 478), None, None),
+        ((0, 480), (0, 484, 3), (0, 481)),
+        ((0, 482), None, None),
+        ((0, 485), (0, 492, 0), (0, 486)),
+        ((0, 487), None, None),
+        ((0, 489), None, None),
+        ((0, 491), (0, 492, 6), (0, 493)),
+        ((0, 494), None, None),
+        ((0, 496), (0, 500, 3), (0, 497)),
+        ((0, 498), None, None),
+        ((0, 501), None, None),
+        ((0, 503), (0, 508, 2), (0, 504)),
+        ((0, 505), None, None),
+        ((0, 507), (0, 508, 6), (0, 509)),
+        ((0, 510), None, None),
+        ((0, 512), None, None),
+        ((0, 514), (0, 516, 5), (0, 515)),
+        ((0, 517), None, None),
+        ((0, 519), (0, 524, 2), (0, 520)),
+        ((0, 521), None, None),
+        ((0, 523), None, None),
+        ((0, 526), (0, 532, 1), (0, 527)),
+        ((0, 528), None, None),
+        ((0, 530), (0, 532, 5), (0, 531)),
+        ((0, 533), None, None),
+        ((0, 535), None, None),
+        ((0, 537), (0, 540, 4), (0, 538)),
+        ((0, 539), None, None),
+        ((0, 542), (0, 548, 1), (0, 543)),
+        ((0, 544), None, None),
+        ((0, 546), None, None),
+        ((0, 549), (0, 556, 0), (0, 550)),
+        ((0, 551), None, None),
+        ((0, 553), (0, 556, 4), (0, 554)),
+        ((0, 555), None, None),
+        ((0, 558), None, None),
+        ((0, 560), (0, 564, 3), (0, 561)),
+        ((0, 562), None, None),
+        ((0, 565), (0, 572, 0), (0, 566)),
+        ((0, 567), None, None),
+        ((0, 569), None, None),
+    ),
+    (
+        ((0, 571), (0, 572, 6), (0, 573)),
+        ((0, 574), None, None),
+        ((0, 576), None, None),
+        ((0, 578), (0, 580, 5), (0, 579)),
+        ((0, 581), None, None),
+        ((0, 583), None, None),
+        ((0, 585), None, None),
+        ((0, 587), None, None),
+        ((0, 590), (0, 596, 1), None),
+        ((0, 592), None, None),
+        ((0, 594), (0, 596, 5), (0, 595)),
+        ((0, 597), None, None),
+        ((0, 599), (0, 604, 2), (0, 600)),
+        ((0, 601), None, None),
+        ((0, 603), (0, 604, 6), (0, 605)),
+        ((0, 606), None, None),
+        ((0, 608), None, None),
+        ((0, 610), (0, 612, 5), (0, 611)),
+        ((0, 613), None, None),
+        ((0, 615), (0, 620, 2), (0, 616)),
+        ((0, 617), None, None),
+        ((0, 619), None, None),
+        ((0, 622), (0, 628, 1), (0, 623)),
+        ((0, 624), None, None),
+        ((0, 626), (0, 628, 5), (0, 627)),
+        ((0, 629), None, None),
+        ((0, 631), None, None),
+        ((0, 633), (0, 636, 4), (0, 634)),
+        ((0, 635), None, None),
+        ((0, 638), (0, 644, 1), (0, 639)),
+        ((0, 640), None, None),
+        ((0, 642), None, None),
+        ((0, 645), (0, 652, 0), (0, 646)),
+        ((0, 647), None, None),
+        ((0, 649), (0, 652, 4), (0, 650)),
+        ((0, 651), None, None),
+        ((0, 654), None, None),
+        ((0, 656), (0, 660, 3), (0, 657)),
+        ((0, 658), None, None),
+        ((0, 661), (0, 668, 0), (0, 662)),
+        ((0, 663), None, None),
+        ((0, 665), None, None),
+        ((0, 667), (0, 668, 6), (0, 669)),
+        ((0, 670), None, None),
+        ((0, 672), (0, 676, 3), (0, 673)),
+        ((0, 674), None, None),
+        ((0, 677), None, None),
+        ((0, 679), (0, 684, 2), (0, 680)),
+        ((0, 681), None, None),
+        ((0, 683), (0, 684, 6), (0, 685)),
+        ((0, 686), None, None),
+        ((0, 688), None, None),
+        ((0, 690), (0, 692, 5), (0, 691)),
+        ((0, 693), None, None),
+        ((0, 695), (0, 700, 2), (0, 696)),
+        ((0, 697), None, None),
+        ((0, 699), None, None),
+        ((0, 702), (0, 708, 1), (0, 703)),
+        ((0, 704), None, None),
+        ((0, 706), (0, 708, 5), (0, 707)),
+        ((0, 709), None, None),
+        ((0, 711), None, None),
+    ),
+)
+
+OUTPUT_LOCATIONS = (
+    (
+        ((0, 713), (0, 716, 4), (0, 714)),
+        ((0, 715), None, None),
+        ((0, 718), None, None),
+        ((0, 720), (0, 724, 3), (0, 721)),
+        ((0, 722), None, None),
+        ((0, 725), None, None),
+        ((0, 727), None, None),
+        ((0, 729), None, None),
+        ((0, 731), (0, 732, 6), None),
+        ((0, 734), None, None),
+        ((0, 736), (0, 740, 3), (0, 737)),
+        ((0, 738), None, None),
+        ((0, 741), (0, 748, 0), (0, 742)),
+        ((0, 743), None, None),
+        ((0, 745), (0, 748, 4), (0, 746)),
+        ((0, 747), None, None),
+        ((0, 750), None, None),
+        ((0, 752), (0, 756, 3), (0, 753)),
+        ((0, 754), None, None),
+        ((0, 757), (0, 764, 0), (0, 758)),
+        ((0, 759), None, None),
+        ((0, 761), None, None),
+        ((0, 763), (0, 764, 6), (0, 765)),
+        ((0, 766), None, None),
+        ((0, 768), (0, 772, 3), (0, 769)),
+        ((0, 770), None, None),
+        ((0, 773), None, None),
+        ((0, 775), (0, 780, 2), (0, 776)),
+        ((0, 777), None, None),
+        ((0, 779), (0, 780, 6), (0, 781)),
+        ((0, 782), None, None),
+        ((0, 784), None, None),
+        ((0, 786), (0, 788, 5), (0, 787)),
+        ((0, 789), None, None),
+        ((0, 791), (0, 796, 2), (0, 792)),
+        ((0, 793), None, None),
+        ((0, 795), None, None),
+        ((0, 798), (0, 804, 1), (0, 799)),
+        ((0, 800), None, None),
+        ((0, 802), (0, 804, 5), (0, 803)),
+        ((0, 805), None, None),
+        ((0, 807), None, None),
+        ((0, 809), (0, 812, 4), (0, 810)),
+        ((0, 811), None, None),
+        ((0, 814), (0, 820, 1), (0, 815)),
+        ((0, 816), None, None),
+        ((0, 818), None, None),
+        ((0, 821), (0, 828, 0), (0, 822)),
+        ((0, 823), None, None),
+        ((0, 825), (0, 828, 4), (0, 826)),
+        ((0, 827), None, None),
+        ((0, 830), None, None),
+        ((0, 832), (0, 836, 3), (0, 833)),
+        ((0, 834), None, None),
+        ((0, 837), (0, 844, 0), (0, 838)),
+        ((0, 839), None, None),
+        ((0, 841), None, None),
+        ((0, 843), (0, 844, 6), (0, 845)),
+        ((0, 846), None, None),
+        ((0, 848), (0, 852, 3), (0, 849)),
+        ((0, 850), None, None),
+        ((0, 853), None, None),
+        ((0, 855), None, None),
+        ((0, 857), None, None),
+        ((0, 859), None, None),
+        ((0, 862), (0, 868, 1), (0, 863)),
+        ((0, 864), None, None),
+        ((0, 866), (0, 868, 5), (0, 867)),
+        ((0, 869), None, None),
+        ((0, 871), (0, 876, 2), None),
+        ((0, 873), (0, 876, 4), None),
+        ((0, 875), None, None),
+        ((0, 878), None, None),
+        ((0, 880), (0, 884, 3), (0, 881)),
+    ),
+    (
+        ((0, 882), (0, 884, 5), (0, 883)),
+        ((0, 885), None, None),
+        ((0, 887), None, None),
+        ((0, 889), (0, 892, 4), (0, 890)),
+        ((0, 891), None, None),
+        ((0, 894), None, None),
+        ((0, 896), None, None),
+        ((0, 898), None, None),
+        ((0, 901), (0, 908, 0), None),
+        ((0, 903), None, None),
+        ((0, 905), (0, 908, 4), (0, 906)),
+        ((0, 907), None, None),
+        ((0, 910), (0, 916, 1), (0, 911)),
+        ((0, 912), None, None),
+        ((0, 914), (0, 916, 5), (0, 915)),
+        ((0, 917), None, None),
+        ((0, 919), None, None),
+        ((0, 921), (0, 924, 4), (0, 922)),
+        ((0, 923), None, None),
+        ((0, 926), (0, 932, 1), (0, 927)),
+        ((0, 928), None, None),
+        ((0, 930), None, None),
+        ((0, 933), (0, 940, 0), (0, 934)),
+        ((0, 935), None, None),
+        ((0, 937), (0, 940, 4), (0, 938)),
+        ((0, 939), None, None),
+        ((0, 942), None, None),
+        ((0, 944), (0, 948, 3), (0, 945)),
+        ((0, 946), None, None),
+        ((0, 949), (0, 956, 0), (0, 950)),
+        ((0, 951), None, None),
+        ((0, 953), None, None),
+        ((0, 955), (0, 956, 6), (0, 957)),
+        ((0, 958), None, None),
+        ((0, 960), (0, 964, 3), (0, 961)),
+        ((0, 962), None, None),
+        ((0, 965), None, None),
+        ((0, 967), (0, 972, 2), (0, 968)),
+        ((0, 969), None, None),
+        ((0, 971), (0, 972, 6), (0, 973)),
+        ((0, 974), None, None),
+        ((0, 976), None, None),
+        ((0, 978), (0, 980, 5), (0, 979)),
+        ((0, 981), None, None),
+        ((0, 983), (0, 988, 2), (0, 984)),
+        ((0, 985), None, None),
+        ((0, 987), None, None),
+        ((0, 990), (0, 996, 1), (0, 991)),
+        ((0, 992), None, None),
+        ((0, 994), (0, 996, 5), (0, 995)),
+        ((0, 997), None, None),
+        ((0, 999), None, None),
+        ((0, 1001), (0, 1004, 4), (0, 1002)),
+        ((0, 1003), None, None),
+        ((0, 1006), (0, 1012, 1), (0, 1007)),
+        ((0, 1008), None, None),
+        ((0, 1010), None, None),
+        ((1, 13), (1, 20, 0), (1, 14)),
+        ((1, 15), None, None),
+        ((1, 17), (1, 20, 4), (1, 18)),
+        ((1, 19), None, None),
+        ((1, 22), None, None),
+        ((1, 24), None, None),
+        ((1, 26), None, None),
+        ((1, 29), None, None),
+        ((1, 31), (1, 36, 2), (1, 32)),
+        ((1, 33), None, None),
+        ((1, 35), (1, 36, 6), (1, 37)),
+        ((1, 38), None, None),
+        ((1, 40), (1, 44, 3), None),
+        ((1, 42), (1, 44, 5), None),
+        ((1, 45), None, None),
+        ((1, 47), None, None),
+        ((1, 49), (1, 52, 4), (1, 50)),
+    ),
+    (
+        ((1, 51), (1, 52, 6), (1, 53)),
+        ((1, 54), None, None),
+        ((1, 56), None, None),
+        ((1, 58), (1, 60, 5), (1, 59)),
+        ((1, 61), None, None),
+        ((1, 63), None, None),
+        ((1, 65), None, None),
+        ((1, 67), None, None),
+        ((1, 70), (1, 76, 1), None),
+        ((1, 72), None, None),
+        ((1, 74), (1, 76, 5), (1, 75)),
+        ((1, 77), None, None),
+        ((1, 79), (1, 84, 2), (1, 80)),
+        ((1, 81), None, None),
+        ((1, 83), (1, 84, 6), (1, 85)),
+        ((1, 86), None, None),
+        ((1, 88), None, None),
+        ((1, 90), (1, 92, 5), (1, 91)),
+        ((1, 93), None, None),
+        ((1, 95), (1, 100, 2), (1, 96)),
+        ((1, 97), None, None),
+        ((1, 99), None, None),
+        ((1, 102), (1, 108, 1), (1, 103)),
+        ((1, 104), None, None),
+        ((1, 106), (1, 108, 5), (1, 107)),
+        ((1, 109), None, None),
+        ((1, 111), None, None),
+        ((1, 113), (1, 116, 4), (1, 114)),
+        ((1, 115), None, None),
+        ((1, 118), (1, 124, 1), (1, 119)),
+        ((1, 120), None, None),
+        ((1, 122), None, None),
+        ((1, 125), (1, 132, 0), (1, 126)),
+        ((1, 127), None, None),
+        ((1, 129), (1, 132, 4), (1, 130)),
+        ((1, 131), None, None),
+        ((1, 134), None, None),
+        ((1, 136), (1, 140, 3), (1, 137)),
+        ((1, 138), None, None),
+        ((1, 141), (1, 148, 0), (1, 142)),
+        ((1, 143), None, None),
+        ((1, 145), None, None),
+        ((1, 147), (1, 148, 6), (1, 149)),
+        ((1, 150), None, None),
+        ((1, 152), (1, 156, 3), (1, 153)),
+        ((1, 154), None, None),
+        ((1, 157), None, None),
+        ((1, 159), (1, 164, 2), (1, 160)),
+        ((1, 161), None, None),
+        ((1, 163), (1, 164, 6), (1, 165)),
+        ((1, 166), None, None),
+        ((1, 168), None, None),
+        ((1, 170), (1, 172, 5), (1, 171)),
+        ((1, 173), None, None),
+        ((1, 175), (1, 180, 2), (1, 176)),
+        ((1, 177), None, None),
+        ((1, 179), None, None),
+        ((1, 182), (1, 188, 1), (1, 183)),
+        ((1, 184), None, None),
+        ((1, 186), (1, 188, 5), (1, 187)),
+        ((1, 189), None, None),
+        ((1, 191), None, None),
+        ((1, 193), None, None),
+        ((1, 195), None, None),
+        ((1, 198), None, None),
+        ((1, 200), (1, 204, 3), (1, 201)),
+        ((1, 202), None, None),
+        ((1, 205), (1, 212, 0), (1, 206)),
+        ((1, 207), None, None),
+        ((1, 209), (1, 212, 4), None),
+        ((1, 211), (1, 212, 6), None),
+        ((1, 214), None, None),
+        ((1, 216), None, None),
+        ((1, 218), (1, 220, 5), (1, 219)),
+    ),
+    (
+        ((1, 221), (1, 228, 0), (1, 222)),
+        ((1, 223), None, None),
+        ((1, 225), None, None),
+        ((1, 227), (1, 228, 6), (1, 229)),
+        ((1, 230), None, None),
+        ((1, 232), None, None),
+        ((1, 234), None, None),
+        ((1, 237), None, None),
+        ((1, 239), (1, 244, 2), None),
+        ((1, 241), None, None),
+        ((1, 243), (1, 244, 6), (1, 245)),
+        ((1, 246), None, None),
+        ((1, 248), (1, 252, 3), (1, 249)),
+        ((1, 250), None, None),
+        ((1, 253), (1, 260, 0), (1, 254)),
+        ((1, 255), None, None),
+        ((1, 257), None, None),
+        ((1, 259), (1, 260, 6), (1, 261)),
+        ((1, 262), None, None),
+        ((1, 264), (1, 268, 3), (1, 265)),
+        ((1, 266), None, None),
+        ((1, 269), None, None),
+        ((1, 271), (1, 276, 2), (1, 272)),
+        ((1, 273), None, None),
+        ((1, 275), (1, 276, 6), (1, 277)),
+        ((1, 278), None, None),
+        ((1, 280), None, None),
+        ((1, 282), (1, 284, 5), (1, 283)),
+        ((1, 285), None, None),
+        ((1, 287), (1, 292, 2), (1, 288)),
+        ((1, 289), None, None),
+        ((1, 291), None, None),
+        ((1, 294), (1, 300, 1), (1, 295)),
+        ((1, 296), None, None),
+        ((1, 298), (1, 300, 5), (1, 299)),
+        ((1, 301), None, None),
+        ((1, 303), None, None),
+        ((1, 305), (1, 308, 4), (1, 306)),
+        ((1, 307), None, None),
+        ((1, 310), (1, 316, 1), (1, 311)),
+        ((1, 312), None, None),
+        ((1, 314), None, None),
+        ((1, 317), (1, 324, 0), (1, 318)),
+        ((1, 319), None, None),
+        ((1, 321), (1, 324, 4), (1, 322)),
+        ((1, 323), None, None),
+        ((1, 326), None, None),
+        ((1, 328), (1, 332, 3), (1, 329)),
+        ((1, 330), None, None),
+        ((1, 333), (1, 340, 0), (1, 334)),
+        ((1, 335), None, None),
+        ((1, 337), None, None),
+        ((1, 339), (1, 340, 6), (1, 341)),
+        ((1, 342), None, None),
+        ((1, 344), (1, 348, 3), (1, 345)),
+        ((1, 346), None, None),
+        ((1, 349), None, None),
+        ((1, 351), (1, 356, 2), (1, 352)),
+        ((1, 353), None, None),
+        ((1, 355), (1, 356, 6), (1, 357)),
+        ((1, 358), None, None),
+        ((1, 360), None, None),
+        ((1, 362), None, None),
+        ((1, 365), None, None),
+        ((1, 367), None, None),
+        ((1, 369), (1, 372, 4), (1, 370)),
+        ((1, 371), None, None),
+        ((1, 374), (1, 380, 1), (1, 375)),
+        ((1, 376), None, None),
+        ((1, 378), (1, 380, 5), None),
+        ((1, 381), (1, 388, 0), None),
+        ((1, 383), None, None),
+        ((1, 385), None, None),
+        ((1, 387), (1, 388, 6), (1, 389)),
+    ),
+    (
+        ((1, 390), (1, 396, 1), (1, 391)),
+        ((1, 392), None, None),
+        ((1, 394), None, None),
+        ((1, 397), (1, 404, 0), (1, 398)),
+        ((1, 399), None, None),
+        ((1, 401), None, None),
+        ((1, 403), None, None),
+        ((1, 406), None, None),
+        ((1, 408), (1, 412, 3), None),
+        ((1, 410), None, None),
+        ((1, 413), (1, 420, 0), (1, 414)),
+        ((1, 415), None, None),
+        ((1, 417), (1, 420, 4), (1, 418)),
+        ((1, 419), None, None),
+        ((1, 422), (1, 428, 1), (1, 423)),
+        ((1, 424), None, None),
+        ((1, 426), None, None),
+        ((1, 429), (1, 436, 0), (1, 430)),
+        ((1, 431), None, None),
+        ((1, 433), (1, 436, 4), (1, 434)),
+        ((1, 435), None, None),
+        ((1, 438), None, None),
+        ((1, 440), (1, 444, 3), (1, 441)),
+        ((1, 442), None, None),
+        ((1, 445), (1, 452, 0), (1, 446)),
+        ((1, 447), None, None),
+        ((1, 449), None, None),
+        ((1, 451), (1, 452, 6), (1, 453)),
+        ((1, 454), None, None),
+        ((1, 456), (1, 460, 3), (1, 457)),
+        ((1, 458), None, None),
+        ((1, 461), None, None),
+        ((1, 463), (1, 468, 2), (1, 464)),
+        ((1, 465), None, None),
+        ((1, 467), (1, 468, 6), (1, 469)),
+        ((1, 470), None, None),
+        ((1, 472), None, None),
+        ((1, 474), (1, 476, 5), (1, 475)),
+        ((1, 477), None, None),
+        ((1, 479), (1, 484, 2), (1, 480)),
+        ((1, 481), None, None),
+        ((1, 483), None, None),
+        ((1, 486), (1, 492, 1), (1, 487)),
+        ((1, 488), None, None),
+        ((1, 490), (1, 492, 5), (1, 491)),
+        ((1, 493), None, None),
+        ((1, 495), None, None),
+        ((1, 497), (1, 500, 4), (1, 498)),
+        ((1, 499), None, None),
+        ((1, 502), (1, 508, 1), (1, 503)),
+        ((1, 504), None, None),
+        ((1, 506), None, None),
+        ((1, 509), (1, 516, 0), (1, 510)),
+        ((1, 511), None, None),
+        ((1, 513), (1, 516, 4), (1, 514)),
+        ((1, 515), None, None),
+        ((1, 518), None, None),
+        ((1, 520), (1, 524, 3), (1, 521)),
+        ((1, 522), None, None),
+        ((1, 525), (1, 532, 0), (1, 526)),
+        ((1, 527), None, None),
+        ((1, 529), None, None),
+        ((1, 531), None, None),
+        ((1, 534), None, None),
+        ((1, 536), None, None),
+        ((1, 538), (1, 540, 5), (1, 539)),
+        ((1, 541), None, None),
+        ((1, 543), (1, 548, 2), (1, 544)),
+        ((1, 545), None, None),
+        ((1, 547), (1, 548, 6), None),
+        ((1, 550), (1, 556, 1), None),
+        ((1, 552), None, None),
+        ((1, 554), None, None),
+        ((1, 557), (1, 564, 0), (1, 558)),
+    ),
+    (
+        ((1, 559), (1, 564, 2), (1, 560)),
+        ((1, 561), None, None),
+        ((1, 563), None, None),
+        ((1, 566), (1, 572, 1), (1, 567)),
+        ((1, 568), None, None),
+        ((1, 570), None, None),
+        ((1, 573), None, None),
+        ((1, 575), None, None),
+        ((1, 577), (1, 580, 4), None),
+        ((1, 579), None, None),
+        ((1, 582), (1, 588, 1), (1, 583)),
+        ((1, 584), None, None),
+        ((1, 586), (1, 588, 5), (1, 587)),
+        ((1, 589), None, None),
+        ((1, 591), (1, 596, 2), (1, 592)),
+        ((1, 593), None, None),
+        ((1, 595), None, None),
+        ((1, 598), (1, 604, 1), (1, 599)),
+        ((1, 600), None, None),
+        ((1, 602), (1, 604, 5), (1, 603)),
+        ((1, 605), None, None),
+        ((1, 607), None, None),
+        ((1, 609), (1, 612, 4), (1, 610)),
+        ((1, 611), None, None),
+        ((1, 614), (1, 620, 1), (1, 615)),
+        ((1, 616), None, None),
+        ((1, 618), None, None),
+        ((1, 621), (1, 628, 0), (1, 622)),
+        ((1, 623), None, None),
+        ((1, 625), (1, 628, 4), (1, 626)),
+        ((1, 627), None, None),
+        ((1, 630), None, None),
+        ((1, 632), (1, 636, 3), (1, 633)),
+        ((1, 634), None, None),
+        ((1, 637), (1, 644, 0), (1, 638)),
+        ((1, 639), None, None),
+        ((1, 641), None, None),
+        ((1, 643), (1, 644, 6), (1, 645)),
+        ((1, 646), None, None),
+        ((1, 648), (1, 652, 3), (1, 649)),
+        ((1, 650), None, None),
+        ((1, 653), None, None),
+        ((1, 655), (1, 660, 2), (1, 656)),
+        ((1, 657), None, None),
+        ((1, 659), (1, 660, 6), (1, 661)),
+        ((1, 662), None, None),
+        ((1, 664), None, None),
+        ((1, 666), (1, 668, 5), (1, 667)),
+        ((1, 669), None, None),
+        ((1, 671), (1, 676, 2), (1, 672)),
+        ((1, 673), None, None),
+        ((1, 675), None, None),
+        ((1, 678), (1, 684, 1), (1, 679)),
+        ((1, 680), None, None),
+        ((1, 682), (1, 684, 5), (1, 683)),
+        ((1, 685), None, None),
+        ((1, 687), None, None),
+        ((1, 689), (1, 692, 4), (1, 690)),
+        ((1, 691), None, None),
+        ((1, 694), (1, 700, 1), (1, 695)),
+        ((1, 696), None, None),
+        ((1, 698), None, None),
+        ((1, 701), None, None),
+        ((1, 703), None, None),
+        ((1, 705), None, None),
+        ((1, 707), (1, 708, 6), (1, 709)),
+        ((1, 710), None, None),
+        ((1, 712), (1, 716, 3), (1, 713)),
+        ((1, 714), None, None),
+        ((1, 717), (1, 724, 0), None),
+        ((1, 719), (1, 724, 2), None),
+        ((1, 721), None, None),
+        ((1, 723), None, None),
+        ((1, 726), (1, 732, 1), (1, 727)),
+    ),
+)
+
+NO_BYTE = -1
+
+
+def _flatten(location):
+    low, middle, high = location
+    if middle is None:
+        middle = (NO_BYTE, NO_BYTE, 0)
+    if high is None:
+        high = (NO_BYTE, NO_BYTE)
+    return low[0], low[1], middle[0], middle[1], 1 << middle[2], high[0], high[1]
+
+
+def _build_index():
+    index = dict()
+    for param in range(2, 12):
+        index[(0, param)] = _flatten(SETUP_LOCATIONS[param - 2])
+    for param in range(20, 25):
+        index[(0, param)] = _flatten(SETUP_LOCATIONS[param - 10])
+    for channel, params in enumerate(INPUT_LOCATIONS, start=1):
+        for param, location in enumerate(params, start=2):
+            index[(channel, param)] = _flatten(location)
+    for channel, params in enumerate(OUTPUT_LOCATIONS, start=5):
+        for param, location in enumerate(params, start=2):
+            index[(channel, param)] = _flatten(location)
+    return index
+
+
+# (channel, param) -> (low_part, low_byte, middle_part, middle_byte, middle_mask, high_part, high_byte)
+LOCATIONS = _build_index()
+
+
+def _build_byte_index():
+    index = dict()
+    for key, location in LOCATIONS.items():
+        for part_byte in touched(location):
+            index.setdefault(part_byte, []).append(key)
+    return {part_byte: tuple(keys) for part_byte, keys in index.items()}
+
+
+def patch(dumps, location, value_high: int, value_low: int):
+    low_part, low_byte, middle_part, middle_byte, middle_mask, high_part, high_byte = location
+    dumps[low_part][low_byte] = value_low
+    if middle_byte > 0:
+        if value_high & 1:
+            dumps[middle_part][middle_byte] |= middle_mask
+        else:
+            dumps[middle_part][middle_byte] &= ~middle_mask
+    if high_byte > 0:
+        dumps[high_part][high_byte] = value_high >> 1
+
+
+def decode(dumps, location) -> int:
+    low_part, low_byte, middle_part, middle_byte, middle_mask, high_part, high_byte = location
+    value_high = 0
+    if middle_byte > 0 and dumps[middle_part][middle_byte] & middle_mask:
+        value_high = 1
+    if high_byte > 0:
+        value_high |= dumps[high_part][high_byte] << 1
+    return value_high << 7 | dumps[low_part][low_byte]
+
+
+def touched(location):
+    low_part, low_byte, middle_part, middle_byte, _, high_part, high_byte = location
+    return tuple((part, byte) for part, byte in ((low_part, low_byte), (middle_part, middle_byte), (high_part, high_byte))
+                 if byte > 0)
+
+
+# (part, byte) -> (channel, param) of every parameter stored in that byte
+BYTE_LOCATIONS = _build_byte_index()
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+import const
+
+
+class Meters:
+    # Keeps the ping payload of every device of every bus in one array and decodes all of them at once per ping
+    # cycle, consumers get the decoded levels and limiter flags instead of decoding the raw bytes themselves.
+    def __init__(self, logger, buses: int, interval: float = const.PING_INTEVAL):
+        self.__logger = logger.getChild("meters")
+        self.interval = interval
+        self.__raw = np.zeros((buses * const.MAX_DEVICES, const.PING_PAYLOAD_LENGTH), dtype=np.uint8)
+        self.__present = np.zeros(buses * const.MAX_DEVICES, dtype=bool)
+        self.__dirty = False
+        self.__timer = None
+        self.__listeners = []
+        self.cycles = 0
+        # (levels, limited, present) of the last cycle - published as one tuple, a reader on another thread that
+        # takes it once never mixes arrays of two cycles
+        self.snapshot = (np.zeros((buses * const.MAX_DEVICES, len(const.METER_CHANNELS)), dtype=np.uint8),
+                         np.zeros((buses * const.MAX_DEVICES, len(const.METER_CHANNELS)), dtype=bool),
+                         self.__present.copy())
+
+    def add_listener(self, listener):
+        # listener(meters) runs on the loop thread after each cycle that saw new pings
+        self.__listeners.append(listener)
+
+    def update(self, device, command, packet):
+        slot = device.bus * const.MAX_DEVICES + device.device_id
+        if not 0 <= device.device_id < const.MAX_DEVICES or slot >= len(self.__raw):
+            raise RuntimeError(f"device {device.device_id} of bus {device.bus} has no meter row")
+        if command == const.PING_RESPONSE:
+            self.__raw[slot] = np.frombuffer(packet, dtype=np.uint8, count=const.PING_PAYLOAD_LENGTH,
+                                             offset=const.PING_PAYLOAD_START)
+            self.__present[slot] = True
+            self.__dirty = True
+        elif command == const.DEVICE_REMOVED:
+            self.__present[slot] = False
+            self.__dirty = True
+
+    def start(self):
+        self.__timer = asyncio.get_event_loop().call_later(self.interval, self.cycle)
+
+    def stop(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+    def cycle(self):
+        self.start()
+        if not self.__dirty:
+            return
+        self.__dirty = False
+        self.decode()
+        for listener in self.__listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                self.__logger.error(f"meter listener {listener} failed: {e}")
+
+    def decode(self):
+        channels = self.__raw[:, :len(const.METER_CHANNELS)]
+        self.snapshot = (channels & const.METER_LEVEL_MASK, (channels & const.METER_LIMIT_MASK) != 0,
+                         self.__present.copy())
+        self.cycles += 1
+
+    def devices(self) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        # (bus, device id, levels, limited) of every device that answered a ping
+        levels, limited, present = self.snapshot
+        for slot in np.flatnonzero(present):
+            bus, device_id = divmod(int(slot), const.MAX_DEVICES)
+            yield bus, device_id, levels[slot], limited[slot]
+
+    def limiting(self) -> List[Tuple[int, int, List[str]]]:
+        # (bus, device id, channel names) of every device limiting on any channel - for alarms
+        _, limited, present = self.snapshot
+        limited = limited & present[:, None]
+        return [(int(slot) // const.MAX_DEVICES, int(slot) % const.MAX_DEVICES,
+                 [const.METER_CHANNELS[channel] for channel in np.flatnonzero(limited[slot])])
+                for slot in np.flatnonzero(limited.any(axis=1))]
+
+    def to_dict(self) -> List[dict]:
+        return [{"bus": bus, "device": device_id, "channels": list(const.METER_CHANNELS),
+                 "levels": levels.tolist(), "limited": limited.astype(int).tolist()}
+                for bus, device_id, levels, limited in self.devices()]
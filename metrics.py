@@ -0,0 +1,111 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.__values: Dict[Tuple, float] = dict()
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: Tuple = ()):
+        with self.__lock:
+            self.__values[labels] = self.__values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self.__values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labels, labels)} {value}" for labels, value in list(self.__values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.__values: Dict[Tuple, List[float]] = dict()
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()):
+        with self.__lock:
+            counts = self.__values.get(labels)
+            if counts is None:
+                counts = self.__values[labels] = [0] * (len(self.buckets) + 2)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def count(self, labels: Tuple = ()) -> int:
+        counts = self.__values.get(labels)
+        return 0 if counts is None else sum(counts[:-1])
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, counts in list(self.__values.items()):
+            counts = list(counts)
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                bucket = _labels(self.labels, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.__metrics = []
+
+    def register(self, metric):
+        self.__metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def exposition(self) -> str:
+        lines = []
+        for metric in self.__metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+BYTES_RECEIVED = REGISTRY.counter("dcx_bytes_received_total", "Bytes read from the serial bus", ("bus",))
+BYTES_SENT = REGISTRY.counter("dcx_bytes_sent_total", "Bytes written to the serial bus", ("bus",))
+BUS_BUSY = REGISTRY.counter("dcx_bus_busy_seconds_total", "Time the bus spent transferring bytes either way",
+                            ("bus",))
+FRAMES = REGISTRY.counter("dcx_frames_total", "Frames handled per command", ("bus", "command"))
+MALFORMED = REGISTRY.counter("dcx_malformed_frames_total", "Frames rejected as malformed", ("bus", "command"))
+WRITE_WAIT = REGISTRY.histogram("dcx_write_wait_seconds", "Time a frame waited in the write queue", ("bus",))
+PING_ROUND_TRIP = REGISTRY.histogram("dcx_ping_round_trip_seconds", "Time from queueing a ping to its answer",
+                                     ("bus", "device"))
+HTTP_LATENCY = REGISTRY.histogram("dcx_http_request_seconds", "Time to answer an api request",
+                                  ("route", "method", "status"))
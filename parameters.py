@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, Tuple
+
+import const
+import locations
+
+SETUP_CHANNEL = 0
+INPUT_CHANNELS = range(1, 5)
+OUTPUT_CHANNELS = range(5, 11)
+# (start, end) of the dump parts in the dump0|dump1|ping blob
+PARTS = ((0, const.GUI_DUMP_1_OFFSET), (const.GUI_DUMP_1_OFFSET, const.GUI_PING_OFFSET))
+CHANNEL_PARAMS = {channel: tuple(sorted(param for c, param in locations.LOCATIONS if c == channel))
+                  for channel in (SETUP_CHANNEL, *INPUT_CHANNELS, *OUTPUT_CHANNELS)}
+
+
+class Channel:
+    def __init__(self, parameters, channel: int):
+        self.__parameters = parameters
+        self.channel = channel
+
+    @property
+    def kind(self) -> str:
+        if self.channel == SETUP_CHANNEL:
+            return "setup"
+        return "input" if self.channel in INPUT_CHANNELS else "output"
+
+    def params(self) -> Tuple[int, ...]:
+        return CHANNEL_PARAMS[self.channel]
+
+    def __getitem__(self, param: int) -> int:
+        return self.__parameters[self.channel, param]
+
+    def to_dict(self) -> Dict[int, int]:
+        return {param: self[param] for param in self.params()}
+
+
+class Parameters:
+    # values are decoded from the dumps on first access and kept until a change touches one of their bytes,
+    # http threads decode while the loop thread patches - a value is only kept if no change ran meanwhile
+    def __init__(self, dumps):
+        self.__dumps = dumps
+        self.__values: Dict[Tuple[int, int], int] = dict()
+        self.__lock = threading.Lock()
+        self.__changes = 0
+        self.setup = Channel(self, SETUP_CHANNEL)
+        self.inputs = tuple(Channel(self, n) for n in INPUT_CHANNELS)
+        self.outputs = tuple(Channel(self, n) for n in OUTPUT_CHANNELS)
+
+    def __getitem__(self, key: Tuple[int, int]) -> int:
+        value = self.__values.get(key)
+        if value is None:
+            changes = self.__changes
+            value = locations.decode(self.__dumps, locations.LOCATIONS[key])
+            with self.__lock:
+                if changes == self.__changes:
+                    self.__values[key] = value
+        return value
+
+    def __len__(self):
+        return len(self.__values)
+
+    def invalidate(self, *ranges: Tuple[int, int]):
+        # ranges are (start, end) offsets into the dump0|dump1|ping blob of Device.to_gui, runs after the bytes changed
+        with self.__lock:
+            self.__changes += 1
+            for start, end in ranges:
+                if any(start <= part_start and part_end <= end for part_start, part_end in PARTS):
+                    # a whole dump arrived - cheaper to decode again what is asked for than to walk every byte
+                    self.__values.clear()
+                    return
+                for offset in range(start, min(end, const.GUI_PING_OFFSET)):
+                    part = 0 if offset < const.GUI_DUMP_1_OFFSET else 1
+                    for key in locations.BYTE_LOCATIONS.get((part, offset - part * const.GUI_DUMP_1_OFFSET), ()):
+                        self.__values.pop(key, None)
+
+    def to_dict(self):
+        return {
+            "setup": self.setup.to_dict(),
+            "inputs": [channel.to_dict() for channel in self.inputs],
+            "outputs": [channel.to_dict() for channel in self.outputs],
+        }
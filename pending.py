@@ -0,0 +1,44 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+# (device_id, response command, dump part) - device_id None matches any device, part None any non dump response
+Key = Tuple[Optional[int], int, Optional[int]]
+
+
+class PendingRequests:
+    def __init__(self):
+        self.__waiting: Dict[Key, List[asyncio.Future]] = dict()
+
+    def __len__(self):
+        return sum(len(futures) for futures in self.__waiting.values())
+
+    def expect(self, key: Key) -> asyncio.Future:
+        response = asyncio.get_event_loop().create_future()
+        self.__waiting.setdefault(key, []).append(response)
+        return response
+
+    def discard(self, key: Key, response: asyncio.Future):
+        futures = self.__waiting.get(key)
+        if futures is None:
+            return
+        if response in futures:
+            futures.remove(response)
+        if not futures:
+            del self.__waiting[key]
+
+    def resolve(self, device_id: int, command: int, part: Optional[int], result):
+        if not self.__waiting:
+            return
+        self.__resolve((device_id, command, part), result)
+        self.__resolve((None, command, part), result)
+
+    def __resolve(self, key: Key, result):
+        for response in self.__waiting.pop(key, ()):
+            if not response.done():
+                response.set_result(result)
+
+    def cancel_all(self):
+        for futures in self.__waiting.values():
+            for response in futures:
+                response.cancel()
+        self.__waiting.clear()
@@ -0,0 +1,81 @@
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import checksum
+import const
+import locations
+
+NAME = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+EXTENSION = ".preset"
+
+
+def diff(target: Sequence[bytes], dumps: Sequence[bytearray]) -> List[Tuple[int, int, int]]:
+    # (channel, param, value) of every parameter whose value in target differs from dumps
+    changes = []
+    for (channel, param), location in locations.LOCATIONS.items():
+        value = locations.decode(target, location)
+        if value != locations.decode(dumps, location):
+            changes.append((channel, param, value))
+    return changes
+
+
+def recall(ultradrive, device_id: int, target: Sequence[bytes]) -> Optional[int]:
+    # runs on the loop thread - only the differences go out, folded with pending edits by the coalescer. None while
+    # the cached dumps may differ from the device, a diff against them could skip parameters that really differ
+    device = ultradrive.device(device_id)
+    if not device.verified:
+        return None
+    changes = diff(target, (device.dump0, device.dump1))
+    if changes:
+        ultradrive.coalescer().add(device_id, changes)
+    return len(changes)
+
+
+class PresetStore:
+    # whole dump0/dump1 images kept as one file per preset
+    def __init__(self, path: str = const.PRESETS_PATH):
+        self.path = path
+
+    def __file(self, name: str) -> str:
+        if not NAME.fullmatch(name):
+            raise RuntimeError(f"invalid preset name {name}")
+        return os.path.join(self.path, name + EXTENSION)
+
+    def names(self) -> List[str]:
+        try:
+            files = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(file[:-len(EXTENSION)] for file in files if file.endswith(EXTENSION))
+
+    def load(self, name: str) -> Tuple[bytes, bytes]:
+        # KeyError for unknown presets
+        try:
+            with open(self.__file(name), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError(name)
+        if len(data) != const.PART_0_LENGTH + const.PART_1_LENGTH:
+            raise RuntimeError(f"preset {name} is damaged - it holds {len(data)} bytes")
+        dumps = (data[:const.PART_0_LENGTH], data[const.PART_0_LENGTH:])
+        for dump in dumps:
+            error = checksum.validate(dump)
+            if error is not None:
+                raise RuntimeError(f"preset {name} is damaged - {error}")
+        return dumps
+
+    def save(self, name: str, dump0: bytes, dump1: bytes):
+        path = self.__file(name)
+        os.makedirs(self.path, exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(dump0)
+            f.write(dump1)
+        os.replace(temporary, path)
+
+    def delete(self, name: str):
+        try:
+            os.remove(self.__file(name))
+        except FileNotFoundError:
+            raise KeyError(name)
@@ -0,0 +1,146 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import const
+import metrics
+
+
+@dataclass
+class PollState:
+    last_ping: float = 0
+    last_pong: float = 0
+    next_poll: float = 0
+    failures: int = 0
+    transmit_mode: bool = False
+    # per dump part - grows while re-dumps keep matching the cached state
+    redump_interval: List[float] = field(default_factory=lambda: [const.RESYNC_INTEVAL] * 2)
+    next_redump: List[float] = field(default_factory=lambda: [0, 0])
+
+
+def jitter(interval: float) -> float:
+    return interval * (1 + random.uniform(-const.POLL_JITTER, const.POLL_JITTER))
+
+
+class PollScheduler:
+    # Polls one device at a time and waits for its answer, so the bus is never busier than the devices can take.
+    # Live devices are pinged every PING_INTEVAL, devices that stop answering less and less often until they
+    # answer again.
+    def __init__(self, logger, ultradrive):
+        self.__logger = logger.getChild("scheduler")
+        self.__ultradrive = ultradrive
+        self.__states: Dict[int, PollState] = dict()
+        self.__task = None
+        self.__wakeup = None
+        self.__next_resync = 0
+
+    def states(self) -> Dict[int, PollState]:
+        return self.__states
+
+    def start(self):
+        loop = asyncio.get_event_loop()
+        self.__wakeup = asyncio.Event()
+        self.__next_resync = loop.time()
+        self.__task = loop.create_task(self.run())
+
+    def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    def update(self, device, command, packet):
+        if command == const.DEVICE_REMOVED:
+            self.__states.pop(device.device_id, None)
+            return
+        now = asyncio.get_event_loop().time()
+        state = self.__states.get(device.device_id)
+        if state is None:
+            self.__logger.info(f"scheduling new device {device.device_id}")
+            state = PollState(next_poll=now)
+            self.__states[device.device_id] = state
+            if self.__wakeup is not None:
+                self.__wakeup.set()
+        if command not in const.DEVICE_ANSWERS:
+            # our own direct commands and whole-device restores say nothing about the device being alive
+            return
+        if state.last_pong == 0 and state.failures:
+            self.__logger.info(f"device {device.device_id} answers again")
+            state.failures = 0
+            state.next_poll = now
+            if self.__wakeup is not None:
+                self.__wakeup.set()
+        state.last_pong = now
+        if command == const.DUMP_RESPONSE:
+            part = packet[const.PART_BYTE]
+            if device.checks[part].diverged:
+                state.redump_interval[part] = const.RESYNC_INTEVAL
+            else:
+                state.redump_interval[part] = min(state.redump_interval[part] * 2, const.MAX_REDUMP_INTERVAL)
+            state.next_redump[part] = now + jitter(state.redump_interval[part])
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            now = loop.time()
+            if now >= self.__next_resync:
+                self.__ultradrive.resync()
+                self.__next_resync = now + jitter(const.RESYNC_INTEVAL)
+
+            device_id = min(self.__states, key=lambda n: self.__states[n].next_poll, default=None)
+            due = self.__next_resync if device_id is None else min(self.__states[device_id].next_poll,
+                                                                    self.__next_resync)
+            if due > now:
+                self.__wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.__wakeup.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.poll(device_id)
+
+    async def poll(self, device_id: int):
+        loop = asyncio.get_event_loop()
+        state = self.__states[device_id]
+        try:
+            if not state.transmit_mode:
+                await self.__ultradrive.request_transmit_mode(device_id)
+                state.transmit_mode = True
+            state.last_ping = loop.time()
+            await self.__ultradrive.request_ping(device_id, timeout=const.PING_TIMEOUT, retries=0)
+            metrics.PING_ROUND_TRIP.observe(loop.time() - state.last_ping,
+                                            (str(self.__ultradrive.bus), str(device_id)))
+        except asyncio.TimeoutError:
+            now = loop.time()
+            state.failures += 1
+            if state.last_pong and now - state.last_pong >= const.TIMEOUT_TIME:
+                self.__logger.warning(f"device {device_id} stopped answering")
+                state.last_pong = 0
+                state.transmit_mode = False
+                self.__ultradrive.device_lost(device_id)
+            backoff = min(const.PING_INTEVAL * 2 ** state.failures, const.MAX_POLL_BACKOFF)
+            state.next_poll = now + jitter(backoff)
+        except RuntimeError as e:
+            # the request never made it onto the bus - nothing the device is to blame for
+            self.__logger.warning(f"polling device {device_id} failed: {e}")
+            state.next_poll = loop.time() + jitter(const.PING_INTEVAL)
+        else:
+            state.failures = 0
+            state.next_poll = state.last_ping + jitter(const.PING_INTEVAL)
+            device = self.__ultradrive.devices().get(device_id)
+            if device is not None:
+                await self.redump(device, state)
+
+    async def redump(self, device, state: PollState):
+        # only parts that may differ from the device are dumped again, the others once their interval ran out
+        loop = asyncio.get_event_loop()
+        for part, check in enumerate(device.checks):
+            if check.in_doubt or loop.time() >= state.next_redump[part]:
+                try:
+                    await self.__ultradrive.request_dump(device.device_id, part)
+                except asyncio.TimeoutError:
+                    self.__logger.warning(f"device {device.device_id} did not send dump part {part}")
+                    return
+                except RuntimeError as e:
+                    self.__logger.warning(f"requesting dump part {part} of device {device.device_id} failed: {e}")
+                    return
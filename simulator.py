@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import logging
+import os
+import pty
+import random
+import threading
+import tty
+from typing import Dict, Iterable, Optional
+
+import const
+import locations
+from Ultradrive import (BYTE_TIME, DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE, DUMMY_SEARCH_RESPONSE,
+                        Ultadrive)
+from framer import SysexFramer
+
+PING_LEVELS = range(8, 18)
+
+
+class SimulatedDevice:
+    def __init__(self, device_id: int, rng: random.Random):
+        self.device_id = device_id
+        self.__random = rng
+        self.dumps = (bytearray(DUMMY_DUMP_0), bytearray(DUMMY_DUMP_1))
+        self.search_response = bytearray(DUMMY_SEARCH_RESPONSE)
+        self.ping_response = bytearray(DUMMY_PING_RESPONSE)
+        for frame in self.dumps + (self.search_response, self.ping_response):
+            frame[const.ID_BYTE] = device_id
+        self.transmit_mode = False
+        self.__keys = list(locations.LOCATIONS)
+
+    def ping(self) -> bytes:
+        for byte in PING_LEVELS:
+            self.ping_response[byte] = self.__random.randrange(16)
+        return bytes(self.ping_response)
+
+    def apply(self, frame: bytes):
+        count = frame[const.PARAM_COUNT_BYTE]
+        for offset in range(0, 4 * count, 4):
+            location = locations.LOCATIONS.get((frame[const.CHANNEL_BYTE + offset], frame[const.PARAM_BYTE + offset]))
+            if location is not None:
+                locations.patch(self.dumps, location, frame[const.VALUE_HI_BYTE + offset],
+                                frame[const.VALUE_LOW_BYTE + offset])
+
+    def change(self) -> bytes:
+        # what turning a knob on the front panel sends in transmit mode
+        channel, param = self.__random.choice(self.__keys)
+        location = locations.LOCATIONS[(channel, param)]
+        value = locations.decode(self.dumps, location) ^ 1
+        locations.patch(self.dumps, location, value >> 7, value & 0x7F)
+        return Ultadrive.direct_command(self.device_id, [(channel, param, value >> 7, value & 0x7F)])
+
+
+class Simulator(threading.Thread):
+    # Emulates a chain of devices behind a pseudo-terminal: connect the backend to `port`. Frames leave at the
+    # pace of the configured baud rate, one at a time as on the real bus.
+    def __init__(self, logger, devices: int = const.MAX_DEVICES, jitter: float = 0.0, corruption: float = 0.0,
+                 change_rate: float = 0.0, seed: Optional[int] = None):
+        super(Simulator, self).__init__(daemon=True)
+        if not 0 < devices <= const.MAX_DEVICES:
+            raise RuntimeError(f"a chain holds 1 to {const.MAX_DEVICES} devices, not {devices}")
+        self.__logger = logger.getChild("simulator")
+        self.__random = random.Random(seed)
+        self.__devices: Dict[int, SimulatedDevice] = {n: SimulatedDevice(n, self.__random) for n in range(devices)}
+        self.jitter = jitter
+        self.corruption = corruption
+        # direct commands per second and device in transmit mode
+        self.change_rate = change_rate
+        self.__master, self.__slave = pty.openpty()
+        tty.setraw(self.__slave)
+        os.set_blocking(self.__master, False)
+        self.port = os.ttyname(self.__slave)
+        self.__framer = SysexFramer(self.__logger, self.handle_frame)
+        self.__loop = None
+        self.__queue = None
+        self.received = 0
+        self.sent = 0
+        self.corrupted = 0
+        self.changes = 0
+        self.__logger.info(f"simulating {devices} devices on {self.port}")
+
+    def devices(self) -> Dict[int, SimulatedDevice]:
+        return self.__devices
+
+    def run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self.__loop = asyncio.get_event_loop()
+        self.__queue = asyncio.Queue()
+        self.__loop.add_reader(self.__master, self.read)
+        self.__loop.create_task(self.write_queued())
+        if self.change_rate > 0:
+            self.__loop.create_task(self.emit_changes())
+        self.__loop.run_forever()
+        self.__loop.remove_reader(self.__master)
+        os.close(self.__master)
+        os.close(self.__slave)
+        self.__logger.info(f"stopped simulator on {self.port}")
+
+    def stop(self):
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+
+    def read(self):
+        try:
+            data = os.read(self.__master, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        self.__framer.data_received(data)
+
+    def targets(self, device_id: int) -> Iterable[SimulatedDevice]:
+        if device_id == const.BROADCAST_ID:
+            return [self.__devices[n] for n in sorted(self.__devices)]
+        device = self.__devices.get(device_id)
+        return () if device is None else (device,)
+
+    def handle_frame(self, frame: memoryview):
+        frame = bytes(frame)
+        self.received += 1
+        if not frame.startswith(const.VENDOR_HEADER) or len(frame) <= const.COMMAND_BYTE:
+            self.__logger.warning(f"ignoring frame {frame}")
+            return
+        command = frame[const.COMMAND_BYTE]
+        # the device answers once the request is through the wire
+        delay = len(frame) * BYTE_TIME + const.SIMULATOR_RESPONSE_DELAY
+        for device in self.targets(frame[const.ID_BYTE]):
+            if command == const.SEARCH_COMMAND:
+                self.send(device.search_response, delay)
+            elif command == const.PING_COMMAND:
+                self.send(device.ping(), delay)
+            elif command == const.DUMP_COMMAND:
+                part = frame[const.DUMP_PART_BYTE]
+                if part < len(device.dumps):
+                    self.send(device.dumps[part], delay)
+            elif command == const.TRANSMIT_MODE_COMMAND:
+                device.transmit_mode = True
+            elif command == const.DIRECT_COMMAND:
+                device.apply(frame)
+            else:
+                self.__logger.warning(f"ignoring unknown command {command} for device {device.device_id}")
+
+    def send(self, frame, delay: float):
+        if self.jitter:
+            delay += self.__random.uniform(0, self.jitter)
+        self.__queue.put_nowait((self.__loop.time() + delay, bytes(frame)))
+
+    def corrupt(self, frame: bytes) -> bytes:
+        if self.__random.random() >= self.corruption:
+            return frame
+        self.corrupted += 1
+        position = self.__random.randrange(1, len(frame) - 1)
+        if self.__random.random() < 0.5:
+            # a lost tail runs into the next frame
+            return frame[:position]
+        return frame[:position] + bytes([frame[position] | 0x80]) + frame[position + 1:]
+
+    async def write_queued(self):
+        while True:
+            not_before, frame = await self.__queue.get()
+            wait = not_before - self.__loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            view = memoryview(self.corrupt(frame))
+            while view:
+                try:
+                    written = os.write(self.__master, view[:const.SIMULATOR_WRITE_CHUNK])
+                except BlockingIOError:
+                    written = 0
+                view = view[written:]
+                await asyncio.sleep(max(written, const.SIMULATOR_WRITE_CHUNK) * BYTE_TIME)
+            self.sent += 1
+
+    async def emit_changes(self):
+        while True:
+            transmitting = [device for device in self.__devices.values() if device.transmit_mode]
+            rate = self.change_rate * max(len(transmitting), 1)
+            await asyncio.sleep(self.__random.expovariate(rate))
+            if transmitting:
+                self.changes += 1
+                self.send(self.__random.choice(transmitting).change(), const.SIMULATOR_RESPONSE_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="simulate chains of DCX2496 on pseudo-terminals")
+    parser.add_argument("--devices", type=int, default=const.MAX_DEVICES, help="devices per chain")
+    parser.add_argument("--chains", type=int, default=1)
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum extra response delay in seconds")
+    parser.add_argument("--corruption", type=float, default=0.0, help="share of answers that get corrupted")
+    parser.add_argument("--change-rate", type=float, default=0.0,
+                        help="direct commands per second and device in transmit mode")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger("pydcx")
+    simulators = [Simulator(logger, args.devices, args.jitter, args.corruption, args.change_rate,
+                            None if args.seed is None else args.seed + n) for n in range(args.chains)]
+    for simulator in simulators:
+        simulator.start()
+    print(f"PYDCX_PORTS={','.join(simulator.port for simulator in simulators)}", flush=True)
+    try:
+        for simulator in simulators:
+            simulator.join()
+    except KeyboardInterrupt:
+        for simulator in simulators:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
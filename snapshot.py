@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import os
+import struct
+
+import checksum
+import const
+
+MAGIC = b"DCXSNAP\x01"
+RECORD_HEADER = struct.Struct(">BB")
+RECORD = struct.Struct(f">BB{const.SEARCH_RESPONSE_LENGTH}s{const.PART_0_LENGTH}s{const.PART_1_LENGTH}s"
+                       f"{const.PING_RESPONSE_LENGTH}s")  # bus, device id, search, dump0, dump1, ping
+
+
+class Snapshot:
+    # Keeps the last known buffers of every device on disk so that a restart serves them right away. Restored
+    # devices stay unverified until they answered the dumps the poll scheduler requests for parts in doubt.
+    def __init__(self, logger, path: str, engine, delay: float = const.SNAPSHOT_DELAY):
+        self.__logger = logger.getChild("snapshot")
+        self.path = path
+        self.__engine = engine
+        self.delay = delay
+        self.__timer = None
+        # one thread writes the files in the order the loop took the snapshots
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self.written = 0
+
+    def load(self) -> int:
+        # runs on the loop thread before the buses connect
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            self.__logger.warning(f"can not read snapshot {self.path}: {e}")
+            return 0
+        if not data.startswith(MAGIC) or (len(data) - len(MAGIC)) % RECORD.size:
+            self.__logger.warning(f"ignoring malformed snapshot {self.path}")
+            return 0
+        restored = 0
+        for bus, device_id, search_response, dump0, dump1, ping_response in RECORD.iter_unpack(data[len(MAGIC):]):
+            if device_id >= const.MAX_DEVICES:
+                self.__logger.warning(f"ignoring device {device_id} of bus {bus} - the id is out of range")
+                continue
+            if checksum.validate(dump0) is not None or checksum.validate(dump1) is not None:
+                self.__logger.warning(f"ignoring malformed dumps of device {device_id} on bus {bus}")
+                continue
+            try:
+                self.__engine.bus(bus).restore(device_id, search_response, dump0, dump1, ping_response)
+            except KeyError:
+                self.__logger.info(f"ignoring device {device_id} of bus {bus} - that bus is not configured")
+                continue
+            restored += 1
+        self.__logger.info(f"restored {restored} devices from {self.path}")
+        return restored
+
+    def update(self, device, command, packet):
+        # pings only refresh the meters, they are persisted along with the next real change - and demo data never is
+        if command == const.PING_RESPONSE or self.__timer is not None or all(
+                bus.demo for bus in self.__engine.buses()):
+            return
+        self.__timer = asyncio.get_event_loop().call_later(self.delay, self.write)
+
+    def write(self) -> asyncio.Future:
+        # the buffers are copied on the loop thread, the file is written and synced off it
+        self.__timer = None
+        data = bytearray(MAGIC)
+        for (bus, device_id), device in sorted(self.__engine.devices().items()):
+            if not device.is_new and not self.__engine.bus(bus).demo:
+                data.extend(RECORD_HEADER.pack(bus, device_id))
+                data.extend(device.search_response)
+                data.extend(device.to_gui())
+        return asyncio.get_event_loop().run_in_executor(self.__executor, self.store, bytes(data))
+
+    def store(self, data: bytes) -> bool:
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.path)
+            # the rename itself only survives a power cut once the directory is synced
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        except OSError as e:
+            self.__logger.warning(f"can not write snapshot {self.path}: {e}")
+            return False
+        self.written += 1
+        return True
+
+    def flush(self):
+        # writes a pending change right away and waits until every snapshot is on disk - only for shutdown
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.write()
+        self.__executor.submit(lambda: None).result()
@@ -0,0 +1,288 @@
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+
+import const
+from parameters import Parameters
+
+MAGIC = b'DCX2'
+HEADER = struct.Struct("<4sIII")  # magic, slots, instance, generation of the device list
+SLOT_HEADER = struct.Struct("<IIII")  # sequence, flags, crc32 of dump0|dump1|ping, crc32 of the search response
+PRESENT = 1
+NEW = 2
+UNVERIFIED = 4
+
+DUMP_0_OFFSET = SLOT_HEADER.size
+DUMP_1_OFFSET = DUMP_0_OFFSET + const.PART_0_LENGTH
+PING_OFFSET = DUMP_1_OFFSET + const.PART_1_LENGTH
+SEARCH_OFFSET = PING_OFFSET + const.PING_RESPONSE_LENGTH
+SLOT_SIZE = SEARCH_OFFSET + const.SEARCH_RESPONSE_LENGTH
+GUI_LENGTH = SEARCH_OFFSET - DUMP_0_OFFSET
+# (start, end, index of its crc in the slot header) - a read copies the whole region holding the requested bytes
+GUI_REGION = (DUMP_0_OFFSET, SEARCH_OFFSET, 2)
+SEARCH_REGION = (SEARCH_OFFSET, SLOT_SIZE, 3)
+
+MAX_READ_ATTEMPTS = 1000
+# retries after the first few only sleep, the writer needs the cpu to finish its update
+SPIN_READS = 8
+READ_RETRY_DELAY = 0.0001
+
+
+class StoredDevice:
+    def __init__(self, store, slot: int):
+        self.__store = store
+        self.__slot = slot
+        self.bus, self.device_id = divmod(slot, const.MAX_DEVICES)
+
+    @property
+    def generation(self) -> int:
+        return self.__store.sequence(self.__slot)
+
+    @property
+    def instance(self) -> int:
+        # slot sequences never go back while the store lives
+        return self.__store.instance
+
+    @property
+    def is_new(self) -> bool:
+        return bool(self.__store.flags(self.__slot) & NEW)
+
+    @property
+    def verified(self) -> bool:
+        return not self.__store.flags(self.__slot) & UNVERIFIED
+
+    @property
+    def dump0(self) -> memoryview:
+        return self.__store.read(self.__slot, DUMP_0_OFFSET, const.PART_0_LENGTH)
+
+    @property
+    def dump1(self) -> memoryview:
+        return self.__store.read(self.__slot, DUMP_1_OFFSET, const.PART_1_LENGTH)
+
+    @property
+    def ping_response(self) -> memoryview:
+        return self.__store.read(self.__slot, PING_OFFSET, const.PING_RESPONSE_LENGTH)
+
+    @property
+    def search_response(self) -> memoryview:
+        return self.__store.read(self.__slot, SEARCH_OFFSET, const.SEARCH_RESPONSE_LENGTH)
+
+    def changes_since(self, generation: int):
+        # the shared state keeps no history - workers always answer with the full blob
+        return None
+
+    def to_gui(self) -> memoryview:
+        # dump0, dump1 and ping response are laid out back to back - one read serves the whole device
+        return self.__store.read(self.__slot, DUMP_0_OFFSET, GUI_LENGTH)
+
+    def gui_bytes(self) -> bytes:
+        return self.__store.copy(self.__slot, DUMP_0_OFFSET, GUI_LENGTH)
+
+    @property
+    def parameters(self) -> Parameters:
+        # decoded from one consistent copy of both dumps, nothing tells a worker when to invalidate it
+        gui = self.to_gui()
+        return Parameters((gui[:const.GUI_DUMP_1_OFFSET], gui[const.GUI_DUMP_1_OFFSET:const.GUI_PING_OFFSET]))
+
+
+class StoredBus:
+    def __init__(self, store, bus: int):
+        self.__store = store
+        self.bus = bus
+
+    @property
+    def instance(self) -> int:
+        return self.__store.instance
+
+    def generation(self) -> int:
+        return self.__store.generation()
+
+    def devices(self):
+        first = self.bus * const.MAX_DEVICES
+        return {slot - first: StoredDevice(self.__store, slot) for slot in range(first, first + const.MAX_DEVICES)
+                if self.__store.flags(slot) & PRESENT}
+
+    def device(self, n: int) -> StoredDevice:
+        if not 0 <= n < const.MAX_DEVICES:
+            raise KeyError(n)
+        return self.__store.device(self.bus * const.MAX_DEVICES + n)
+
+
+class StateStore:
+    # Single writer, many readers: the writer makes a slot's sequence odd while it updates the slot and even
+    # afterwards, readers retry until they read the same even sequence before and after copying.
+    # Python has no memory barriers, on weakly ordered cpus like the ARM boards a reader may see the sequence of
+    # one update with bytes of another - the crc32 the writer stores with every region catches those copies.
+    # Every bus has MAX_DEVICES slots, device n of bus b lives in slot b * MAX_DEVICES + n.
+    def __init__(self, path: str = const.STATE_STORE_PATH, owner: bool = False, buses: int = 1):
+        self.__path = path
+        self.__map = None
+        self.__slots = buses * const.MAX_DEVICES
+        if owner:
+            self.__create()
+
+    def __create(self):
+        size = HEADER.size + self.__slots * SLOT_SIZE
+        fd = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self.__map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        for slot in range(self.__slots):
+            self.__seal(slot, self.__begin(slot), 0)
+        self.__generation = 0
+        HEADER.pack_into(self.__map, 0, MAGIC, self.__slots, random.getrandbits(32), self.__generation)
+
+    def __mapping(self):
+        if self.__map is None:
+            try:
+                with open(self.__path, "rb") as f:
+                    self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None
+            magic, slots, _, _ = HEADER.unpack_from(self.__map, 0)
+            if magic != MAGIC or slots % const.MAX_DEVICES or len(self.__map) < HEADER.size + slots * SLOT_SIZE:
+                self.__map.close()
+                self.__map = None
+                raise RuntimeError(f"{self.__path} is not a device state store for {const.MAX_DEVICES} devices a bus")
+            self.__slots = slots
+        return self.__map
+
+    def __offset(self, slot: int) -> int:
+        if not 0 <= slot < self.__slots:
+            raise KeyError(slot)
+        return HEADER.size + slot * SLOT_SIZE
+
+    def __sequence(self, slot: int) -> int:
+        return SLOT_HEADER.unpack_from(self.__map, self.__offset(slot))[0]
+
+    def __begin(self, slot: int) -> int:
+        sequence = (self.__sequence(slot) + 1) & 0xFFFFFFFF
+        struct.pack_into("<I", self.__map, self.__offset(slot), sequence)
+        return sequence
+
+    def __seal(self, slot: int, sequence: int, flags: int):
+        offset = self.__offset(slot)
+        view = memoryview(self.__map)
+        try:
+            SLOT_HEADER.pack_into(self.__map, offset, (sequence + 1) & 0xFFFFFFFF, flags,
+                                  zlib.crc32(view[offset + DUMP_0_OFFSET:offset + SEARCH_OFFSET]),
+                                  zlib.crc32(view[offset + SEARCH_OFFSET:offset + SLOT_SIZE]))
+        finally:
+            view.release()
+
+    @staticmethod
+    def slot(device) -> int:
+        # an id beyond MAX_DEVICES would land in the slots of the next bus
+        if not 0 <= device.device_id < const.MAX_DEVICES:
+            raise RuntimeError(f"device id {device.device_id} of bus {device.bus} has no slot")
+        return device.bus * const.MAX_DEVICES + device.device_id
+
+    def update(self, device, command, packet):
+        if command == const.DEVICE_REMOVED:
+            self.remove(self.slot(device))
+        else:
+            self.publish(device)
+
+    def publish(self, device):
+        slot = self.slot(device)
+        offset = self.__offset(slot)
+        old_flags = SLOT_HEADER.unpack_from(self.__map, offset)[1]
+        flags = PRESENT | (NEW if device.is_new else 0) | (0 if device.verified else UNVERIFIED)
+        search_changed = self.__map[offset + SEARCH_OFFSET:offset + SLOT_SIZE] != device.search_response
+        sequence = self.__begin(slot)
+        self.__map[offset + DUMP_0_OFFSET:offset + SEARCH_OFFSET] = device.to_gui()
+        self.__map[offset + SEARCH_OFFSET:offset + SLOT_SIZE] = device.search_response
+        self.__seal(slot, sequence, flags)
+        if search_changed or flags != old_flags:
+            self.__bump_generation()
+
+    def remove(self, slot: int):
+        self.__seal(slot, self.__begin(slot), 0)
+        self.__bump_generation()
+
+    def __bump_generation(self):
+        self.__generation += 1
+        struct.pack_into("<I", self.__map, HEADER.size - 4, self.__generation & 0xFFFFFFFF)
+
+    @property
+    def instance(self) -> int:
+        mapping = self.__mapping()
+        if mapping is None:
+            return 0
+        return HEADER.unpack_from(mapping, 0)[2]
+
+    def generation(self) -> int:
+        mapping = self.__mapping()
+        if mapping is None:
+            return 0
+        return HEADER.unpack_from(mapping, 0)[3]
+
+    def sequence(self, slot: int) -> int:
+        mapping = self.__mapping()
+        if mapping is None:
+            raise KeyError(slot)
+        return SLOT_HEADER.unpack_from(mapping, self.__offset(slot))[0]
+
+    def copy(self, slot: int, offset: int, length: int) -> bytes:
+        # the one copy a read makes - of the whole region holding offset .. offset + length
+        mapping = self.__mapping()
+        if mapping is None:
+            raise KeyError(slot)
+        region_start, region_end, check = SEARCH_REGION if offset >= SEARCH_OFFSET else GUI_REGION
+        if not region_start <= offset <= offset + length <= region_end:
+            raise RuntimeError(f"{offset} .. {offset + length} is not within one region of a slot")
+        start = self.__offset(slot)
+        for attempt in range(MAX_READ_ATTEMPTS):
+            header = SLOT_HEADER.unpack_from(mapping, start)
+            sequence, flags = header[:2]
+            if not sequence & 1:
+                if not flags & PRESENT:
+                    raise KeyError(slot)
+                data = mapping[start + region_start:start + region_end]
+                if SLOT_HEADER.unpack_from(mapping, start)[0] == sequence and zlib.crc32(data) == header[check]:
+                    if region_end - region_start == length:
+                        return data
+                    return data[offset - region_start:offset - region_start + length]
+            time.sleep(0 if attempt < SPIN_READS else READ_RETRY_DELAY)
+        raise RuntimeError(f"slot {slot} did not settle after {MAX_READ_ATTEMPTS} reads")
+
+    def read(self, slot: int, offset: int, length: int) -> memoryview:
+        # slicing the result copies nothing more
+        region_start, region_end, _ = SEARCH_REGION if offset >= SEARCH_OFFSET else GUI_REGION
+        data = memoryview(self.copy(slot, region_start, region_end - region_start))
+        return data[offset - region_start:offset - region_start + length]
+
+    def flags(self, slot: int) -> int:
+        mapping = self.__mapping()
+        if mapping is None:
+            return 0
+        return SLOT_HEADER.unpack_from(mapping, self.__offset(slot))[1]
+
+    def buses(self) -> int:
+        return self.__slots // const.MAX_DEVICES if self.__mapping() is not None else 0
+
+    def bus(self, n: int) -> StoredBus:
+        if not 0 <= n < self.buses():
+            raise KeyError(n)
+        return StoredBus(self, n)
+
+    def devices(self):
+        if self.__mapping() is None:
+            return dict()
+        return {divmod(slot, const.MAX_DEVICES): StoredDevice(self, slot) for slot in range(self.__slots)
+                if self.flags(slot) & PRESENT}
+
+    def device(self, slot: int) -> StoredDevice:
+        if not self.flags(slot) & PRESENT:
+            raise KeyError(slot)
+        return StoredDevice(self, slot)
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
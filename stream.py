@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import json
+import threading
+from collections import deque
+from typing import Optional, Set, Tuple
+
+import const
+
+EVENT_NAMES = {
+    None: "device",
+    const.SEARCH_RESPONSE: "search",
+    const.PING_RESPONSE: "ping",
+    const.DUMP_RESPONSE: "dump",
+    const.DIRECT_COMMAND: "direct",
+    # clients apply our own direct commands like the ones devices send
+    const.LOCAL_CHANGE: "direct",
+    const.DEVICE_REMOVED: "removed",
+}
+
+
+class Subscription:
+    # device_ids holds (bus, id) addresses, None subscribes to every device
+    def __init__(self, device_ids: Optional[Set[Tuple[int, int]]], size: int):
+        self.device_ids = device_ids
+        self.__events = deque(maxlen=size)
+        self.__condition = threading.Condition()
+        self.__dropped = 0
+        self.__ready = None
+        self.closed = False
+
+    def wants(self, bus: int, device_id: int) -> bool:
+        return self.device_ids is None or (bus, device_id) in self.device_ids
+
+    def push(self, event: bytes):
+        with self.__condition:
+            if len(self.__events) == self.__events.maxlen:
+                self.__dropped += 1
+            self.__events.append(event)
+            self.__condition.notify()
+            if self.__ready is not None:
+                self.__ready.set()
+
+    def close(self):
+        with self.__condition:
+            self.closed = True
+            self.__condition.notify()
+            if self.__ready is not None:
+                self.__ready.set()
+
+    def take(self, timeout: float):
+        with self.__condition:
+            if not self.__events and not self.closed:
+                self.__condition.wait(timeout)
+            events = list(self.__events)
+            self.__events.clear()
+            dropped = self.__dropped
+            self.__dropped = 0
+        return events, dropped
+
+    async def take_async(self, timeout: float):
+        # for consumers on the loop thread that pushes the events
+        if not self.__events and not self.closed:
+            self.__ready = asyncio.Event()
+            try:
+                await asyncio.wait_for(self.__ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.__ready = None
+        return self.take(0)
+
+
+class Broadcaster:
+    def __init__(self, logger, size: int = const.STREAM_QUEUE_LENGTH):
+        self.__logger = logger.getChild("stream")
+        self.__size = size
+        self.__subscriptions = []
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__subscriptions)
+
+    def subscribe(self, device_ids: Optional[Set[Tuple[int, int]]] = None) -> Subscription:
+        subscription = Subscription(device_ids, self.__size)
+        with self.__lock:
+            self.__subscriptions = self.__subscriptions + [subscription]
+        self.__logger.info(f"new subscription for {device_ids or 'all devices'} - {len(self)} subscribed")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self.__lock:
+            self.__subscriptions = [s for s in self.__subscriptions if s is not subscription]
+        self.__logger.info(f"subscription closed - {len(self)} subscribed")
+
+    def update(self, device, command, packet):
+        subscriptions = self.__subscriptions
+        if not subscriptions:
+            return
+        event = None
+        for subscription in subscriptions:
+            if subscription.wants(device.bus, device.device_id):
+                if event is None:
+                    event = self.event(device, command, packet)
+                subscription.push(event)
+
+    def levels(self, meters):
+        # meter listener - each device's decoded levels are encoded once for all subscriptions
+        subscriptions = self.__subscriptions
+        if not subscriptions:
+            return
+        for bus, device_id, levels, limited in meters.devices():
+            event = None
+            for subscription in subscriptions:
+                if subscription.wants(bus, device_id):
+                    if event is None:
+                        data = {"bus": bus, "device": device_id, "levels": levels.tolist(),
+                                "limited": limited.astype(int).tolist()}
+                        event = f"event: levels\ndata: {json.dumps(data)}\n\n".encode("ascii")
+                    subscription.push(event)
+
+    @staticmethod
+    def event(device, command, packet) -> bytes:
+        # whole device changes carry the same dump0|dump1|ping blob as /api/devices/<n>
+        if command is None:
+            packet = device.to_gui()
+        data = {"bus": device.bus, "device": device.device_id, "generation": device.generation,
+                "version": f"{device.instance:x}-{device.generation:x}"}
+        if packet is not None:
+            data["data"] = base64.b64encode(packet).decode("ascii")
+        name = EVENT_NAMES.get(command, "device")
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("ascii")
+
+    @staticmethod
+    def chunk(events, dropped: int) -> bytes:
+        chunk = f"event: dropped\ndata: {dropped}\n\n".encode("ascii") if dropped else b""
+        return chunk + (b"".join(events) if events else b": keepalive\n\n")
+
+    def events(self, subscription: Subscription, keepalive: float = const.STREAM_KEEPALIVE):
+        try:
+            while not subscription.closed:
+                yield self.chunk(*subscription.take(keepalive))
+        finally:
+            self.unsubscribe(subscription)
+
+    async def events_async(self, subscription: Subscription, keepalive: float = const.STREAM_KEEPALIVE):
+        try:
+            while not subscription.closed:
+                yield self.chunk(*await subscription.take_async(keepalive))
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,24 @@
+import asyncio
+import logging
+import os
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("pydcx.test")
+
+
+@pytest.fixture
+def loop():
+    # handle_packet notifies the poll scheduler, which reads the loop clock
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
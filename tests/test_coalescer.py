@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from coalescer import Coalescer
+
+WINDOW = 0.02
+
+
+class FakeUltradrive:
+    # records what would go out, when
+    def __init__(self, devices=(0, 1)):
+        self.devices = devices
+        self.sent = []
+
+    @staticmethod
+    def check_parameter(channel, param, value):
+        if value < 0:
+            raise RuntimeError(f"value {value} is out of range")
+
+    def set_parameters(self, device_id, changes):
+        if device_id not in self.devices:
+            raise KeyError(device_id)
+        self.sent.append((asyncio.get_event_loop().time(), device_id, sorted(changes)))
+
+
+@pytest.fixture
+def coalescer(logger, loop):
+    ultradrive = FakeUltradrive()
+    coalescer = Coalescer(logger, ultradrive, WINDOW)
+    yield coalescer, ultradrive
+    coalescer.cancel()
+
+
+def test_the_first_change_goes_out_right_away(coalescer, loop):
+    coalescer, ultradrive = coalescer
+    assert coalescer.add(0, [(1, 2, 3)]) == (0, 0)
+    assert [sent[1:] for sent in ultradrive.sent] == [(0, [(1, 2, 3)])]
+
+
+def test_changes_within_the_window_fold_and_flush_once(coalescer, loop):
+    coalescer, ultradrive = coalescer
+
+    async def run():
+        started = asyncio.get_event_loop().time()
+        coalescer.add(0, [(1, 2, 0)])
+        assert coalescer.add(0, [(1, 2, 1), (1, 3, 1)]) == (2, 0)
+        assert coalescer.add(0, [(1, 2, 2)]) == (2, 1)
+        assert coalescer.add(1, [(1, 2, 5), (1, 2, 6)]) == (3, 1)
+        await asyncio.sleep(WINDOW * 1.5)
+        return started
+
+    started = loop.run_until_complete(run())
+    first, *flushed = ultradrive.sent
+    assert first[1:] == (0, [(1, 2, 0)])
+    # the last value of every parameter went out in one batch per device, a window after the first change
+    assert sorted(sent[1:] for sent in flushed) == [(0, [(1, 2, 2), (1, 3, 1)]), (1, [(1, 2, 6)])]
+    assert all(sent[0] - started >= WINDOW for sent in flushed)
+    assert len(coalescer) == 0
+    assert (coalescer.received, coalescer.folded, coalescer.sent) == (6, 2, 4)
+
+
+def test_a_quiet_window_sends_the_next_change_right_away(coalescer, loop):
+    coalescer, ultradrive = coalescer
+
+    async def run():
+        coalescer.add(0, [(1, 2, 0)])
+        await asyncio.sleep(WINDOW * 2.5)
+        coalescer.add(0, [(1, 2, 1)])
+
+    loop.run_until_complete(run())
+    assert [sent[2] for sent in ultradrive.sent] == [[(1, 2, 0)], [(1, 2, 1)]]
+
+
+def test_unknown_devices_are_dropped_at_the_flush(coalescer, loop):
+    coalescer, ultradrive = coalescer
+    coalescer.add(7, [(1, 2, 3)])
+    assert ultradrive.sent == []
+    assert coalescer.sent == 0
+    with pytest.raises(RuntimeError):
+        coalescer.add(0, [(1, 2, -1)])
+    assert len(coalescer) == 0
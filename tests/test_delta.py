@@ -0,0 +1,62 @@
+import const
+from Ultradrive import DUMMY_PING_RESPONSE, Device, Ultadrive
+
+
+def test_no_changes_since_the_current_generation():
+    device = Device(0)
+    device.changed((0, 1))
+    assert device.changes_since(device.generation) == []
+
+
+def test_close_ranges_are_merged():
+    device = Device(0)
+    device.changed((10, 11))
+    device.changed((12, 13), (100, 101))
+    device.changed((13, 20))
+    assert device.changes_since(0) == [(10, 20), (100, 101)]
+    assert device.changes_since(2) == [(13, 20)]
+
+
+def test_overlapping_ranges_keep_the_widest_end():
+    device = Device(0)
+    device.changed((0, 50))
+    device.changed((10, 20))
+    assert device.changes_since(0) == [(0, 50)]
+
+
+def test_unknown_generations_get_no_delta():
+    device = Device(0)
+    assert device.changes_since(1) is None
+    device.changed((0, 1))
+    assert device.changes_since(5) is None
+
+
+def test_aged_out_generations_get_no_delta():
+    device = Device(0)
+    for n in range(const.DELTA_HISTORY_LENGTH + 10):
+        device.changed((n, n + 1))
+    oldest = device.generation - const.DELTA_HISTORY_LENGTH
+    assert device.changes_since(oldest - 1) is None
+    assert device.changes_since(oldest) == [(oldest, device.generation)]
+
+
+def test_re_created_devices_tell_their_generations_apart():
+    assert Device(0).instance != Device(0).instance
+
+
+def test_pings_only_change_the_ping_range(logger, loop):
+    ultradrive = Ultadrive(logger)
+    ultradrive.setup_dummy_data()
+    device = ultradrive.device(0)
+    generation = device.generation
+    ultradrive.handle_packet(memoryview(bytearray(DUMMY_PING_RESPONSE)))
+    assert device.changes_since(generation) == [(const.GUI_PING_OFFSET, const.GUI_LENGTH)]
+    assert device.read(*device.changes_since(generation)[0]) == DUMMY_PING_RESPONSE
+
+
+def test_changes_of_an_unpublished_generation_are_left_out():
+    device = Device(0)
+    device.changed((0, 1))
+    # appended, but the generation was not bumped yet
+    device.history.append((device.generation + 1, ((50, 60),)))
+    assert device.changes_since(0) == [(0, 1)]
@@ -0,0 +1,91 @@
+import random
+
+import const
+from framer import SysexFramer
+from simulator import SimulatedDevice
+
+
+def traffic():
+    # what two devices send for a search, a ping and a full dump
+    frames = []
+    rng = random.Random(4)
+    for device in (SimulatedDevice(0, rng), SimulatedDevice(1, rng)):
+        frames.extend([bytes(device.search_response), device.ping(), bytes(device.dumps[0]),
+                       bytes(device.dumps[1]), device.change()])
+    return frames
+
+
+def framed(logger, chunks):
+    frames = []
+    # frames are views into the framer's buffers, only valid during the callback
+    framer = SysexFramer(logger, lambda frame: frames.append(bytes(frame)))
+    for chunk in chunks:
+        framer.data_received(chunk)
+    return framer, frames
+
+
+def test_frames_survive_any_chunking(logger):
+    frames = traffic()
+    stream = b"".join(frames)
+    for size in (1, 2, 7, 32, 4096):
+        framer, received = framed(logger, [stream[i:i + size] for i in range(0, len(stream), size)])
+        assert received == frames, size
+        assert framer.frames == len(frames)
+        assert not framer.in_frame
+
+
+def test_random_chunking(logger):
+    frames = traffic()
+    stream = b"".join(frames)
+    rng = random.Random(7)
+    chunks = []
+    position = 0
+    while position < len(stream):
+        size = rng.randrange(1, 100)
+        chunks.append(stream[position:position + size])
+        position += size
+    assert framed(logger, chunks)[1] == frames
+
+
+def test_garbage_between_frames_is_discarded(logger):
+    frames = traffic()
+    framer, received = framed(logger, [b"\x01\x02" + frames[0] + b"\x7f\x7f" + frames[1]])
+    assert received == frames[:2]
+    assert framer.discarded == 4
+
+
+def test_resync_on_unexpected_command_start(logger):
+    # a lost tail runs into the next frame, only the intact one is delivered
+    frames = traffic()
+    truncated = frames[2][:300]
+    framer, received = framed(logger, [truncated[:100], truncated[100:] + frames[3][:50], frames[3][50:]])
+    assert received == [frames[3]]
+    assert framer.resyncs == 1
+
+
+def test_resync_right_after_the_start_byte(logger):
+    frames = traffic()
+    framer, received = framed(logger, [const.COMMAND_START + frames[1]])
+    assert received == [frames[1]]
+    assert framer.resyncs == 1
+
+
+def test_oversized_frames_are_dropped(logger):
+    frames = traffic()
+    ping = frames[1]
+    # a ping response command byte selects the small ping buffer
+    oversized = ping[:-1] + bytes(const.PING_RESPONSE_LENGTH) + const.TERMINATOR
+    framer, received = framed(logger, [oversized + ping])
+    assert received == [ping]
+    assert framer.overflows == 1
+
+
+def test_reset_drops_a_partial_frame(logger):
+    frames = traffic()
+    framer = SysexFramer(logger, lambda frame: received.append(bytes(frame)))
+    received = []
+    framer.data_received(frames[2][:500])
+    assert framer.in_frame
+    framer.reset()
+    framer.data_received(frames[2][500:] + frames[1])
+    assert received == [frames[1]]
@@ -0,0 +1,69 @@
+import pytest
+
+from levels import WIDTH, LevelRing, Tier
+
+TIERS = ((0, 10), (10, 6), (60, 4))
+
+
+def levels(value: int) -> bytes:
+    return bytes([value % 128] * WIDTH)
+
+
+@pytest.fixture
+def ring():
+    # a ping every second for two minutes, its value is the second
+    ring = LevelRing(TIERS)
+    for second in range(120):
+        ring.add(float(second), levels(second))
+    return ring
+
+
+def test_buckets_roll_up_minimum_maximum_and_mean():
+    tier = Tier(10, 4)
+    for second, value in enumerate((5, 1, 9, 3, 7)):
+        tier.add(float(second), levels(value))
+    tier.add(10.0, levels(100))
+    (start, low, high, mean), (next_start, *_) = tier.samples(0, 20)
+    assert (start, next_start) == (0, 10)
+    assert (low, high, mean) == (levels(1), levels(9), levels(5))
+
+
+def test_full_rings_keep_the_newest_buckets():
+    tier = Tier(10, 3)
+    for second in range(60):
+        tier.add(float(second), levels(second))
+    assert [sample[0] for sample in tier.samples(0, 100)] == [20, 30, 40, 50]
+    assert tier.oldest() == 20
+
+
+def test_recent_windows_are_served_from_every_ping(ring):
+    resolution, samples = ring.query(115, 120)
+    assert resolution == 0
+    assert [sample[0] for sample in samples] == [115, 116, 117, 118, 119]
+    assert samples[0][1] == samples[0][2] == samples[0][3] == levels(115)
+
+
+def test_windows_beyond_a_tier_fall_back_to_a_coarser_one(ring):
+    # the raw pings reach back to 110, the 10 second buckets to 50
+    resolution, samples = ring.query(60, 120)
+    assert resolution == 10
+    assert [sample[0] for sample in samples] == [50, 60, 70, 80, 90, 100, 110]
+    assert samples[1][1:] == (levels(60), levels(69), levels(64))
+    resolution, samples = ring.query(0, 120)
+    assert resolution == 60
+    assert [sample[0] for sample in samples] == [0, 60]
+
+
+def test_a_coarser_resolution_downsamples_the_fitting_tier(ring):
+    resolution, samples = ring.query(60, 120, resolution=30)
+    assert resolution == 30
+    assert [sample[0] for sample in samples] == [30, 60, 90]
+    assert samples[1][1:3] == (levels(60), levels(89))
+
+
+def test_a_window_before_the_first_ping_starts_at_it():
+    ring = LevelRing(TIERS)
+    ring.add(1000.0, levels(3))
+    resolution, samples = ring.query(0, 2000)
+    assert resolution == 0
+    assert samples == [(1000.0, levels(3), levels(3), levels(3))]
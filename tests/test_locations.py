@@ -0,0 +1,77 @@
+import random
+
+import checksum
+import const
+import locations
+from simulator import SimulatedDevice
+from Ultradrive import DUMMY_DUMP_0, DUMMY_DUMP_1, Ultadrive
+
+VALUES = (0, 1, 0x55, 0x7F, 0x80, 0xFF, 0x100, 0x2AAA, const.MAX_PARAMETER_VALUE)
+
+
+def dumps():
+    return bytearray(DUMMY_DUMP_0), bytearray(DUMMY_DUMP_1)
+
+
+def representable(location) -> int:
+    # 7 low bits, the 8th bit if the location has a middle byte and 6 more if it has a high byte
+    _, _, _, middle_byte, _, _, high_byte = location
+    return 0x7F | (0x80 if middle_byte > 0 else 0) | (0x3F00 if high_byte > 0 else 0)
+
+
+def test_locations_lie_within_the_payload():
+    lengths = (const.PART_0_LENGTH, const.PART_1_LENGTH)
+    for key, location in locations.LOCATIONS.items():
+        for part, byte in locations.touched(location):
+            assert checksum.PAYLOAD_START <= byte < lengths[part] + checksum.CHECK_BYTE, key
+
+
+def test_patch_decode_round_trip():
+    data = dumps()
+    for key, location in locations.LOCATIONS.items():
+        for value in VALUES:
+            locations.patch(data, location, value >> 7, value & 0x7F)
+            assert locations.decode(data, location) == value & representable(location), key
+
+
+def test_patch_leaves_other_parameters_alone():
+    data = dumps()
+    before = {key: locations.decode(data, location) for key, location in locations.LOCATIONS.items()}
+    for key, location in locations.LOCATIONS.items():
+        value = before[key] ^ representable(location)
+        locations.patch(data, location, value >> 7, value & 0x7F)
+        after = {other: locations.decode(data, location) for other, location in locations.LOCATIONS.items()}
+        assert {other for other in after if after[other] != before[other]} == {key}
+        locations.patch(data, location, before[key] >> 7, before[key] & 0x7F)
+
+
+def test_byte_index_covers_every_touched_byte():
+    for key, location in locations.LOCATIONS.items():
+        for part_byte in locations.touched(location):
+            assert key in locations.BYTE_LOCATIONS[part_byte]
+
+
+def test_direct_commands_patch_the_cached_dumps(logger, loop):
+    # the front panel of a simulated device sends what it changed, the cached dumps follow
+    simulated = SimulatedDevice(3, random.Random(1))
+    ultradrive = Ultadrive(logger)
+    for frame in (simulated.search_response, simulated.dumps[0], simulated.dumps[1]):
+        ultradrive.handle_packet(memoryview(bytearray(frame)))
+    device = ultradrive.device(3)
+    for _ in range(200):
+        generation = device.generation
+        ultradrive.handle_packet(memoryview(bytearray(simulated.change())))
+        assert device.generation == generation + 1
+    assert device.dump0 == simulated.dumps[0]
+    assert device.dump1 == simulated.dumps[1]
+
+
+def test_patch_reports_the_touched_blob_ranges(logger, loop):
+    ultradrive = Ultadrive(logger)
+    ultradrive.setup_dummy_data()
+    device = ultradrive.device(0)
+    for (channel, param), location in locations.LOCATIONS.items():
+        ranges = device.patch(channel, param, 1, 2)
+        assert ranges == [(byte + part * const.GUI_DUMP_1_OFFSET, byte + part * const.GUI_DUMP_1_OFFSET + 1)
+                          for part, byte in locations.touched(location)]
+    assert device.patch(11, 2, 0, 0) is None
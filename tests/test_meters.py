@@ -0,0 +1,38 @@
+import const
+from meters import Meters
+from Ultradrive import DUMMY_PING_RESPONSE, Device
+
+
+def ping(levels):
+    packet = bytearray(DUMMY_PING_RESPONSE)
+    packet[const.PING_PAYLOAD_START:const.PING_PAYLOAD_START + len(levels)] = levels
+    return packet
+
+
+def test_a_cycle_publishes_levels_limiters_and_presence_together(logger):
+    meters = Meters(logger, 2)
+    before = meters.snapshot
+    meters.update(Device(3, 1), const.PING_RESPONSE, ping([0x05, 0x1F, 0x00]))
+    meters.decode()
+    assert meters.snapshot is not before
+    levels, limited, present = meters.snapshot
+    assert present.tolist().count(True) == 1 and present[const.MAX_DEVICES + 3]
+    [(bus, device_id, device_levels, device_limited)] = meters.devices()
+    assert (bus, device_id) == (1, 3)
+    assert device_levels[:3].tolist() == [5, 15, 0]
+    assert device_limited[:3].tolist() == [False, True, False]
+    assert meters.limiting() == [(1, 3, [const.METER_CHANNELS[1]])]
+
+
+def test_removed_devices_leave_the_next_cycle(logger):
+    meters = Meters(logger, 1)
+    device = Device(0)
+    meters.update(device, const.PING_RESPONSE, ping([0x1F]))
+    meters.decode()
+    levels, limited, present = meters.snapshot
+    meters.update(device, const.DEVICE_REMOVED, None)
+    # the published arrays are not touched in place
+    assert present[0] and limited[0, 0]
+    meters.decode()
+    assert list(meters.devices()) == []
+    assert meters.limiting() == []
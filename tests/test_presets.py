@@ -0,0 +1,96 @@
+import pytest
+
+import locations
+import presets
+from presets import PresetStore
+from Ultradrive import DUMMY_DUMP_0, DUMMY_DUMP_1, Device
+
+
+class Coalescer:
+    def __init__(self):
+        self.added = []
+
+    def add(self, device_id, changes):
+        self.added.append((device_id, list(changes)))
+        return 0, 0
+
+
+class FakeUltradrive:
+    # the part of Ultadrive a recall uses
+    def __init__(self, device):
+        self.__device = device
+        self.__coalescer = Coalescer()
+
+    def device(self, n):
+        if n != self.__device.device_id:
+            raise KeyError(n)
+        return self.__device
+
+    def coalescer(self):
+        return self.__coalescer
+
+
+def dumped(device_id=0):
+    device = Device(device_id)
+    device.dump0[:] = DUMMY_DUMP_0
+    device.dump1[:] = DUMMY_DUMP_1
+    for check, dump in zip(device.checks, (DUMMY_DUMP_0, DUMMY_DUMP_1)):
+        check.received(dump)
+    return device
+
+
+def edited(keys, value):
+    dumps = (bytearray(DUMMY_DUMP_0), bytearray(DUMMY_DUMP_1))
+    for key in keys:
+        locations.patch(dumps, locations.LOCATIONS[key], value >> 7, value & 0x7F)
+    return bytes(dumps[0]), bytes(dumps[1])
+
+
+def test_recall_sends_only_the_differences():
+    device = dumped()
+    keys = sorted(locations.LOCATIONS)[::97][:5]
+    value = next(v for v in range(1, 128) if all(locations.decode((device.dump0, device.dump1),
+                                                                  locations.LOCATIONS[key]) != v for key in keys))
+    ultradrive = FakeUltradrive(device)
+    assert presets.recall(ultradrive, 0, edited(keys, value)) == len(keys)
+    [(device_id, changes)] = ultradrive.coalescer().added
+    assert device_id == 0
+    assert sorted(changes) == sorted((channel, param, value) for channel, param in keys)
+
+
+def test_recalling_the_current_state_sends_nothing():
+    ultradrive = FakeUltradrive(dumped())
+    assert presets.recall(ultradrive, 0, (DUMMY_DUMP_0, DUMMY_DUMP_1)) == 0
+    assert ultradrive.coalescer().added == []
+
+
+def test_unverified_devices_are_not_recalled_onto():
+    device = dumped()
+    device.doubt()
+    ultradrive = FakeUltradrive(device)
+    # the api answers 409 for this
+    assert presets.recall(ultradrive, 0, edited(sorted(locations.LOCATIONS)[:1], 1)) is None
+    assert ultradrive.coalescer().added == []
+
+
+def test_saved_presets_load_back(tmp_path):
+    store = PresetStore(str(tmp_path))
+    store.save("live.set-1", DUMMY_DUMP_0, DUMMY_DUMP_1)
+    assert store.names() == ["live.set-1"]
+    assert store.load("live.set-1") == (DUMMY_DUMP_0, DUMMY_DUMP_1)
+    store.delete("live.set-1")
+    with pytest.raises(KeyError):
+        store.load("live.set-1")
+
+
+@pytest.mark.parametrize("name", ["../escape", "", "a" * 65, "white space"])
+def test_preset_names_stay_within_the_store(tmp_path, name):
+    with pytest.raises(RuntimeError):
+        PresetStore(str(tmp_path)).save(name, DUMMY_DUMP_0, DUMMY_DUMP_1)
+
+
+def test_damaged_presets_are_rejected(tmp_path):
+    store = PresetStore(str(tmp_path))
+    store.save("damaged", DUMMY_DUMP_0, DUMMY_DUMP_1[:100] + b"\x80" + DUMMY_DUMP_1[101:])
+    with pytest.raises(RuntimeError):
+        store.load("damaged")
@@ -0,0 +1,29 @@
+import const
+from Ultradrive import DUMMY_PING_RESPONSE, Device, Ultadrive
+
+
+def test_only_device_answers_count_as_pongs(logger, loop):
+    ultradrive = Ultadrive(logger)
+    scheduler = ultradrive.scheduler()
+    device = Device(0)
+    scheduler.update(device, None, None)
+    state = scheduler.states()[0]
+    state.failures = 3
+    state.next_poll = loop.time() + const.MAX_POLL_BACKOFF
+    for command in (None, const.DIRECT_COMMAND, const.LOCAL_CHANGE):
+        scheduler.update(device, command, None)
+        assert state.last_pong == 0
+        assert state.failures == 3
+    scheduler.update(device, const.PING_RESPONSE, DUMMY_PING_RESPONSE)
+    assert state.last_pong > 0
+    assert state.failures == 0
+    assert state.next_poll <= loop.time()
+
+
+def test_removed_devices_are_no_longer_polled(logger, loop):
+    ultradrive = Ultadrive(logger)
+    scheduler = ultradrive.scheduler()
+    device = Device(0)
+    scheduler.update(device, const.PING_RESPONSE, DUMMY_PING_RESPONSE)
+    scheduler.update(device, const.DEVICE_REMOVED, None)
+    assert scheduler.states() == {}
@@ -0,0 +1,83 @@
+import pytest
+
+import const
+from snapshot import MAGIC, RECORD, Snapshot
+from Ultradrive import DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE, DUMMY_SEARCH_RESPONSE, Ultadrive
+
+
+class Engine:
+    # the part of engine.Engine a snapshot uses
+    def __init__(self, buses):
+        self.__buses = buses
+
+    def buses(self):
+        return self.__buses
+
+    def bus(self, n):
+        if not 0 <= n < len(self.__buses):
+            raise KeyError(n)
+        return self.__buses[n]
+
+    def devices(self):
+        return {(bus.bus, n): device for bus in self.__buses for n, device in bus.devices().items()}
+
+
+def dumped(logger, bus=0):
+    ultradrive = Ultadrive(logger, bus=bus)
+    for frame in (DUMMY_SEARCH_RESPONSE, DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE):
+        ultradrive.handle_packet(memoryview(bytearray(frame)))
+    return ultradrive
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "snapshot")
+
+
+def test_a_written_snapshot_restores_the_devices(logger, loop, path):
+    source = dumped(logger)
+    snapshot = Snapshot(logger, path, Engine([source]))
+    assert loop.run_until_complete(snapshot.write())
+    assert snapshot.written == 1
+
+    restored = Ultadrive(logger)
+    assert Snapshot(logger, path, Engine([restored])).load() == 1
+    device = restored.device(0)
+    assert device.gui_bytes() == source.device(0).gui_bytes()
+    assert bytes(device.search_response) == bytes(source.device(0).search_response)
+    # restored state is served right away, but only a fresh dump verifies it
+    assert not device.is_new
+    assert not device.verified
+
+
+def test_flush_writes_a_pending_change_before_returning(logger, loop, path):
+    snapshot = Snapshot(logger, path, Engine([dumped(logger)]), delay=60)
+    snapshot.update(None, const.DUMP_RESPONSE, None)
+    assert snapshot.written == 0
+    snapshot.flush()
+    assert snapshot.written == 1
+    with open(path, "rb") as f:
+        assert len(f.read()) == len(MAGIC) + RECORD.size
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: b"DCXSNAP\x00" + data[len(MAGIC):],
+    lambda data: data[:-1],
+    lambda data: data[:len(MAGIC) + 100] + bytes([data[len(MAGIC) + 100] | 0x80]) + data[len(MAGIC) + 101:],
+    lambda data: data[:len(MAGIC) + 1] + bytes([const.MAX_DEVICES]) + data[len(MAGIC) + 2:],
+])
+def test_a_corrupt_snapshot_restores_nothing(logger, loop, path, corrupt):
+    loop.run_until_complete(Snapshot(logger, path, Engine([dumped(logger)])).write())
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(corrupt(data))
+    restored = Ultadrive(logger)
+    assert Snapshot(logger, path, Engine([restored])).load() == 0
+    assert restored.devices() == {}
+
+
+def test_devices_of_unconfigured_buses_are_skipped(logger, loop, path):
+    loop.run_until_complete(Snapshot(logger, path, Engine([Ultadrive(logger), dumped(logger, 1)])).write())
+    restored = Ultadrive(logger)
+    assert Snapshot(logger, path, Engine([restored])).load() == 0
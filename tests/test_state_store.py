@@ -0,0 +1,120 @@
+import mmap
+import struct
+
+import pytest
+
+import const
+import state_store
+from state_store import HEADER, SLOT_HEADER, SLOT_SIZE, StateStore
+from Ultradrive import DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE, DUMMY_SEARCH_RESPONSE, Device
+
+DEVICE_ID = 3
+SLOT = HEADER.size + DEVICE_ID * SLOT_SIZE
+
+
+class Clock:
+    # stands in for the time module of state_store, runs a step instead of every retry delay
+    def __init__(self, step=None):
+        self.step = step
+        self.sleeps = 0
+
+    def sleep(self, delay):
+        self.sleeps += 1
+        if self.step is not None:
+            self.step(self.sleeps)
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "state")
+    owner = StateStore(path, owner=True)
+    device = Device(DEVICE_ID)
+    device.dump0[:] = DUMMY_DUMP_0
+    device.dump1[:] = DUMMY_DUMP_1
+    device.ping_response[:] = DUMMY_PING_RESPONSE
+    device.search_response[:] = DUMMY_SEARCH_RESPONSE
+    device.is_new = False
+    for check, dump in zip(device.checks, (DUMMY_DUMP_0, DUMMY_DUMP_1)):
+        check.received(dump)
+    owner.publish(device)
+    reader = StateStore(path)
+    with open(path, "r+b") as f:
+        shared = mmap.mmap(f.fileno(), 0)
+    yield reader, shared, device
+    shared.close()
+    reader.close()
+    owner.close()
+
+
+def test_a_reader_sees_the_published_device(stores):
+    reader, _, device = stores
+    stored = reader.bus(0).device(DEVICE_ID)
+    assert stored.gui_bytes() == device.gui_bytes()
+    assert bytes(stored.search_response) == DUMMY_SEARCH_RESPONSE
+    assert stored.verified and not stored.is_new
+
+
+def test_a_torn_read_is_retried_until_the_writer_finished(stores, monkeypatch):
+    reader, shared, device = stores
+    sequence = SLOT_HEADER.unpack_from(shared, SLOT)[0]
+    # the writer is halfway through an update
+    struct.pack_into("<I", shared, SLOT, sequence + 1)
+    shared[SLOT + state_store.DUMP_0_OFFSET] = 0
+
+    def finish(sleeps):
+        if sleeps == state_store.SPIN_READS + 2:
+            shared[SLOT + state_store.DUMP_0_OFFSET] = DUMMY_DUMP_0[0]
+            struct.pack_into("<I", shared, SLOT, sequence + 2)
+
+    clock = Clock(finish)
+    monkeypatch.setattr(state_store, "time", clock)
+    assert reader.bus(0).device(DEVICE_ID).gui_bytes() == device.gui_bytes()
+    assert clock.sleeps == state_store.SPIN_READS + 2
+
+
+def test_a_slot_that_never_settles_is_rejected(stores, monkeypatch):
+    reader, shared, _ = stores
+    struct.pack_into("<I", shared, SLOT, SLOT_HEADER.unpack_from(shared, SLOT)[0] + 1)
+    clock = Clock()
+    monkeypatch.setattr(state_store, "time", clock)
+    monkeypatch.setattr(state_store, "MAX_READ_ATTEMPTS", 20)
+    with pytest.raises(RuntimeError):
+        reader.copy(DEVICE_ID, state_store.DUMP_0_OFFSET, const.PART_0_LENGTH)
+    assert clock.sleeps == 20
+
+
+def test_a_crc_mismatch_is_never_returned(stores, monkeypatch):
+    reader, shared, device = stores
+    # the sequence reads even and unchanged, but the bytes are of another update
+    offset = SLOT + state_store.DUMP_1_OFFSET + 100
+    shared[offset] ^= 0x01
+    monkeypatch.setattr(state_store, "time", Clock())
+    monkeypatch.setattr(state_store, "MAX_READ_ATTEMPTS", 20)
+    with pytest.raises(RuntimeError):
+        reader.copy(DEVICE_ID, state_store.DUMP_1_OFFSET, const.PART_1_LENGTH)
+    # the search response has a crc of its own
+    assert bytes(reader.read(DEVICE_ID, state_store.SEARCH_OFFSET, const.SEARCH_RESPONSE_LENGTH)) == \
+        DUMMY_SEARCH_RESPONSE
+
+    def settle(sleeps):
+        shared[offset] = device.dump1[100]
+
+    monkeypatch.setattr(state_store, "time", Clock(settle))
+    assert reader.copy(DEVICE_ID, state_store.DUMP_1_OFFSET, const.PART_1_LENGTH) == bytes(device.dump1)
+
+
+def test_a_removed_device_is_gone_for_readers(tmp_path):
+    path = str(tmp_path / "state")
+    owner = StateStore(path, owner=True)
+    device = Device(DEVICE_ID)
+    owner.publish(device)
+    reader = StateStore(path)
+    generation = reader.generation()
+    assert DEVICE_ID in reader.bus(0).devices()
+    owner.remove(DEVICE_ID)
+    assert reader.bus(0).devices() == {}
+    assert reader.generation() > generation
+    with pytest.raises(KeyError):
+        reader.copy(DEVICE_ID, state_store.DUMP_0_OFFSET, const.PART_0_LENGTH)
+    reader.close()
+    owner.close()
@@ -0,0 +1,149 @@
+import asyncio
+import random
+
+import pytest
+
+import checksum
+import const
+import locations
+import metrics
+from capture import Capture, ReplayTransport
+from simulator import SimulatedDevice
+from Ultradrive import DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE, Ultadrive
+
+TRUNCATED_DUMP = bytes.fromhex("F0002032000E10F7")
+HEADER_ONLY = bytes.fromhex("F0002032F7")
+UNKNOWN_COMMAND = bytes.fromhex("F00020320707990000F7")
+
+
+def malformed(bus: int) -> float:
+    return sum(metrics.MALFORMED.value((str(bus), label)) for label in ("truncated", str(const.DUMP_RESPONSE), "153"))
+
+
+def test_validate_accepts_real_dumps():
+    assert checksum.validate(DUMMY_DUMP_0) is None
+    assert checksum.validate(DUMMY_DUMP_1) is None
+
+
+@pytest.mark.parametrize("dump", [
+    TRUNCATED_DUMP,
+    HEADER_ONLY,
+    DUMMY_DUMP_0[:-10] + const.TERMINATOR,
+    DUMMY_DUMP_0[:const.PART_BYTE] + b"\x02" + DUMMY_DUMP_0[const.PART_BYTE + 1:],
+    DUMMY_DUMP_1[:100] + b"\x80" + DUMMY_DUMP_1[101:],
+])
+def test_validate_rejects_broken_dumps(dump):
+    assert checksum.validate(dump) is not None
+
+
+def test_incremental_checksum_follows_patches():
+    dumps = (bytearray(DUMMY_DUMP_0), bytearray(DUMMY_DUMP_1))
+    checks = (checksum.PartCheck(), checksum.PartCheck())
+    for check, dump in zip(checks, dumps):
+        check.received(dump)
+    rng = random.Random(2)
+    for key in rng.sample(sorted(locations.LOCATIONS), 100):
+        location = locations.LOCATIONS[key]
+        touched = locations.touched(location)
+        old = [dumps[part][byte] for part, byte in touched]
+        locations.patch(dumps, location, rng.randrange(128), rng.randrange(128))
+        for (part, byte), value in zip(touched, old):
+            checks[part].patched(value, dumps[part][byte])
+    for check, dump in zip(checks, dumps):
+        assert check.checksum == checksum.checksum(dump)
+        check.received(dump)
+        assert not check.diverged
+
+
+@pytest.mark.parametrize("frame", [
+    TRUNCATED_DUMP,
+    HEADER_ONLY,
+    UNKNOWN_COMMAND,
+    DUMMY_PING_RESPONSE[:const.ID_BYTE] + b"\x80" + DUMMY_PING_RESPONSE[const.ID_BYTE + 1:],
+    DUMMY_PING_RESPONSE[:const.ID_BYTE] + bytes([const.MAX_DEVICES]) + DUMMY_PING_RESPONSE[const.ID_BYTE + 1:],
+    DUMMY_PING_RESPONSE[:-3] + const.TERMINATOR,
+    bytes.fromhex("F0002032000E20F7"),
+])
+def test_malformed_frames_leave_no_device_behind(logger, loop, frame):
+    ultradrive = Ultadrive(logger)
+    with pytest.raises(RuntimeError):
+        ultradrive.handle_packet(memoryview(bytearray(frame)))
+    assert ultradrive.devices() == {}
+    assert ultradrive.generation() == 0
+
+
+def test_malformed_dump_puts_the_cached_part_in_doubt(logger, loop):
+    ultradrive = Ultadrive(logger)
+    for frame in (DUMMY_DUMP_0, DUMMY_DUMP_1):
+        ultradrive.handle_packet(memoryview(bytearray(frame)))
+    device = ultradrive.device(0)
+    assert device.verified
+    with pytest.raises(RuntimeError):
+        ultradrive.handle_packet(memoryview(bytearray(DUMMY_DUMP_1[:100] + b"\x80" + DUMMY_DUMP_1[101:])))
+    assert device.checks[1].in_doubt
+    assert not device.checks[0].in_doubt
+
+
+class Transport:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+
+def test_malformed_frames_do_not_cost_the_rest_of_the_chunk(logger, loop):
+    async def run():
+        ultradrive = Ultadrive(logger, bus=7)
+        ultradrive.attach(asyncio.get_event_loop())
+        protocol = ultradrive.protocol()
+        protocol.connection_made(Transport())
+        before = malformed(7)
+        for broken in (TRUNCATED_DUMP, HEADER_ONLY, UNKNOWN_COMMAND):
+            protocol.data_received(broken + DUMMY_PING_RESPONSE)
+        protocol.connection_lost(None)
+        await asyncio.sleep(0)
+        return ultradrive, malformed(7) - before
+
+    ultradrive, rejected = loop.run_until_complete(run())
+    assert list(ultradrive.devices()) == [0]
+    assert ultradrive.device(0).ping_response == DUMMY_PING_RESPONSE
+    assert rejected == 3
+
+
+def test_replayed_corrupted_capture(logger, loop, tmp_path):
+    # every device answers a search, a ping and both dumps - device 1 with a corrupted id, device 2 with a
+    # truncated dump that runs into its ping
+    rng = random.Random(5)
+    devices = [SimulatedDevice(n, rng) for n in range(4)]
+    capture = Capture(str(tmp_path / "bus.cap"))
+    for device in devices:
+        frames = [bytes(device.search_response), device.ping(), bytes(device.dumps[0]), bytes(device.dumps[1])]
+        if device.device_id == 1:
+            frames = [frame[:const.ID_BYTE] + b"\x81" + frame[const.ID_BYTE + 1:] for frame in frames]
+        elif device.device_id == 2:
+            frames[2] = frames[2][:200]
+        stream = b"".join(frames)
+        for start in range(0, len(stream), 32):
+            capture.record(const.CAPTURE_INCOMING, stream[start:start + 32])
+    capture.close()
+
+    async def run():
+        ultradrive = Ultadrive(logger, bus=8)
+        ultradrive.attach(asyncio.get_event_loop())
+        protocol = ultradrive.protocol()
+        transport = ReplayTransport(logger, capture.path, 0)
+        await transport.run(protocol)
+        protocol.connection_lost(None)
+        await asyncio.sleep(0)
+        return ultradrive
+
+    ultradrive = loop.run_until_complete(run())
+    assert sorted(ultradrive.devices()) == [0, 2, 3]
+    for n in (0, 3):
+        device = ultradrive.device(n)
+        assert device.dump0 == devices[n].dumps[0]
+        assert device.dump1 == devices[n].dumps[1]
+        assert device.ping_response == devices[n].ping_response
+        assert device.verified
+    assert ultradrive.device(2).checks[0].in_doubt
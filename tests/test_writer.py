@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+import const
+import locations
+from Ultradrive import BYTE_TIME, DUMMY_DUMP_0, DUMMY_DUMP_1, DUMMY_PING_RESPONSE, Ultadrive
+
+
+class Transport:
+    # records when each frame went out
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append((asyncio.get_event_loop().time(), bytes(data)))
+
+
+class ClosingTransport(Transport):
+    # like the serial transport, connection_lost follows on the next iteration
+    def __init__(self, protocol):
+        super(ClosingTransport, self).__init__()
+        self.protocol = protocol
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            asyncio.get_event_loop().call_soon(self.protocol.connection_lost, None)
+
+
+class FailingTransport(Transport):
+    def write(self, data):
+        if not self.written:
+            self.written.append((asyncio.get_event_loop().time(), None))
+            raise OSError("port gone")
+        super(FailingTransport, self).write(data)
+
+
+def connect(logger, transport):
+    ultradrive = Ultadrive(logger)
+    ultradrive.attach(asyncio.get_event_loop())
+    protocol = ultradrive.protocol()
+    protocol.connection_made(transport)
+    # only the frames of the test go out
+    ultradrive.scheduler().stop()
+    return ultradrive, protocol
+
+
+async def disconnect(protocol):
+    protocol.connection_lost(None)
+    # let the writer task see its cancellation
+    await asyncio.sleep(0)
+
+
+def test_requests_keep_the_bus_for_the_response_window(logger, loop):
+    async def run():
+        transport = Transport()
+        ultradrive, protocol = connect(logger, transport)
+        await asyncio.gather(ultradrive.write(ultradrive.ping_command(3)), ultradrive.write(ultradrive.ping_command(4)))
+        await disconnect(protocol)
+        return transport.written
+
+    (first_at, ping), (second_at, _) = loop.run_until_complete(run())
+    assert second_at - first_at >= len(ping) * BYTE_TIME + const.RESPONSE_WINDOW
+
+
+def test_frames_wait_for_the_answer_and_the_turnaround(logger, loop):
+    async def run():
+        transport = Transport()
+        ultradrive, protocol = connect(logger, transport)
+        await ultradrive.write(ultradrive.ping_command(0))
+        second = ultradrive.write(ultradrive.ping_command(1))
+        # the answer arrives in two chunks, past the response window the bus is still busy in between
+        protocol.data_received(DUMMY_PING_RESPONSE[:10])
+        await asyncio.sleep(const.BUS_IDLE_TIMEOUT / 2)
+        assert len(transport.written) == 1
+        protocol.data_received(DUMMY_PING_RESPONSE[10:])
+        answered = asyncio.get_event_loop().time()
+        await second
+        await disconnect(protocol)
+        return transport.written, answered
+
+    written, answered = loop.run_until_complete(run())
+    assert len(written) == 2
+    assert written[1][0] - answered >= const.BUS_TURNAROUND
+
+
+def test_a_frame_starting_before_the_writer_resumes_keeps_the_queue_waiting(logger, loop):
+    async def run():
+        transport = Transport()
+        ultradrive, protocol = connect(logger, transport)
+        loop = asyncio.get_event_loop()
+        frame = ultradrive.direct_command(0, [(1, 2, 0, 3)])
+        await ultradrive.write(frame)
+        queued = ultradrive.write(ultradrive.ping_command(0))
+        # due right after the bus is released - both timers run in one iteration, before the woken writer
+        talking = len(frame) * BYTE_TIME + const.BUS_TURNAROUND * 2
+        loop.call_at(loop.time() + talking, protocol.data_received, DUMMY_PING_RESPONSE[:5])
+        time.sleep(talking * 2)
+        await asyncio.sleep(const.BUS_IDLE_TIMEOUT / 2)
+        writes = len(transport.written)
+        protocol.data_received(DUMMY_PING_RESPONSE[5:])
+        finished = asyncio.get_event_loop().time()
+        await queued
+        await disconnect(protocol)
+        return writes, transport.written, finished
+
+    writes, written, finished = loop.run_until_complete(run())
+    assert writes == 1
+    assert written[1][0] - finished >= const.BUS_TURNAROUND
+
+
+def test_a_failed_write_fails_its_frame_only(logger, loop):
+    async def run():
+        transport = FailingTransport()
+        ultradrive, protocol = connect(logger, transport)
+        results = await asyncio.gather(ultradrive.write(ultradrive.ping_command(0)),
+                                       ultradrive.write(ultradrive.ping_command(1)), return_exceptions=True)
+        await disconnect(protocol)
+        return results, protocol.write_errors
+
+    (failed, served), errors = loop.run_until_complete(run())
+    assert isinstance(failed, RuntimeError)
+    assert served >= 0
+    assert errors == 1
+
+
+def test_parameters_that_were_not_sent_put_their_part_in_doubt(logger, loop):
+    async def run():
+        transport = FailingTransport()
+        ultradrive, protocol = connect(logger, transport)
+        for frame in (DUMMY_DUMP_0, DUMMY_DUMP_1):
+            ultradrive.handle_packet(memoryview(bytearray(frame)))
+        device = ultradrive.device(0)
+        assert device.verified
+        notified = []
+        ultradrive.add_listener(lambda device, command, packet: notified.append(command))
+        channel, param = next(iter(sorted(locations.LOCATIONS)))
+        part = locations.touched(locations.LOCATIONS[(channel, param)])[0][0]
+        results = await asyncio.gather(*ultradrive.set_parameters(0, [(channel, param, 1)]), return_exceptions=True)
+        doubted = [check.in_doubt for check in device.checks]
+        await asyncio.gather(*ultradrive.set_parameters(0, [(channel, param, 2)]))
+        await disconnect(protocol)
+        return results, doubted, part, notified, [check.in_doubt for check in device.checks]
+
+    results, doubted, part, notified, after = loop.run_until_complete(run())
+    assert isinstance(results[0], RuntimeError)
+    assert doubted[part] and not doubted[1 - part]
+    # our own frames are not presented as incoming ones
+    assert notified == [const.LOCAL_CHANGE, const.LOCAL_CHANGE]
+    # a frame that went out leaves the doubt for the re-dump to clear
+    assert after == doubted
+
+
+def test_stopping_a_bus_closes_its_port_and_ends_its_writer(logger, loop):
+    async def run():
+        ultradrive = Ultadrive(logger)
+        ultradrive.attach(asyncio.get_event_loop())
+        protocol = ultradrive.protocol()
+        transport = ClosingTransport(protocol)
+        protocol.connection_made(transport)
+        ultradrive.scheduler().stop()
+        await ultradrive.write(ultradrive.ping_command(0))
+        writers = [task for task in asyncio.all_tasks() if task.get_coro().__name__ == "write_queued"]
+        queued = ultradrive.write(ultradrive.ping_command(1))
+        ultradrive.stop()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return transport, writers, queued
+
+    transport, writers, queued = loop.run_until_complete(run())
+    assert transport.closed
+    assert writers and all(task.done() for task in writers)
+    assert isinstance(queued.exception(), RuntimeError)